@@ -16,11 +16,13 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD')
 }
 
-def get_data_from_db(limit=1000):
+def get_data_from_db(limit=1000, before=None):
+    """Get the newest limit bars, or the newest limit bars before a timestamp"""
     try:
         conn = psycopg2.connect(**DB_CONFIG)
         cursor = conn.cursor()
         
+        # Keyset pagination: each older page starts below the oldest bar of the last one
         query = """
             SELECT 
                 timestamp_market as timestamp,
@@ -31,18 +33,16 @@ def get_data_from_db(limit=1000):
                 volume
             FROM minute_data
             WHERE trading_session = 'regular'
+              AND (%s IS NULL OR timestamp_market < %s)
             ORDER BY timestamp_market DESC
             LIMIT %s
         """
         
-        cursor.execute(query, (limit,))
+        cursor.execute(query, (before, before, limit))
         data = cursor.fetchall()
         
-        # Convert to pandas DataFrame
-        df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        
-        # Sort by timestamp ascending for the chart
-        df = df.sort_values('timestamp')
+        # Rows arrive newest first; reverse them for the chart
+        df = pd.DataFrame(data[::-1], columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         
         return df
         
@@ -1,7 +1,6 @@
 import psycopg2
 from dotenv import load_dotenv
 import os
-import pandas as pd
 from tabulate import tabulate
 
 # Load environment variables
@@ -71,6 +70,9 @@ def get_table_structure(table_name):
 
 def get_sample_data(table_name, limit=5):
     """Get sample data from the table"""
+    # pandas takes longer to import than the rest of the tool, so only sample data loads it
+    import pandas as pd
+
     try:
         conn = psycopg2.connect(**DB_CONFIG)
         
@@ -0,0 +1,143 @@
+"""Benchmark the ORM fetch path against DataService's columnar fetch paths
+
+Times, over the same date range, the time from query to a DataFrame ready
+for indicators of:
+
+- the ORM path DataService used before the columnar one,
+- the SQLAlchemy Core select of the OHLCV columns, used on every engine
+  other than PostgreSQL with psycopg2,
+- the binary COPY, used on PostgreSQL with psycopg2.
+
+--seed-days first loads that many weekdays of synthetic minute bars, ending
+at --end, so a fresh database can be benchmarked with a year of data:
+
+    createdb spy_bench
+    python scripts/benchmark_fetch.py --database-url postgresql://localhost/spy_bench \\
+        --symbol BENCH --seed-days 252 --start 2023-01-01 --end 2024-01-01
+
+Usage:
+    python scripts/benchmark_fetch.py --start 2023-01-01 --end 2024-01-01
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from spy_python.models.bar_arrays import BarArrays
+from spy_python.models.spy_data import Base, SPYData
+from spy_python.services.data_service import DataService
+from spy_python.services.ingestion import BarIngestor
+
+# Minute bars of a regular session, from 9:30
+SESSION_BARS = 390
+
+
+def orm_frame(service: DataService, start: datetime, end: datetime) -> pd.DataFrame:
+    """Fetch bars the way DataService did before the columnar path."""
+    with Session(service.engine) as session:
+        query = select(SPYData).where(
+            SPYData.symbol == service.symbol,
+            SPYData.timestamp >= start,
+            SPYData.timestamp < end
+        ).order_by(SPYData.timestamp)
+        data = session.execute(query).scalars().all()
+    return pd.DataFrame([{
+        'timestamp': d.timestamp,
+        'open': float(d.open),
+        'high': float(d.high),
+        'low': float(d.low),
+        'close': float(d.close),
+        'volume': d.volume
+    } for d in data])
+
+
+def select_frame(service: DataService, start: datetime, end: datetime) -> pd.DataFrame:
+    """Fetch bars through the Core select of the columnar path."""
+    return service._select_bar_arrays(start, end).to_frame()
+
+
+def copy_frame(service: DataService, start: datetime, end: datetime) -> pd.DataFrame:
+    """Fetch bars through the binary COPY of the columnar path."""
+    return service._copy_bar_arrays(start, end).to_frame()
+
+
+def synthetic_bars(days: int, end: datetime, seed: int = 0) -> BarArrays:
+    """Random-walk minute bars for the last `days` weekdays before end"""
+    sessions = []
+    day = end.replace(hour=0, minute=0, second=0, microsecond=0)
+    while len(sessions) < days:
+        day -= timedelta(days=1)
+        if day.weekday() < 5:
+            sessions.append(day + timedelta(hours=9, minutes=30))
+    opens = np.array(sorted(sessions), dtype='datetime64[s]').astype(np.int64)
+    times = (opens[:, None] + 60 * np.arange(SESSION_BARS)).ravel()
+
+    rng = np.random.default_rng(seed)
+    close = np.round(400 + np.cumsum(rng.normal(0, 0.05, len(times))), 2)
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.round(rng.uniform(0, 0.1, len(times)), 2)
+    return BarArrays(
+        time=times, open=open_, high=np.maximum(open_, close) + spread,
+        low=np.minimum(open_, close) - spread, close=close,
+        volume=rng.integers(1_000, 50_000, len(times))
+    )
+
+
+def timed(func, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - t0)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--start', type=datetime.fromisoformat, required=True)
+    parser.add_argument('--end', type=datetime.fromisoformat, required=True)
+    parser.add_argument('--symbol', default='SPY')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--database-url', help="Database to benchmark; the configured one by default")
+    parser.add_argument('--seed-days', type=int, default=0,
+                        help="Load this many weekdays of synthetic minute bars for --symbol first")
+    args = parser.parse_args()
+
+    service = DataService(symbol=args.symbol)
+    if args.database_url:
+        service.engine = create_engine(args.database_url)
+    engine = service.engine
+    if args.seed_days:
+        Base.metadata.create_all(engine)
+        result = BarIngestor(engine, args.symbol).ingest([synthetic_bars(args.seed_days, args.end)])
+        print(f"Seeded {result.rows} bars in {result.seconds:.1f} s")
+
+    paths = {
+        'ORM': orm_frame,
+        'Core select': select_frame,
+    }
+    if engine.dialect.name == 'postgresql' and engine.dialect.driver == 'psycopg2':
+        paths['Binary COPY'] = copy_frame
+
+    print(f"Database: {engine.dialect.name}+{engine.dialect.driver}, {args.symbol} "
+          f"{args.start.date()} to {args.end.date()}, best of {args.repeats}")
+    print("| Path | Rows | Seconds | Rows/s | Speedup |")
+    print("|---|---:|---:|---:|---:|")
+    baseline, reference = None, None
+    for name, fetch in paths.items():
+        seconds, frame = timed(lambda: fetch(service, args.start, args.end), args.repeats)
+        baseline = baseline or seconds
+        if name != 'ORM':
+            if reference is not None and not frame.equals(reference):
+                raise AssertionError(f"{name} returned different bars than the Core select")
+            reference = frame
+        print(f"| {name} | {len(frame)} | {seconds:.3f} | {len(frame) / seconds:,.0f} | "
+              f"{baseline / seconds:.1f}x |")
+    if 'Binary COPY' not in paths:
+        print("Binary COPY: skipped, it needs PostgreSQL with psycopg2")
+
+
+if __name__ == "__main__":
+    main()
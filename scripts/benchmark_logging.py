@@ -0,0 +1,119 @@
+"""Benchmark the per-call cost of eager and lazy log message formatting
+
+Eager calls build their message with an f-string before loguru sees the
+record; lazy calls pass a template and its arguments, which loguru formats
+only once some sink takes the record. Each case is a message of a call site
+in services/, timed both ways at DEBUG and INFO under no sinks, the
+development and the production logging configuration (see
+config/logging.py). Production drops DEBUG records before anything is
+formatted, so that is where lazy calls save the most; its INFO records are
+rate-limited per call site, so most of them are dropped by the sink filter
+after the message is formatted.
+
+Times are those of the calling thread, which is what a request pays; the
+production queue is drained between measurements. Console output goes to
+/dev/null and the log files to a temporary directory.
+
+Usage:
+    python scripts/benchmark_logging.py --calls 100000 --rounds 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+WORK_DIR = tempfile.mkdtemp(prefix='spy-logging-benchmark-')
+
+from loguru import logger
+from spy_python.config.logging import SPYLogger
+
+MODES = ('none', 'development', 'production')
+LEVELS = ('DEBUG', 'INFO')
+
+# Argument values typical of the call sites below
+SYMBOL = 'SPY'
+ROWS = 123456
+WRITTEN = 1234
+SECONDS = 1.2345
+DAY = datetime(2024, 1, 2)
+
+# Call sites as (eager, lazy) functions of the level
+CASES = {
+    'int and str': (
+        lambda level: logger.log(level, f"Merged {ROWS} {SYMBOL} bars so far"),
+        lambda level: logger.log(level, "Merged {} {} bars so far", ROWS, SYMBOL),
+    ),
+    'datetime': (
+        lambda level: logger.log(level, f"Fetching data for date: {DAY}"),
+        lambda level: logger.log(level, "Fetching data for date: {}", DAY),
+    ),
+    'format specs': (
+        lambda level: logger.log(
+            level, f"Ingested {ROWS} {SYMBOL} bars ({WRITTEN} inserted or changed) "
+                   f"in {SECONDS:.2f} seconds, {ROWS / SECONDS:,.0f} rows/sec"
+        ),
+        lambda level: logger.log(
+            level, "Ingested {} {} bars ({} inserted or changed) in {:.2f} seconds, {:,.0f} rows/sec",
+            ROWS, SYMBOL, WRITTEN, SECONDS, ROWS / SECONDS
+        ),
+    ),
+}
+
+
+def configure(mode: str) -> None:
+    """Replace the log sinks with those of a mode"""
+    logger.remove()
+    if mode != 'none':
+        SPYLogger(os.path.join(WORK_DIR, mode), mode)
+
+
+def time_calls(call, level: str, calls: int) -> float:
+    """Seconds per call of calls calls, draining queued records afterwards"""
+    started = time.perf_counter()
+    for _ in range(calls):
+        call(level)
+    elapsed = time.perf_counter() - started
+    logger.complete()
+    return elapsed / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=100000, help="Calls per measurement")
+    parser.add_argument('--rounds', type=int, default=5, help="Rounds per measurement, the best is reported")
+    args = parser.parse_args()
+
+    results = {}
+    stderr = sys.stderr
+    # Modes take turns so that drift in machine load affects them alike; the best round is kept
+    for _ in range(args.rounds):
+        for mode in MODES:
+            sys.stderr = open(os.devnull, 'w')
+            try:
+                configure(mode)
+                for case, (eager, lazy) in CASES.items():
+                    for level in LEVELS:
+                        for style, call in (('eager', eager), ('lazy', lazy)):
+                            seconds = time_calls(call, level, args.calls)
+                            key = (mode, level, case, style)
+                            results[key] = min(results.get(key, seconds), seconds)
+            finally:
+                logger.remove()
+                sys.stderr.close()
+                sys.stderr = stderr
+
+    print(f"Best of {args.rounds} rounds of {args.calls} calls, logs in {WORK_DIR}")
+    print("| Mode | Level | Message | Eager us/call | Lazy us/call | Saving |")
+    print("|---|---|---|---:|---:|---:|")
+    for mode in MODES:
+        for level in LEVELS:
+            for case in CASES:
+                eager = results[(mode, level, case, 'eager')] * 1e6
+                lazy = results[(mode, level, case, 'lazy')] * 1e6
+                print(f"| {mode} | {level} | {case} | {eager:.2f} | {lazy:.2f} | {(eager - lazy) / eager:.0%} |")
+
+
+if __name__ == "__main__":
+    main()
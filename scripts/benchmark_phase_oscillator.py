@@ -0,0 +1,106 @@
+"""Benchmark the original per-bar phase oscillator against calculate and calculate_batch
+
+The baseline is calculate() as it was before vectorization: a per-bar Python
+loop for the compression tracker, run once per series. The current
+calculate() and calculate_batch are timed on the same bars.
+
+Usage:
+    python scripts/benchmark_phase_oscillator.py
+    python scripts/benchmark_phase_oscillator.py --cases 1x390 252x390 1x100000
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from spy_python.indicators.saty_phase_oscillator import SatyPhaseOscillator
+
+DEFAULT_CASES = ['1x390', '252x390', '1x100000', '1x10000000']
+
+
+def make_bars(n_series: int, n_bars: int, seed: int = 0):
+    """Generate random-walk minute bars shaped (series, bars)."""
+    rng = np.random.default_rng(seed)
+    close = np.round(400 + np.cumsum(rng.normal(0, 0.05, (n_series, n_bars)), axis=1), 2)
+    high = close + np.round(np.abs(rng.normal(0, 0.03, (n_series, n_bars))), 2)
+    low = close - np.round(np.abs(rng.normal(0, 0.03, (n_series, n_bars))), 2)
+    return close, high, low
+
+
+def baseline_calculate(oscillator: SatyPhaseOscillator, df: pd.DataFrame) -> np.ndarray:
+    """The original calculate(), up to the compression tracker and oscillator."""
+    close = df['close'].values
+    high = df['high'].values
+    low = df['low'].values
+
+    pivot = oscillator.calculate_ema(close, 21)
+    above_pivot = close >= pivot
+    bband_offset = 2.0 * oscillator.calculate_stdev(close, 21)
+    bband_up = pivot + bband_offset
+    bband_down = pivot - bband_offset
+    tr = np.maximum(high - low, np.maximum(np.abs(high - np.roll(close, 1)), np.abs(low - np.roll(close, 1))))
+    atr = pd.Series(tr).rolling(window=14).mean().values
+    compression = np.where(above_pivot, bband_up - (pivot + 2.0 * atr), (pivot - 2.0 * atr) - bband_down)
+    in_expansion_zone = np.where(above_pivot, bband_up - (pivot + 1.854 * atr), (pivot - 1.854 * atr) - bband_down)
+    expansion = np.roll(compression, 1) <= compression
+
+    compression_tracker = np.zeros_like(compression, dtype=bool)
+    for i in range(1, len(compression)):
+        if expansion[i] and in_expansion_zone[i] > 0:
+            compression_tracker[i] = False
+        elif compression[i] <= 0:
+            compression_tracker[i] = True
+        else:
+            compression_tracker[i] = False
+
+    oscillator_values = oscillator.calculate_ema(((close - pivot) / (3.0 * atr)) * 100, 3)
+    colors = np.where(compression_tracker, oscillator.colors['magenta'],
+                      np.where(oscillator_values >= 0.0, oscillator.colors['green'], oscillator.colors['red']))
+    return colors
+
+
+def best_of(func, min_time: float = 1.0, max_repeats: int = 20) -> float:
+    """Return the fastest of several runs of func, in seconds."""
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_repeats and (not timings or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+def run_case(oscillator: SatyPhaseOscillator, n_series: int, n_bars: int):
+    close, high, low = make_bars(n_series, n_bars)
+
+    def per_series(calculate):
+        def run():
+            for i in range(n_series):
+                calculate(pd.DataFrame({'close': close[i], 'high': high[i], 'low': low[i]}))
+        return run
+
+    def batch():
+        oscillator.calculate_batch(close, high, low)
+
+    baseline = best_of(per_series(lambda df: baseline_calculate(oscillator, df)))
+    current = best_of(per_series(oscillator.calculate))
+    vectorized = best_of(batch)
+    print(f"| {n_series} x {n_bars} | {baseline * 1000:.2f} | {current * 1000:.2f} ({baseline / current:.1f}x) | "
+          f"{vectorized * 1000:.2f} ({baseline / vectorized:.1f}x) |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', nargs='+', default=DEFAULT_CASES,
+                        help="Cases as SERIESxBARS, e.g. 252x390")
+    args = parser.parse_args()
+
+    oscillator = SatyPhaseOscillator()
+    print("| Case | Baseline ms | calculate ms (speedup) | calculate_batch ms (speedup) |")
+    print("|---|---:|---:|---:|")
+    for case in args.cases:
+        n_series, n_bars = (int(part) for part in case.lower().split('x'))
+        run_case(oscillator, n_series, n_bars)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark payload size and encode time of the bar response formats
+
+Encodes the day arrays of random-walk minute bars with every format
+/api/data can serve, uncompressed and compressed, and reports the payload
+bytes and the fastest encode time of each.
+
+Usage:
+    python scripts/benchmark_wire_formats.py
+    python scripts/benchmark_wire_formats.py --cases day=390 year=98280
+"""
+import argparse
+import gzip
+import json
+import time
+import numpy as np
+from spy_python.models.bar_arrays import BarArrays
+from spy_python.services.data_service import DataService
+from spy_python.services.serialization import columnar_payload, row_payload, arrow_payload, packed_payload
+from spy_python.web_app import GZIP_LEVEL, BROTLI_QUALITY
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# One regular session, 21 sessions and 252 sessions of minute bars
+DEFAULT_CASES = ['day=390', 'month=8190', 'year=98280']
+
+
+def make_bars(n_bars: int, seed: int = 0) -> BarArrays:
+    """Generate random-walk minute bars."""
+    rng = np.random.default_rng(seed)
+    close = np.round(400 + np.cumsum(rng.normal(0, 0.05, n_bars)), 2)
+    open_ = np.concatenate(([400.0], close[:-1]))
+    return BarArrays.from_columns({
+        'time': 1704205800 + np.arange(n_bars) * 60,
+        'open': open_,
+        'high': np.maximum(open_, close) + np.round(np.abs(rng.normal(0, 0.03, n_bars)), 2),
+        'low': np.minimum(open_, close) - np.round(np.abs(rng.normal(0, 0.03, n_bars)), 2),
+        'close': close,
+        'volume': rng.integers(1000, 50000, n_bars)
+    })
+
+
+def best_of(func, min_time: float = 1.0, max_repeats: int = 20):
+    """Return the result and fastest time in seconds of several runs of func."""
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_repeats and (not timings or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - t0)
+    return result, min(timings)
+
+
+def encoders(day, palette):
+    """Encoders by format name, each returning the response body."""
+    rows = lambda: json.dumps({'data': row_payload(day, palette)}).encode()
+    columnar = lambda: json.dumps({'data': columnar_payload(day, palette)}).encode()
+    arrow = lambda: arrow_payload(day, palette)
+    packed = lambda: packed_payload(day, palette)
+    formats = {'rows json': rows, 'columnar json': columnar, 'arrow ipc': arrow, 'packed': packed}
+    for name, encode in list(formats.items()):
+        formats[f"{name} + gzip"] = lambda encode=encode: gzip.compress(encode(), compresslevel=GZIP_LEVEL)
+        if brotli is not None:
+            formats[f"{name} + br"] = lambda encode=encode: brotli.compress(encode(), quality=BROTLI_QUALITY)
+    return formats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', nargs='+', default=DEFAULT_CASES,
+                        help="Cases as NAME=BARS, e.g. day=390")
+    args = parser.parse_args()
+    if brotli is None:
+        print("brotli is not installed; skipping br")
+
+    service = DataService(bar_cache=None, bar_store=None)
+    for case in args.cases:
+        name, n_bars = case.split('=')
+        day = service.calculate_indicators(make_bars(int(n_bars)))
+        print(f"\n{name} ({n_bars} bars)")
+        baseline = None
+        for format_name, encode in encoders(day, service.palette).items():
+            body, seconds = best_of(encode)
+            baseline = baseline or len(body)
+            print(f"  {format_name:<22} {len(body):>12,} bytes  {len(body) / baseline:6.1%}  "
+                  f"{seconds * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
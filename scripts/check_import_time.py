@@ -0,0 +1,73 @@
+"""Check the import time of entry points against budgets
+
+Imports each module in a fresh interpreter with -X importtime, sums the
+cumulative time of the modules it loads beyond interpreter startup, and
+keeps the best of several runs. Exits with status 1 if a module is over its
+budget or loads a heavy dependency it should only load on first use.
+
+Usage:
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --repeat 5 --scale 1.5
+"""
+import argparse
+import subprocess
+import sys
+
+# Budgets in milliseconds, with the heavy modules each must not load on import
+BUDGETS = {
+    'spy_python.__main__': (60, ('flask', 'sqlalchemy', 'numpy', 'pandas', 'pyarrow', 'loguru')),
+    'spy_python.config.logging': (50, ('loguru',)),
+    'spy_python.config.database': (50, ('sqlalchemy',)),
+    'spy_python.scripts.sync_bars': (60, ('sqlalchemy', 'numpy', 'pandas', 'pyarrow')),
+    'spy_python.scripts.load_sample_data': (60, ('sqlalchemy', 'numpy', 'pandas', 'pyarrow')),
+    'spy_python.services.data_service': (800, ('pandas', 'pyarrow')),
+    'spy_python.web_app': (1000, ('pandas', 'pyarrow')),
+}
+
+
+def import_times(statement: str) -> dict:
+    """Run a statement with -X importtime and return the top-level modules it loaded with their cumulative us"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not name.startswith('  '):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def loaded_modules(module: str) -> set:
+    """Names of every module loaded by importing a module"""
+    result = subprocess.run([sys.executable, '-c', f"import sys, {module}; print('\\n'.join(sys.modules))"],
+                            capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per module, the best is kept")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiplier of every budget, for slow machines")
+    args = parser.parse_args()
+
+    startup = set(import_times('pass'))
+    failures = 0
+    print(f"  {'module':<40} {'ms':>8} {'budget':>8}")
+    for module, (budget, forbidden) in BUDGETS.items():
+        milliseconds = min(
+            sum(us for name, us in import_times(f"import {module}").items() if name not in startup)
+            for _ in range(args.repeat)
+        ) / 1000
+        loaded = sorted(name for name in forbidden if name in loaded_modules(module))
+        over = milliseconds > budget * args.scale
+        failures += over or bool(loaded)
+        status = 'FAIL' if over or loaded else 'ok'
+        print(f"  {module:<40} {milliseconds:>8.1f} {budget * args.scale:>8.0f}  {status}"
+              + (f"  loads {', '.join(loaded)}" if loaded else ''))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,4 @@
-import yfinance as yf
-import pandas as pd
-from sqlalchemy import create_engine
-from datetime import datetime, timedelta
+from datetime import timedelta
 from loguru import logger
 import os
 from dotenv import load_dotenv
@@ -16,33 +13,27 @@ DB_USER = os.getenv("DB_USER", "postgres")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "01551a0404")
 
 def load_spy_data():
+    from sqlalchemy import create_engine
+    from spy_python.services.bar_cache import ParquetBarCache
+    from spy_python.services.bar_sources import YahooBarSource
+    from spy_python.services.bar_store import MemmapBarStore
+    from spy_python.services.ingestion import BarIngestor
+
     # Create database connection
     engine = create_engine(f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}')
-    
-    # Download SPY data for the last 6 months
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=180)
-    
-    logger.info(f"Downloading SPY data from {start_date.date()} to {end_date.date()}")
-    
-    # Download data from Yahoo Finance
-    spy = yf.download("SPY", start=start_date, end=end_date, interval="1d")
-    
-    # Reset index to make Date a column
-    spy.reset_index(inplace=True)
-    
-    # Rename columns to match our database schema
-    spy.columns = ['date', 'open', 'high', 'low', 'close', 'adj_close', 'volume']
-    
-    # Convert to datetime if not already
-    spy['date'] = pd.to_datetime(spy['date'])
-    
-    logger.info(f"Downloaded {len(spy)} records")
-    
+
+    # Daily bars newer than the last stored bar, or the last 6 months
+    source = YahooBarSource(interval="1d", lookback=timedelta(days=180))
+
     try:
-        # Write to database
-        spy.to_sql('stock_data', engine, if_exists='replace', index=False)
-        logger.success(f"Successfully loaded {len(spy)} records into the database")
+        # Upsert into stock_data, keeping the table, its indexes and other symbols intact
+        ingestor = BarIngestor(engine, symbol="SPY", bar_cache=ParquetBarCache.from_env(),
+                               bar_store=MemmapBarStore.from_env())
+        result = ingestor.sync(source)
+        logger.success(
+            f"Successfully loaded {result.rows} records into the database "
+            f"({result.rows_per_second:,.0f} rows/sec)"
+        )
     except Exception as e:
         logger.error(f"Error loading data into database: {str(e)}")
         raise
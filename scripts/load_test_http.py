@@ -0,0 +1,100 @@
+"""Load-test the chart data endpoint
+
+Runs concurrent clients, each over one keep-alive connection, that request
+/api/data for the latest sessions in turn, and reports throughput, latency
+percentiles and status codes. Start the server in production mode first:
+
+    python -m spy_python --production --port 8000
+
+Usage:
+    python scripts/load_test_http.py --clients 32 --duration 30 --days 5
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+import numpy as np
+
+
+def session_dates(base_url: str, days: int) -> list:
+    """Get the latest session date and the weekdays before it"""
+    parts = urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    connection.request('GET', '/api/latest-date')
+    latest = datetime.fromisoformat(json.loads(connection.getresponse().read())['date']).date()
+    connection.close()
+    dates = []
+    while len(dates) < days:
+        if latest.weekday() < 5:
+            dates.append(latest.isoformat())
+        latest -= timedelta(days=1)
+    return dates
+
+
+def client(base_url: str, paths: list, deadline: float, latencies: list, statuses: Counter,
+           errors: list) -> None:
+    """Request the paths in turn until the deadline, recording latency per request"""
+    parts = urlsplit(base_url)
+    connection = None
+    index = 0
+    while time.time() < deadline:
+        try:
+            if connection is None:
+                connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+            started = time.perf_counter()
+            connection.request('GET', paths[index % len(paths)], headers={'Accept-Encoding': 'gzip'})
+            response = connection.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status] += 1
+            if response.getheader('Connection', '').lower() == 'close':
+                connection.close()
+                connection = None
+        except Exception as e:
+            errors.append(str(e))
+            connection = None
+        index += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds to run")
+    parser.add_argument('--days', type=int, default=5, help="Latest sessions to cycle through")
+    parser.add_argument('--format', default='columnar')
+    args = parser.parse_args()
+
+    paths = [f"/api/data?date={date}&format={args.format}" for date in session_dates(args.url, args.days)]
+    latencies, statuses, errors = [], Counter(), []
+    deadline = time.time() + args.duration
+    threads = [
+        threading.Thread(target=client, args=(args.url, paths[i:] + paths[:i], deadline, latencies, statuses, errors),
+                         daemon=True)
+        for i in range(args.clients)
+    ]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - started
+
+    latency_ms = np.array(latencies) * 1000
+    print(f"clients: {args.clients}  duration: {elapsed:.1f} s  requests: {len(latencies)}  "
+          f"errors: {len(errors)}")
+    print(f"throughput: {len(latencies) / elapsed:.1f} requests/s")
+    if len(latency_ms):
+        p50, p95, p99 = np.percentile(latency_ms, [50, 95, 99])
+        print(f"latency ms: p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}  max {latency_ms.max():.1f}")
+    print(f"status codes: {dict(statuses)}")
+    if errors:
+        print(f"first error: {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Load-test the /api/stream Server-Sent Events endpoint
+
+Opens many concurrent subscribers and reports how many bar events each
+received and the delay between the server publishing an event and clients
+reading it. Run the server with a replay feed to get a steady event rate:
+
+    STREAM_REPLAY_FILE=bars.parquet STREAM_REPLAY_INTERVAL=0.5 \
+        python -m flask --app src.spy_python.web_app run
+
+A production server redirects /api/stream to its stream server, which is
+followed.
+
+Usage:
+    python scripts/load_test_stream.py --clients 300 --duration 60
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urljoin, urlsplit
+import numpy as np
+
+
+def subscriber(url: str, deadline: float, latencies: list, counts: list, errors: list) -> None:
+    """Read events until the deadline, recording publish-to-read latency"""
+    events = 0
+    try:
+        for _ in range(3):
+            parts = urlsplit(url)
+            connection = http.client.HTTPConnection(parts.hostname, parts.port or 80,
+                                                    timeout=deadline - time.time() + 30)
+            connection.request('GET', parts.path + (f"?{parts.query}" if parts.query else ''))
+            response = connection.getresponse()
+            if response.status not in (301, 302, 307, 308):
+                break
+            url = urljoin(url, response.getheader('Location'))
+            connection.close()
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+        while time.time() < deadline:
+            line = response.fp.readline()
+            if not line:
+                break
+            if line.startswith(b'data: '):
+                payload = json.loads(line[6:])
+                latencies.append(time.time() - payload['sent_at'])
+                events += 1
+        connection.close()
+    except Exception as e:
+        errors.append(str(e))
+    counts.append(events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5000/api/stream')
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds to stay subscribed")
+    args = parser.parse_args()
+
+    latencies, counts, errors = [], [], []
+    deadline = time.time() + args.duration
+    threads = [
+        threading.Thread(target=subscriber, args=(args.url, deadline, latencies, counts, errors), daemon=True)
+        for _ in range(args.clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"Clients: {args.clients}, failed: {len(errors)}")
+    if errors:
+        print(f"First error: {errors[0]}")
+    if counts:
+        print(f"Events per client: min {min(counts)}, max {max(counts)}")
+    if latencies:
+        latency_ms = np.array(latencies) * 1000
+        print(f"Latency ms: p50 {np.percentile(latency_ms, 50):.1f}, "
+              f"p99 {np.percentile(latency_ms, 99):.1f}, max {latency_ms.max():.1f}")
+
+
+if __name__ == "__main__":
+    main()
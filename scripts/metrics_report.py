@@ -0,0 +1,61 @@
+"""Print latency percentiles per endpoint and per stage from /metrics
+
+Scrapes the server's Prometheus endpoint and estimates p50, p95 and p99 of
+every request and stage histogram series from its buckets, as
+histogram_quantile would. The percentiles cover everything since the
+server started.
+
+Usage:
+    python scripts/metrics_report.py --url http://localhost:8000
+"""
+import argparse
+import math
+import re
+import urllib.request
+from collections import defaultdict
+from spy_python.services.metrics import bucket_quantile
+
+SAMPLE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+HISTOGRAMS = ('spy_request_duration_seconds', 'spy_stage_duration_seconds')
+
+
+def parse_buckets(text: str, name: str) -> dict:
+    """Collect the cumulative buckets of each series of a histogram, keyed by its labels"""
+    series = defaultdict(list)
+    for line in text.splitlines():
+        match = SAMPLE.match(line)
+        if not match or match.group(1) != f"{name}_bucket":
+            continue
+        labels = dict(LABEL.findall(match.group(2) or ''))
+        bound = labels.pop('le')
+        series[tuple(sorted(labels.items()))].append(
+            (math.inf if bound == '+Inf' else float(bound), float(match.group(3)))
+        )
+    return series
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:8000')
+    args = parser.parse_args()
+
+    with urllib.request.urlopen(f"{args.url}/metrics", timeout=30) as response:
+        text = response.read().decode()
+
+    for name in HISTOGRAMS:
+        print(f"\n{name}")
+        print(f"  {'series':<58} {'count':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for labels, buckets in sorted(parse_buckets(text, name).items()):
+            buckets.sort()
+            bounds = [bound for bound, _ in buckets]
+            cumulative = [count for _, count in buckets]
+            quantiles = [bucket_quantile(q, bounds, cumulative) * 1000 for q in (0.5, 0.95, 0.99)]
+            series = ' '.join(f"{key}={value}" for key, value in labels)
+            print(f"  {series:<58} {int(cumulative[-1]):>8} "
+                  + ' '.join(f"{value:>9.2f}" for value in quantiles))
+
+
+if __name__ == "__main__":
+    main()
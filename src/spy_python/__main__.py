@@ -1,14 +1,27 @@
 """Main entry point for the SPY Python application"""
+import argparse
 from .config.logging import get_logger
-from .web_app import run_web_app
 
 logger = get_logger()
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Serve the SPY chart web application")
+    parser.add_argument('--production', action='store_true',
+                        help="Serve with pre-forked gunicorn workers instead of the development server")
+    parser.add_argument('--host')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--workers', type=int, help="Worker processes in production mode")
+    args = parser.parse_args()
+
     try:
-        logger.info("Starting SPY Python web application")
-        run_web_app(debug=True)
+        if args.production:
+            from .web_app import run_production_server
+            run_production_server(host=args.host, port=args.port, workers=args.workers)
+        else:
+            from .web_app import run_web_app
+            logger.info("Starting SPY Python web application")
+            run_web_app(host=args.host or 'localhost', port=args.port or 5000, debug=True)
     except Exception as e:
         logger.error(f"Application error: {str(e)}", exc_info=True)
 
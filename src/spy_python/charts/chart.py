@@ -28,11 +28,12 @@ class Chart:
 
     def add_candlestick_series(self, 
                               options: Optional[CandlestickSeriesOptions] = None,
-                              data: Optional[List[OHLCData]] = None) -> CandlestickSeries:
-        """Add a candlestick series to the chart."""
+                              data: Optional[List[OHLCData]] = None,
+                              max_length: Optional[int] = None) -> CandlestickSeries:
+        """Add a candlestick series to the chart, keeping only the newest max_length bars if given."""
         series_id = f'series_{uuid.uuid4().hex}'
         series_options = options.to_dict() if options else CandlestickSeriesOptions().to_dict()
-        series = CandlestickSeries(self.chart_id, series_id, series_options)
+        series = CandlestickSeries(self.chart_id, series_id, series_options, max_length)
         if data:
             series.set_data(data)
         self._series[series_id] = series
@@ -40,10 +41,11 @@ class Chart:
 
     def add_line_series(self, 
                        options: Optional[Dict[str, Any]] = None,
-                       data: Optional[List[Dict[str, Union[int, float]]]] = None) -> LineSeries:
-        """Add a line series to the chart."""
+                       data: Optional[List[Dict[str, Union[int, float]]]] = None,
+                       max_length: Optional[int] = None) -> LineSeries:
+        """Add a line series to the chart, keeping only the newest max_length points if given."""
         series_id = f'series_{uuid.uuid4().hex}'
-        series = LineSeries(self.chart_id, series_id, options or {})
+        series = LineSeries(self.chart_id, series_id, options or {}, max_length)
         if data:
             series.set_data(data)
         self._series[series_id] = series
@@ -51,11 +53,12 @@ class Chart:
 
     def add_histogram_series(self,
                            options: Optional[HistogramSeriesOptions] = None,
-                           data: Optional[List[Dict[str, Union[int, float]]]] = None) -> HistogramSeries:
-        """Add a histogram series to the chart."""
+                           data: Optional[List[Dict[str, Union[int, float]]]] = None,
+                           max_length: Optional[int] = None) -> HistogramSeries:
+        """Add a histogram series to the chart, keeping only the newest max_length bars if given."""
         series_id = f'series_{uuid.uuid4().hex}'
         series_options = options.to_dict() if options else HistogramSeriesOptions().to_dict()
-        series = HistogramSeries(self.chart_id, series_id, series_options)
+        series = HistogramSeries(self.chart_id, series_id, series_options, max_length)
         if data:
             series.set_data(data)
         self._series[series_id] = series
@@ -1,11 +1,18 @@
 """
 Series implementations for Lightweight Charts.
+
+Points are stored as NumPy columns rather than as one dictionary per point.
 """
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Sequence, Union
 from dataclasses import dataclass
 from datetime import datetime
 import json
 
+import numpy as np
+
+# Points a series has room for before its columns first grow
+INITIAL_CAPACITY = 64
+
 @dataclass
 class OHLCData:
     """OHLC data point."""
@@ -36,62 +43,231 @@ class OHLCData:
             data['volume'] = self.volume
         return data
 
+def _time_value(time: Union[str, int, datetime]) -> Union[str, int]:
+    """Convert a datetime to a UTC timestamp in seconds, leaving timestamps and business-day strings as they are."""
+    if isinstance(time, datetime):
+        return int(time.timestamp())
+    return time
+
+def _time_column(times: Sequence) -> np.ndarray:
+    """Convert point times to an int64 column, or to an object column if there are business-day strings."""
+    if isinstance(times, np.ndarray) and times.dtype.kind in 'iu':
+        return times.astype(np.int64, copy=False)
+    if isinstance(times, np.ndarray) and times.dtype.kind == 'M':
+        return times.astype('datetime64[s]').astype(np.int64)
+    times = [_time_value(time) for time in times]
+    try:
+        return np.array(times, dtype=np.int64)
+    except (TypeError, ValueError):
+        return np.array(times, dtype=object)
+
+def _number_list(column: np.ndarray) -> List[Union[int, float]]:
+    """Convert a column of finite values to a list, of ints if they are all whole, which format faster and shorter."""
+    if np.array_equal(np.trunc(column), column) and np.all(np.abs(column) < 2 ** 53):
+        return column.astype(np.int64).tolist()
+    return column.tolist()
+
 class SeriesBase:
-    """Base class for all series types."""
-    def __init__(self, chart_id: str, series_id: str):
+    """
+    Base class for all series types.
+
+    Points are kept in preallocated columns: their times, one float64 column
+    per field with NaN where a point has no value, and for series with
+    per-point colors, codes into a palette with -1 for the series color.
+    Columns double in size when full, so appends are amortized O(1). With
+    max_length, only the newest max_length points are kept, in columns of
+    twice that size whose live window is moved back to the start when it
+    reaches the end.
+    """
+    # Value fields of a point, in the order of the columns
+    FIELDS: Sequence[str] = ()
+
+    # Whether points can have their own color
+    HAS_COLOR = False
+
+    def __init__(self, chart_id: str, series_id: str, max_length: Optional[int] = None):
+        if max_length is not None and max_length < 1:
+            raise ValueError("max_length must be at least 1")
         self.chart_id = chart_id
         self.series_id = series_id
-        self._data: List[Dict[str, Any]] = []
+        self.max_length = max_length
+        self._palette: List[str] = []
+        self._color_codes: Dict[str, int] = {}
+        self._allocate(np.empty(0, dtype=np.int64), np.empty((0, len(self.FIELDS))), np.empty(0, dtype=np.int32))
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def _allocate(self, time: np.ndarray, values: np.ndarray, colors: np.ndarray,
+                  capacity: Optional[int] = None) -> None:
+        """Replace the columns with new ones holding copies of the given points, at most max_length of them."""
+        if self.max_length is not None:
+            time, values, colors = time[-self.max_length:], values[-self.max_length:], colors[-self.max_length:]
+            capacity = 2 * self.max_length
+        count = len(time)
+        capacity = max(capacity or 0, INITIAL_CAPACITY, count)
+        self._time = np.empty(capacity, dtype=time.dtype)
+        self._time[:count] = time
+        self._values = np.empty((capacity, len(self.FIELDS)))
+        self._values[:count] = values
+        self._colors = np.empty(capacity, dtype=np.int32)
+        self._colors[:count] = colors
+        self._start, self._stop = 0, count
+
+    def _color_code(self, color: Optional[str]) -> int:
+        """Get the palette code of a color, adding it to the palette if new."""
+        if color is None:
+            return -1
+        code = self._color_codes.get(color)
+        if code is None:
+            code = self._color_codes[color] = len(self._palette)
+            self._palette.append(color)
+        return code
+
+    def _append(self, time: Union[str, int, datetime], values: Sequence[Optional[float]],
+                color: Optional[str] = None) -> None:
+        """Add a point after the last one, or replace the last one if it has the same time."""
+        time = _time_value(time)
+        if self._time.dtype != object and not isinstance(time, (int, np.integer)):
+            self._time = self._time.astype(object)
+        if len(self) and self._time[self._stop - 1] == time:
+            index = self._stop - 1
+        else:
+            if self._stop == len(self._time):
+                live = slice(self._start, self._stop)
+                self._allocate(self._time[live], self._values[live], self._colors[live], 2 * len(self._time))
+            index = self._stop
+            self._stop += 1
+            if self.max_length is not None and len(self) > self.max_length:
+                self._start += 1
+        self._time[index] = time
+        self._values[index] = values
+        self._colors[index] = self._color_code(color)
+
+    def set_columns(self, time: Sequence, colors: Optional[Sequence[Optional[str]]] = None,
+                    **values: Sequence[Optional[float]]) -> None:
+        """
+        Set series data from columns, e.g. the arrays of BarArrays.
+
+        Args:
+            time: UTC timestamps in seconds, datetimes or business-day strings
+            colors: Color of each point, None for the series color
+            **values: Column of each field; None or NaN leaves a point without it
+        """
+        unknown = set(values) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields for {type(self).__name__}: {', '.join(sorted(unknown))}")
+        time = _time_column(time)
+        matrix = np.full((len(time), len(self.FIELDS)), np.nan)
+        for index, name in enumerate(self.FIELDS):
+            if values.get(name) is not None:
+                matrix[:, index] = np.asarray(values[name], dtype=np.float64)
+        self._palette, self._color_codes = [], {}
+        if colors is None:
+            codes = np.full(len(time), -1, dtype=np.int32)
+        else:
+            codes = np.array([self._color_code(color) for color in colors], dtype=np.int32)
+        self._allocate(time, matrix, codes)
+
+    def _set_records(self, data: List[Dict[str, Any]]) -> None:
+        """Set series data from a list of point dictionaries."""
+        self.set_columns(
+            [point['time'] for point in data],
+            colors=[point.get('color') for point in data] if self.HAS_COLOR else None,
+            **{name: [point.get(name) for point in data] for name in self.FIELDS}
+        )
 
     def update_data(self, data: List[Dict[str, Any]]) -> None:
         """Update series data."""
-        self._data = data
+        self._set_records(data)
 
     def to_json(self) -> str:
-        """Convert series data to JSON string."""
-        return json.dumps(self._data)
+        """
+        Convert series data to JSON string.
+
+        Points are grouped by which of their fields are set, and each group is
+        formatted with one template, leaving out the fields a point lacks.
+        """
+        if not len(self):
+            return '[]'
+        live = slice(self._start, self._stop)
+        time, values, codes = self._time[live], self._values[live], self._colors[live]
+        if time.dtype == object:
+            time = np.array([json.dumps(value) for value in time.tolist()], dtype=object)
+        names = list(self.FIELDS)
+        present = np.isfinite(values)
+        if self.HAS_COLOR:
+            names.append('color')
+            present = np.column_stack([present, codes >= 0])
+            colors = np.array([json.dumps(color) for color in self._palette] + [None], dtype=object)[codes]
+        groups = present.astype(np.int64) @ (1 << np.arange(len(names), dtype=np.int64))
+
+        keys = np.unique(groups)
+        points = None if len(keys) == 1 else np.empty(len(time), dtype=object)
+        for key in keys.tolist():
+            rows = slice(None) if points is None else np.flatnonzero(groups == key)
+            fields = [index for index in range(len(names)) if key >> index & 1]
+            template = '{"time":%s' + ''.join(f',"{names[index]}":%s' for index in fields) + '}'
+            columns = [time[rows].tolist()] + [
+                colors[rows].tolist() if names[index] == 'color' else _number_list(values[rows, index])
+                for index in fields
+            ]
+            formatted = [template % point for point in zip(*columns)]
+            if points is None:
+                return '[' + ','.join(formatted) + ']'
+            points[rows] = formatted
+        return '[' + ','.join(points.tolist()) + ']'
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Convert series data to a list of point dictionaries, as setData takes them."""
+        return json.loads(self.to_json())
 
 class CandlestickSeries(SeriesBase):
     """Candlestick series implementation."""
-    def __init__(self, chart_id: str, series_id: str, options: Dict[str, Any]):
-        super().__init__(chart_id, series_id)
+    FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, chart_id: str, series_id: str, options: Dict[str, Any], max_length: Optional[int] = None):
+        super().__init__(chart_id, series_id, max_length)
         self.options = options
 
     def set_data(self, data: List[OHLCData]) -> None:
         """Set candlestick series data."""
-        self._data = [d.to_dict() for d in data]
+        self.set_columns([d.time for d in data], **{name: [getattr(d, name) for d in data] for name in self.FIELDS})
 
     def update(self, data_point: OHLCData) -> None:
         """Update last candlestick or add new one."""
-        self._data.append(data_point.to_dict())
+        self._append(data_point.time, [getattr(data_point, name) for name in self.FIELDS])
 
 class LineSeries(SeriesBase):
     """Line series implementation."""
-    def __init__(self, chart_id: str, series_id: str, options: Dict[str, Any]):
-        super().__init__(chart_id, series_id)
+    FIELDS = ('value',)
+    HAS_COLOR = True
+
+    def __init__(self, chart_id: str, series_id: str, options: Dict[str, Any], max_length: Optional[int] = None):
+        super().__init__(chart_id, series_id, max_length)
         self.options = options
 
     def set_data(self, data: List[Dict[str, Union[int, float]]]) -> None:
         """Set line series data."""
-        self._data = data
+        self._set_records(data)
 
-    def update(self, time: Union[int, str], value: float) -> None:
-        """Update line series with new data point."""
-        self._data.append({'time': time, 'value': value})
+    def update(self, time: Union[int, str], value: float, color: Optional[str] = None) -> None:
+        """Update last line point or add new one."""
+        self._append(time, [value], color)
 
 class HistogramSeries(SeriesBase):
     """Histogram series implementation."""
-    def __init__(self, chart_id: str, series_id: str, options: Dict[str, Any]):
-        super().__init__(chart_id, series_id)
+    FIELDS = ('value',)
+    HAS_COLOR = True
+
+    def __init__(self, chart_id: str, series_id: str, options: Dict[str, Any], max_length: Optional[int] = None):
+        super().__init__(chart_id, series_id, max_length)
         self.options = options
 
     def set_data(self, data: List[Dict[str, Union[int, float]]]) -> None:
         """Set histogram series data."""
-        self._data = data
+        self._set_records(data)
 
     def update(self, time: Union[int, str], value: float, color: Optional[str] = None) -> None:
-        """Update histogram series with new data point."""
-        data_point = {'time': time, 'value': value}
-        if color:
-            data_point['color'] = color
-        self._data.append(data_point)
+        """Update last histogram bar or add new one."""
+        self._append(time, [value], color)
@@ -1,15 +1,30 @@
-"""Database Configuration"""
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.engine import URL
+"""Database Configuration
+
+The engine is created on first use by get_engine(), which is also when
+.env is loaded and SQLAlchemy imported, so importing this module is cheap.
+`engine` and `Session` remain importable names and resolve lazily.
+"""
 import os
-from dotenv import load_dotenv
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import URL, Engine
+    from sqlalchemy.orm import Session as OrmSession, sessionmaker
+
+_engine = None
+_session_factory = None
+_lock = threading.Lock()
 
-# Load environment variables
-load_dotenv()
+def create_db_url() -> 'URL':
+    """Create database URL from environment variables, or take it whole from DATABASE_URL"""
+    from dotenv import load_dotenv
+    from sqlalchemy.engine import URL, make_url
 
-def create_db_url() -> URL:
-    """Create database URL from environment variables"""
+    # Load environment variables
+    load_dotenv()
+    if os.getenv("DATABASE_URL"):
+        return make_url(os.getenv("DATABASE_URL"))
     return URL.create(
         drivername="postgresql",
         username=os.getenv("DB_USER"),
@@ -19,12 +34,34 @@ def create_db_url() -> URL:
         port=5432
     )
 
-# Create and export the engine
-engine = create_engine(create_db_url())
+def get_engine() -> 'Engine':
+    """Get the engine, creating it on first use"""
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                from sqlalchemy import create_engine
 
-# Create and export the Session
-Session = sessionmaker(bind=engine)
+                _engine = create_engine(create_db_url())
+    return _engine
 
-def get_session():
+def get_session_factory() -> 'sessionmaker':
+    """Get the session factory bound to the engine, creating it on first use"""
+    global _session_factory
+    if _session_factory is None:
+        from sqlalchemy.orm import sessionmaker
+
+        _session_factory = sessionmaker(bind=get_engine())
+    return _session_factory
+
+def get_session() -> 'OrmSession':
     """Get SQLAlchemy session"""
-    return Session()
+    return get_session_factory()()
+
+def __getattr__(name: str):
+    """Resolve `engine` and `Session` on first access"""
+    if name == 'engine':
+        return get_engine()
+    if name == 'Session':
+        return get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
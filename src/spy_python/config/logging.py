@@ -1,17 +1,96 @@
-"""Comprehensive Logging Configuration for SPY Python"""
+"""Comprehensive Logging Configuration for SPY Python
+
+Log directories and sinks are set up by the first logging call made through
+get_logger(), or by creating a SPYLogger, not on import.
+"""
 import sys
+import threading
+import time
 from datetime import datetime
 import json
 from pathlib import Path
-from loguru import logger
 import os
 
+# 'development' logs DEBUG synchronously with variable values in tracebacks;
+# 'production' logs INFO through a background queue, rate-limited per call site
+LOG_MODE = os.getenv("LOG_MODE", "development")
+
+# Directory of the log files
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+
+# Records below WARNING passed per call site per second in production mode
+LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", "10"))
+
+_logger = None
+
+def _loguru():
+    """The loguru logger, importing loguru on first use"""
+    global _logger
+    if _logger is None:
+        from loguru import logger
+        _logger = logger
+    return _logger
+
+class RateLimitFilter:
+    """
+    Sink filter passing at most `rate` records below WARNING per call site per second
+
+    Warnings and errors always pass. Records are dropped before they are
+    formatted, so a hot loop logging at INFO costs one dictionary lookup per
+    call once its budget is spent.
+    """
+
+    # Severity of loguru's WARNING level
+    WARNING_NO = 30
+
+    def __init__(self, rate: int, inner=None):
+        """
+        Args:
+            rate: Records per call site per second
+            inner: Filter applied before rate limiting, if any
+        """
+        self.rate = rate
+        self.inner = inner
+        self.suppressed = 0
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, record) -> bool:
+        if self.inner is not None and not self.inner(record):
+            return False
+        if record["level"].no >= self.WARNING_NO:
+            return True
+        site = (record["name"], record["line"])
+        second = int(time.monotonic())
+        with self._lock:
+            window, count = self._windows.get(site, (second, 0))
+            if window != second:
+                window, count = second, 0
+            if count >= self.rate:
+                self.suppressed += 1
+                return False
+            self._windows[site] = (window, count + 1)
+        return True
+
 class SPYLogger:
     """Advanced logging configuration for SPY Python application"""
+
+    # The most recently created configuration, None until the first one
+    active = None
+    _lock = threading.Lock()
     
-    def __init__(self):
+    def __init__(self, logs_dir: str = LOG_DIR, mode: str = LOG_MODE):
+        """
+        Args:
+            logs_dir: Directory of the log files
+            mode: 'development' or 'production'
+        """
+        SPYLogger.active = self
+        self.production = mode == "production"
+        self.rate_limits = []
+
         # Create logs directory structure
-        self.logs_dir = Path("logs")
+        self.logs_dir = Path(logs_dir)
         self.logs_dir.mkdir(exist_ok=True)
         
         # Create subdirectories for different log types
@@ -24,7 +103,7 @@ class SPYLogger:
             directory.mkdir(exist_ok=True)
         
         # Remove default logger
-        logger.remove()
+        _loguru().remove()
         
         # Add handlers for different logging purposes
         self._configure_console_logging()
@@ -33,6 +112,32 @@ class SPYLogger:
         self._configure_chart_logging()
         self._configure_performance_logging()
     
+    def _sink_options(self, level: str, filter=None) -> dict:
+        """
+        Level, filter and queueing options of a sink for the logging mode
+
+        In production, records are handed to a background thread
+        (enqueue=True), which also serialises writes from pre-forked workers,
+        DEBUG sinks are raised to INFO so that debug calls return before
+        building a record, and tracebacks omit variable values. In development
+        every sink keeps loguru's extended tracebacks with variable values.
+        """
+        if not self.production:
+            return {"level": level, "filter": filter, "backtrace": True, "diagnose": True}
+        rate_limit = RateLimitFilter(LOG_RATE_LIMIT, filter)
+        self.rate_limits.append(rate_limit)
+        return {
+            "level": "INFO" if level == "DEBUG" else level,
+            "filter": rate_limit,
+            "enqueue": True,
+            "backtrace": False,
+            "diagnose": False
+        }
+    
+    def suppressed(self) -> int:
+        """Records dropped by the rate limits of all sinks"""
+        return sum(rate_limit.suppressed for rate_limit in self.rate_limits)
+    
     def _configure_console_logging(self):
         """Configure console logging with color formatting"""
         format_str = "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
@@ -40,13 +145,11 @@ class SPYLogger:
         format_str += "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | "
         format_str += "<level>{message}</level>"
         
-        logger.add(
+        _loguru().add(
             sys.stderr,
             format=format_str,
-            level="INFO",
             colorize=True,
-            backtrace=True,
-            diagnose=True
+            **self._sink_options("INFO")
         )
     
     def _configure_error_logging(self):
@@ -56,14 +159,12 @@ class SPYLogger:
         error_format += "Error: {message} | "
         error_format += "Exception: {exception}"
         
-        logger.add(
+        _loguru().add(
             self.error_dir / "error_{time:YYYY-MM-DD}.log",
             format=error_format,
-            level="ERROR",
             rotation="1 day",
             retention="30 days",
-            backtrace=True,
-            diagnose=True
+            **self._sink_options("ERROR")
         )
     
     def _configure_data_logging(self):
@@ -72,13 +173,12 @@ class SPYLogger:
         data_format += "{name}:{function}:{line} | "
         data_format += "Data Operation: {message}"
         
-        logger.add(
+        _loguru().add(
             self.data_dir / "data_{time:YYYY-MM-DD}.log",
             format=data_format,
-            filter=lambda record: "data_service" in record["name"],
-            level="DEBUG",
             rotation="1 day",
-            retention="30 days"
+            retention="30 days",
+            **self._sink_options("DEBUG", lambda record: "data_service" in record["name"])
         )
     
     def _configure_chart_logging(self):
@@ -87,13 +187,12 @@ class SPYLogger:
         chart_format += "{name}:{function}:{line} | "
         chart_format += "Chart Operation: {message}"
         
-        logger.add(
+        _loguru().add(
             self.chart_dir / "chart_{time:YYYY-MM-DD}.log",
             format=chart_format,
-            filter=lambda record: "chart_service" in record["name"],
-            level="DEBUG",
             rotation="1 day",
-            retention="30 days"
+            retention="30 days",
+            **self._sink_options("DEBUG", lambda record: "chart_service" in record["name"])
         )
     
     def _configure_performance_logging(self):
@@ -102,36 +201,36 @@ class SPYLogger:
         perf_format += "{name}:{function}:{line} | "
         perf_format += "Performance: {message}"
         
-        logger.add(
+        _loguru().add(
             self.performance_dir / "performance_{time:YYYY-MM-DD}.log",
             format=perf_format,
-            filter=lambda record: record["extra"].get("type") == "performance",
-            level="DEBUG",
             rotation="1 day",
-            retention="30 days"
+            retention="30 days",
+            **self._sink_options("DEBUG", lambda record: record["extra"].get("type") == "performance")
         )
     
     @staticmethod
     def log_data_operation(operation: str, details: dict):
         """Log data operations with structured details"""
-        logger.bind(type="data").debug(
-            f"{operation} | " + json.dumps(details, default=str)
+        _lazy_logger.bind(type="data").opt(lazy=True).debug(
+            "{} | {}", lambda: operation, lambda: json.dumps(details, default=str)
         )
     
     @staticmethod
     def log_chart_operation(operation: str, details: dict):
         """Log chart operations with structured details"""
-        logger.bind(type="chart").debug(
-            f"{operation} | " + json.dumps(details, default=str)
+        _lazy_logger.bind(type="chart").opt(lazy=True).debug(
+            "{} | {}", lambda: operation, lambda: json.dumps(details, default=str)
         )
     
     @staticmethod
     def log_performance(operation: str, start_time: datetime, end_time: datetime, details: dict):
-        """Log performance metrics"""
+        """Log performance metrics at INFO, so they are kept in production mode"""
         duration = (end_time - start_time).total_seconds()
         details["duration_seconds"] = duration
-        logger.bind(type="performance").debug(
-            f"{operation} | Duration: {duration:.3f}s | " + json.dumps(details, default=str)
+        _lazy_logger.bind(type="performance").opt(lazy=True).info(
+            "{} | Duration: {:.3f}s | {}", lambda: operation, lambda: duration,
+            lambda: json.dumps(details, default=str)
         )
     
     @staticmethod
@@ -139,14 +238,36 @@ class SPYLogger:
         """Log errors with context"""
         if context is None:
             context = {}
-        logger.bind(type="error").exception(
+        _lazy_logger.bind(type="error").exception(
             f"Error occurred | Context: {json.dumps(context, default=str)}",
             exception=error
         )
 
-# Initialize logger
-spy_logger = SPYLogger()
+    @classmethod
+    def ensure_configured(cls) -> 'SPYLogger':
+        """Get the active configuration, creating the default one if there is none"""
+        if cls.active is None:
+            with cls._lock:
+                if cls.active is None:
+                    cls()
+        return cls.active
+
+class _LazyLogger:
+    """Stands in for the loguru logger, configuring the sinks on first use"""
+
+    def __getattr__(self, name: str):
+        if SPYLogger.active is None:
+            SPYLogger.ensure_configured()
+        return getattr(_loguru(), name)
+
+_lazy_logger = _LazyLogger()
 
 def get_logger():
     """Get configured logger instance"""
-    return logger
+    return _lazy_logger
+
+def __getattr__(name: str):
+    """Resolve `spy_logger`, the active configuration, on first access"""
+    if name == 'spy_logger':
+        return SPYLogger.ensure_configured()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
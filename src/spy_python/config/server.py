@@ -0,0 +1,106 @@
+"""Production Server Configuration
+
+Gunicorn settings for serving web_app with pre-forked workers:
+
+    gunicorn -c python:spy_python.config.server spy_python.web_app:app
+
+The application is loaded once in the master process, which warms the caches
+before any worker is forked, so workers start with the recent sessions
+already in memory and only accept traffic after the warm-up. Each worker
+then replaces the inherited connection pool with its own. Workers share
+their /metrics values through snapshot files in METRICS_DIR, and log through
+the master's background queues (production mode of config/logging.py).
+
+/api/stream is served by stream_server.py in a process of its own, started
+and stopped with the master, on STREAM_PORT; workers redirect to it, so
+event streams never hold a worker thread.
+"""
+import glob
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+from .logging import SPYLogger, get_logger
+
+logger = get_logger()
+
+# Log through background queues, rate-limited, unless LOG_MODE is set explicitly
+if 'LOG_MODE' not in os.environ:
+    SPYLogger(mode='production')
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_WORKERS', str(multiprocessing.cpu_count() * 2 + 1)))
+
+# Threaded workers for the short API requests; event streams go to the stream server
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', '8'))
+
+# Port of the stream server, by default the one after the web port; 0 serves streams from the workers
+STREAM_PORT = int(os.environ.setdefault('STREAM_PORT', str(int(os.getenv('PORT', '8000')) + 1)))
+
+# The stream server process, while the master runs
+stream_process = None
+
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+# Trading days, and bar intervals, loaded into the caches before serving
+WARMUP_DAYS = int(os.getenv('WARMUP_DAYS', '5'))
+WARMUP_INTERVALS = [interval for interval in os.getenv('WARMUP_INTERVALS', '1m').split(',') if interval]
+
+# Directory where workers write metric snapshots, read by whichever answers /metrics
+METRICS_DIR = os.environ.setdefault(
+    'METRICS_DIR', os.path.join(tempfile.gettempdir(), f"spy-python-metrics-{os.getenv('PORT', '8000')}")
+)
+
+
+def on_starting(server):
+    """Remove metric snapshots left by the workers of an earlier run"""
+    for path in glob.glob(os.path.join(METRICS_DIR, '*.json')):
+        os.remove(path)
+
+
+def when_ready(server):
+    """Start the stream server, and warm the caches before the workers are forked"""
+    global stream_process
+    from ..web_app import data_service
+
+    if STREAM_PORT:
+        env = dict(os.environ)
+        env.setdefault('LOG_MODE', 'production')
+        # A log directory of its own, as two processes cannot rotate the same files
+        env['LOG_DIR'] = str(SPYLogger.ensure_configured().logs_dir / 'stream')
+        stream_process = subprocess.Popen(
+            [sys.executable, '-m', 'spy_python.stream_server',
+             '--host', os.getenv('HOST', '0.0.0.0'), '--port', str(STREAM_PORT)],
+            env=env
+        )
+        logger.info(f"Stream server {stream_process.pid} started on port {STREAM_PORT}")
+
+    if WARMUP_DAYS > 0:
+        data_service.warm_up(WARMUP_DAYS, WARMUP_INTERVALS)
+
+
+def on_exit(server):
+    """Stop the stream server with the master"""
+    if stream_process is not None and stream_process.poll() is None:
+        stream_process.terminate()
+        try:
+            stream_process.wait(timeout=graceful_timeout)
+        except subprocess.TimeoutExpired:
+            stream_process.kill()
+
+
+def post_fork(server, worker):
+    """Give each worker its own connection pool, and metrics, instead of the master's"""
+    from .database import get_engine
+    from ..services.metrics import REGISTRY
+
+    # close=False leaves the master's connections open for the master
+    get_engine().dispose(close=False)
+    # The warm-up's timings would otherwise be counted once per worker
+    REGISTRY.reset()
+    logger.info(f"Worker {worker.pid} started")
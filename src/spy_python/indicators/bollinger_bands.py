@@ -0,0 +1,32 @@
+"""
+Bollinger Bands Implementation
+"""
+from typing import Any, Dict, List, Mapping
+import numpy as np
+from .primitives import Primitive
+from .registry import Indicator, register_indicator
+
+
+@register_indicator('bollinger_bands')
+class BollingerBands(Indicator):
+    """Bollinger Bands around a simple moving average of the close."""
+
+    def __init__(self, period: int = 21, multiplier: float = 2.0):
+        self.period = period
+        self.multiplier = multiplier
+        self.basis = Primitive.sma('close', period)
+        self.stdev = Primitive.stdev('close', period)
+
+    def requires(self) -> List[Primitive]:
+        """Primitives shared through IndicatorEngine."""
+        return [self.basis, self.stdev]
+
+    def compute(self, inputs: Mapping[str, np.ndarray], primitives: Mapping[Primitive, np.ndarray]) -> Dict[str, Any]:
+        """Calculate the basis line and upper and lower bands."""
+        basis = primitives[self.basis]
+        offset = self.multiplier * primitives[self.stdev]
+        return {
+            'basis': basis,
+            'upper': basis + offset,
+            'lower': basis - offset
+        }
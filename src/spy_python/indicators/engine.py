@@ -0,0 +1,67 @@
+"""
+Indicator execution engine
+
+Collects the primitives required by a set of indicators, computes each
+distinct primitive once per run and hands the shared results to every
+indicator, so adding overlays does not multiply the cost of their common
+building blocks.
+"""
+from typing import Any, Dict, Iterable, List, Mapping
+import numpy as np
+from ..config.logging import get_logger
+from . import kernels
+from .primitives import Primitive, PRIMITIVE_FUNCTIONS
+from .registry import Indicator
+
+logger = get_logger()
+
+
+class IndicatorEngine:
+    """Runs indicators over shared, once-computed primitives."""
+
+    def __init__(self, indicators: Iterable[Indicator]):
+        self.indicators: List[Indicator] = list(indicators)
+        names = [indicator.name for indicator in self.indicators]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate indicators: {names}")
+
+    def required_primitives(self) -> List[Primitive]:
+        """Distinct primitives needed by the configured indicators."""
+        return list(dict.fromkeys(p for indicator in self.indicators for p in indicator.requires()))
+
+    def run(self, inputs: Mapping[str, np.ndarray]) -> Dict[str, Dict[str, Any]]:
+        """
+        Calculate every configured indicator.
+
+        Args:
+            inputs: Input columns ('open', 'high', 'low', 'close', 'volume',
+                optionally 'time'), each of shape (series, bars) or (bars,)
+
+        Returns:
+            Results keyed by indicator name
+        """
+        columns = {name: kernels.as_2d(values) for name, values in inputs.items()}
+        computed: Dict[Primitive, np.ndarray] = {}
+
+        def resolve(primitive: Primitive) -> np.ndarray:
+            if primitive not in computed:
+                try:
+                    function = PRIMITIVE_FUNCTIONS[primitive.kind]
+                except KeyError:
+                    raise ValueError(f"Unknown primitive kind '{primitive.kind}'") from None
+                computed[primitive] = function(primitive, columns, resolve)
+            return computed[primitive]
+
+        for primitive in self.required_primitives():
+            resolve(primitive)
+        logger.opt(lazy=True).debug(
+            "Computed {} primitives for {} indicators: {}",
+            lambda: len(computed), lambda: len(self.indicators), lambda: ", ".join(str(p) for p in computed)
+        )
+
+        return {
+            indicator.name: indicator.compute(
+                columns, {p: computed[p] for p in indicator.requires()}
+            )
+            for indicator in self.indicators
+        }
@@ -0,0 +1,222 @@
+"""
+Vectorized indicator kernels
+
+All kernels operate on 2-D float64 arrays of shape (series, bars) and work
+along the last axis, so many days or symbols are processed in one call.
+None of them loop over bars in Python. Inputs are expected to be finite,
+except in ema, which treats non-finite values as missing.
+"""
+import numpy as np
+
+# Stop extending the EMA scan once older terms are weighted below this,
+# far under float64 resolution for the values we feed it
+EMA_TAIL_TOLERANCE = 1e-18
+
+# Block length used by the rolling-window prefix sums. Sums restart at every
+# block so their magnitude, and with it the rounding error, stays bounded.
+ROLLING_BLOCK_SIZE = 256
+
+
+def as_2d(values: np.ndarray) -> np.ndarray:
+    """Return values as a contiguous float64 array of shape (series, bars)."""
+    return np.atleast_2d(np.ascontiguousarray(values, dtype=np.float64))
+
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Calculate Exponential Moving Average along the last axis.
+
+    Matches pandas ``ewm(alpha=2 / (period + 1), adjust=False).mean()``: each
+    row starts at its first finite value, and values before it are NaN.
+    Later NaN and infinite values are missing: the previous average carries
+    forward, and the next finite value is weighted against it as pandas 2
+    does after a gap.
+
+    The recurrence is solved with a doubling scan, which takes
+    O(log(period)) full-array passes instead of one Python step per bar.
+    """
+    values = as_2d(values)
+    n_series, n_bars = values.shape
+    if n_bars == 0:
+        return values.copy()
+    alpha = 2 / (period + 1)
+    decay = 1.0 - alpha
+
+    finite = np.isfinite(values)
+    started = np.logical_or.accumulate(finite, axis=1)
+    if not np.array_equal(finite, started):
+        return _ema_with_gaps(values, finite, started, alpha)
+
+    first = np.argmax(finite, axis=1)
+
+    # y[t] = decay * y[t-1] + b[t], where b is alpha * x except at the
+    # seed bar, which enters with full weight
+    result = np.where(started, alpha * values, 0.0)
+    rows = np.arange(n_series)
+    has_values = finite[rows, first]
+    result[rows[has_values], first[has_values]] = values[rows[has_values], first[has_values]]
+
+    scratch = np.empty_like(result)
+    shift = 1
+    factor = decay
+    while shift < n_bars and factor > EMA_TAIL_TOLERANCE:
+        np.multiply(result[:, :-shift], factor, out=scratch[:, shift:])
+        result[:, shift:] += scratch[:, shift:]
+        factor *= factor
+        shift *= 2
+
+    result[~started] = np.nan
+    return result
+
+
+def _ema_with_gaps(values: np.ndarray, finite: np.ndarray, started: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    EMA of rows with missing values after their start; see ema.
+
+    Every bar is an affine step y[t] = c[t] * y[t-1] + b[t]. A missing bar
+    keeps the average (c = 1, b = 0), and a finite one after k missing bars
+    weighs the average by decay ** (k + 1) against alpha, as pandas does
+    with ignore_na=False. The steps are composed with a doubling scan.
+    """
+    n_series, n_bars = values.shape
+    decay = 1.0 - alpha
+
+    # Bars since the previous finite value
+    positions = np.arange(n_bars)
+    last_finite = np.maximum.accumulate(np.where(finite, positions, -1), axis=1)
+    previous = np.empty_like(last_finite)
+    previous[:, 0] = -1
+    previous[:, 1:] = last_finite[:, :-1]
+    old_weight = decay ** (positions - previous)
+
+    with np.errstate(invalid='ignore'):
+        scale = np.where(finite, old_weight + alpha, 1.0)
+        coefficient = np.where(finite, old_weight, 1.0) / scale
+        result = np.where(finite, alpha * values, 0.0) / scale
+    # The first finite value of a row is the seed and enters with full weight
+    seed = finite & (previous < 0)
+    coefficient[seed | ~started] = 0.0
+    result[seed] = values[seed]
+
+    scratch = np.empty_like(result)
+    shift = 1
+    while shift < n_bars:
+        # Compose each step with the one shift bars before it
+        np.multiply(coefficient[:, shift:], result[:, :-shift], out=scratch[:, shift:])
+        result[:, shift:] += scratch[:, shift:]
+        coefficient[:, shift:] *= coefficient[:, :-shift]
+        shift *= 2
+        # Steps not yet resolved back to the start of their row reach back
+        # shift bars; stop once what they still need weighs nothing
+        if shift >= n_bars or coefficient[:, shift:].max() <= EMA_TAIL_TOLERANCE:
+            break
+
+    result[~started] = np.nan
+    return result
+
+
+def _window_sums(blocks: np.ndarray, window: int):
+    """
+    Split rolling-window sums over blocked data into two parts.
+
+    Args:
+        blocks: Array of shape (series, n_blocks, block_size)
+        window: Window length, no larger than block_size
+
+    Returns:
+        Tuple of (in_block, carry). in_block holds the part of each window
+        that falls inside its own block. carry has shape
+        (series, n_blocks - 1, window - 1) and holds the part taken from the
+        tail of the previous block for the first window - 1 positions of
+        every block after the first.
+    """
+    block_size = blocks.shape[-1]
+    prefix = np.cumsum(blocks, axis=-1)
+    in_block = prefix.copy()
+    in_block[..., window:] -= prefix[..., :-window]
+
+    tail_lengths = np.arange(window - 1, 0, -1)
+    previous = prefix[:, :-1, :]
+    carry = previous[..., -1:] - previous[..., block_size - tail_lengths - 1]
+    return in_block, carry
+
+
+def _to_blocks(values: np.ndarray, window: int):
+    """Pad values along the bar axis and reshape into blocks."""
+    n_series, n_bars = values.shape
+    block_size = max(ROLLING_BLOCK_SIZE, window)
+    n_blocks = -(-n_bars // block_size)
+    padded = np.pad(values, ((0, 0), (0, n_blocks * block_size - n_bars)), mode='edge')
+    return padded.reshape(n_series, n_blocks, block_size)
+
+
+def rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Calculate a fixed-window rolling sum along the last axis in O(n).
+
+    The first window - 1 positions of every row are NaN.
+    """
+    values = as_2d(values)
+    n_series, n_bars = values.shape
+    if n_bars == 0:
+        return values.copy()
+    blocks = _to_blocks(values, window)
+    result, carry = _window_sums(blocks, window)
+    result[:, 1:, :window - 1] += carry
+
+    result = result.reshape(n_series, -1)[:, :n_bars]
+    result[:, :window - 1] = np.nan
+    return result
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Calculate a fixed-window rolling mean along the last axis in O(n)."""
+    return rolling_sum(values, window) / window
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Calculate a fixed-window sample standard deviation along the last axis in O(n).
+
+    Each block is centered on its own first value before the sums of values
+    and squares are taken, which keeps the subtraction in the variance
+    formula well conditioned even over long, trending histories.
+    """
+    values = as_2d(values)
+    n_series, n_bars = values.shape
+    if n_bars == 0:
+        return values.copy()
+    blocks = _to_blocks(values, window)
+    reference = blocks[..., :1]
+    centered = blocks - reference
+
+    sums, carry_sums = _window_sums(centered, window)
+    squares, carry_squares = _window_sums(centered * centered, window)
+
+    # Re-center the tail borrowed from the previous block on this block's reference
+    shift = reference[:, :-1] - reference[:, 1:]
+    tail_lengths = np.arange(window - 1, 0, -1)
+    carry_squares += 2.0 * shift * carry_sums + tail_lengths * shift * shift
+    carry_sums += tail_lengths * shift
+    sums[:, 1:, :window - 1] += carry_sums
+    squares[:, 1:, :window - 1] += carry_squares
+
+    variance = (squares - sums * sums / window) / (window - 1)
+    result = np.sqrt(np.maximum(variance, 0.0)).reshape(n_series, -1)[:, :n_bars]
+    result[:, :window - 1] = np.nan
+    return result
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """Calculate True Range along the last axis; the first bar uses high - low."""
+    high, low, close = as_2d(high), as_2d(low), as_2d(close)
+    prev_close = np.concatenate((close[:, :1], close[:, :-1]), axis=1)
+    return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def shift_right(values: np.ndarray, fill_value) -> np.ndarray:
+    """Shift values one bar later along the last axis, filling the first bar."""
+    shifted = np.empty_like(values)
+    shifted[:, 1:] = values[:, :-1]
+    shifted[:, :1] = fill_value
+    return shifted
@@ -0,0 +1,80 @@
+"""
+Shared indicator primitives
+
+A primitive is an intermediate series such as EMA(close, 21) or ATR(14)
+that several indicators may need. Indicators declare the primitives they
+require and IndicatorEngine computes each distinct one once per run.
+"""
+from typing import Callable, Dict, Mapping, NamedTuple
+import numpy as np
+from . import kernels
+
+
+class Primitive(NamedTuple):
+    """Specification of a shared intermediate series."""
+    kind: str
+    source: str = 'close'
+    period: int = 0
+
+    def __str__(self) -> str:
+        if self.kind in ('atr', 'true_range'):
+            return f"{self.kind.upper()}({self.period})" if self.period else self.kind.upper()
+        return f"{self.kind.upper()}({self.source}, {self.period})"
+
+    @classmethod
+    def ema(cls, source: str, period: int) -> 'Primitive':
+        """Exponential Moving Average of an input column."""
+        return cls('ema', source, period)
+
+    @classmethod
+    def sma(cls, source: str, period: int) -> 'Primitive':
+        """Simple Moving Average of an input column."""
+        return cls('sma', source, period)
+
+    @classmethod
+    def stdev(cls, source: str, period: int) -> 'Primitive':
+        """Rolling sample standard deviation of an input column."""
+        return cls('stdev', source, period)
+
+    @classmethod
+    def true_range(cls) -> 'Primitive':
+        """True Range of each bar."""
+        return cls('true_range', '', 0)
+
+    @classmethod
+    def atr(cls, period: int) -> 'Primitive':
+        """Average True Range."""
+        return cls('atr', '', period)
+
+
+# Resolves another primitive, computing it first if needed
+Resolver = Callable[[Primitive], np.ndarray]
+
+
+def _compute_ema(primitive: Primitive, inputs: Mapping[str, np.ndarray], resolve: Resolver) -> np.ndarray:
+    return kernels.ema(inputs[primitive.source], primitive.period)
+
+
+def _compute_sma(primitive: Primitive, inputs: Mapping[str, np.ndarray], resolve: Resolver) -> np.ndarray:
+    return kernels.rolling_mean(inputs[primitive.source], primitive.period)
+
+
+def _compute_stdev(primitive: Primitive, inputs: Mapping[str, np.ndarray], resolve: Resolver) -> np.ndarray:
+    return kernels.rolling_std(inputs[primitive.source], primitive.period)
+
+
+def _compute_true_range(primitive: Primitive, inputs: Mapping[str, np.ndarray], resolve: Resolver) -> np.ndarray:
+    return kernels.true_range(inputs['high'], inputs['low'], inputs['close'])
+
+
+def _compute_atr(primitive: Primitive, inputs: Mapping[str, np.ndarray], resolve: Resolver) -> np.ndarray:
+    return kernels.rolling_mean(resolve(Primitive.true_range()), primitive.period)
+
+
+PRIMITIVE_FUNCTIONS: Dict[str, Callable[[Primitive, Mapping[str, np.ndarray], Resolver], np.ndarray]] = {
+    'ema': _compute_ema,
+    'sma': _compute_sma,
+    'stdev': _compute_stdev,
+    'true_range': _compute_true_range,
+    'atr': _compute_atr,
+}
@@ -0,0 +1,82 @@
+"""
+Indicator registry
+
+Indicators subclass Indicator, declare the primitives they need and register
+themselves under a name with @register_indicator. DataService and the chart
+APIs look indicators up by that name.
+"""
+import importlib
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Mapping, Type
+import numpy as np
+from .primitives import Primitive
+
+# Modules providing the built-in indicators, imported on first lookup
+BUILTIN_INDICATOR_MODULES = [
+    '.saty_phase_oscillator',
+    '.bollinger_bands',
+    '.vwap',
+]
+
+_REGISTRY: Dict[str, Type['Indicator']] = {}
+_builtins_loaded = False
+
+
+class Indicator(ABC):
+    """Base class for indicators run by IndicatorEngine."""
+
+    name: str = ''
+
+    @abstractmethod
+    def requires(self) -> List[Primitive]:
+        """Primitives this indicator needs, computed once and shared by the engine."""
+
+    @abstractmethod
+    def compute(self, inputs: Mapping[str, np.ndarray], primitives: Mapping[Primitive, np.ndarray]) -> Dict[str, Any]:
+        """
+        Calculate indicator values.
+
+        Args:
+            inputs: Input columns ('open', 'high', 'low', 'close', 'volume',
+                and 'time' in epoch seconds when known) as arrays of shape
+                (series, bars)
+            primitives: Every primitive returned by requires(), same shape
+
+        Returns:
+            Dictionary of indicator outputs
+        """
+
+
+def register_indicator(name: str) -> Callable[[Type[Indicator]], Type[Indicator]]:
+    """Class decorator registering an indicator under name."""
+    def decorator(cls: Type[Indicator]) -> Type[Indicator]:
+        if name in _REGISTRY and _REGISTRY[name] is not cls:
+            raise ValueError(f"Indicator '{name}' is already registered")
+        cls.name = name
+        _REGISTRY[name] = cls
+        return cls
+    return decorator
+
+
+def _load_builtins() -> None:
+    global _builtins_loaded
+    if not _builtins_loaded:
+        for module in BUILTIN_INDICATOR_MODULES:
+            importlib.import_module(module, __package__)
+        _builtins_loaded = True
+
+
+def get_indicator(name: str, **params) -> Indicator:
+    """Create a registered indicator by name."""
+    _load_builtins()
+    try:
+        cls = _REGISTRY[name]
+    except KeyError:
+        raise KeyError(f"Unknown indicator '{name}'. Available: {', '.join(sorted(_REGISTRY))}") from None
+    return cls(**params)
+
+
+def available_indicators() -> List[str]:
+    """Names of all registered indicators."""
+    _load_builtins()
+    return sorted(_REGISTRY)
@@ -2,13 +2,42 @@
 Saty Phase Oscillator Implementation
 Original by Saty Mahajan, converted to Python
 """
+import math
+from collections import deque
 import numpy as np
-import pandas as pd
-from typing import Tuple, Dict, Any
+from typing import TYPE_CHECKING, Tuple, Dict, Any, List, Mapping, Optional
+from . import kernels
+from .engine import IndicatorEngine
+from .primitives import Primitive
+from .registry import Indicator, register_indicator
 
-class SatyPhaseOscillator:
+# pandas is only needed by the reference implementation, so it is imported on use
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Order of the codes returned by SatyPhaseOscillator.calculate_batch
+COLOR_CODES = ('green', 'red', 'magenta')
+
+# Standard deviations and ATRs below this fraction of the close are rounding
+# residue of rolling sums over flat stretches, and are taken as exactly zero.
+# Likewise compressions within it of zero or of the previous bar's count as
+# equal: prices on a cent grid often give such ties exactly, and the
+# implementations round them either way. Both keep every implementation
+# classifying those bars alike.
+FLAT_TOLERANCE = 1e-7
+
+def flat_to_zero(values: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """Set values within rounding of zero, relative to close, to exactly zero."""
+    return np.where(np.abs(values) <= FLAT_TOLERANCE * np.abs(close), 0.0, values)
+
+@register_indicator('saty_phase_oscillator')
+class SatyPhaseOscillator(Indicator):
     """Implementation of Saty Phase Oscillator indicator."""
 
+    PIVOT = Primitive.ema('close', 21)
+    STDEV = Primitive.stdev('close', 21)
+    ATR = Primitive.atr(14)
+
     def __init__(self):
         self.colors = {
             'green': '#00ff00',
@@ -22,23 +51,31 @@ class SatyPhaseOscillator:
 
     def calculate_ema(self, data: np.ndarray, period: int) -> np.ndarray:
         """Calculate Exponential Moving Average."""
+        import pandas as pd
+
         alpha = 2 / (period + 1)
         return pd.Series(data).ewm(alpha=alpha, adjust=False).mean().values
 
     def calculate_stdev(self, data: np.ndarray, period: int) -> np.ndarray:
         """Calculate Standard Deviation."""
+        import pandas as pd
+
         return pd.Series(data).rolling(window=period).std().values
 
     def calculate_atr(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
         """Calculate Average True Range."""
+        import pandas as pd
+
+        # The first bar has no previous close, so its true range is high - low
+        prev_close = np.concatenate((close[:1], close[:-1]))
         tr = np.maximum(high - low, 
                        np.maximum(
-                           np.abs(high - np.roll(close, 1)),
-                           np.abs(low - np.roll(close, 1))
+                           np.abs(high - prev_close),
+                           np.abs(low - prev_close)
                        ))
         return pd.Series(tr).rolling(window=period).mean().values
 
-    def calculate(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def calculate(self, df: 'pd.DataFrame') -> Dict[str, Any]:
         """
         Calculate Saty Phase Oscillator values.
         
@@ -57,12 +94,12 @@ class SatyPhaseOscillator:
         above_pivot = close >= pivot
 
         # Bollinger Band calculations
-        bband_offset = 2.0 * self.calculate_stdev(close, 21)
+        bband_offset = 2.0 * flat_to_zero(self.calculate_stdev(close, 21), close)
         bband_up = pivot + bband_offset
         bband_down = pivot - bband_offset
 
         # ATR calculations
-        atr = self.calculate_atr(high, low, close, 14)
+        atr = flat_to_zero(self.calculate_atr(high, low, close, 14), close)
         compression_threshold_up = pivot + (2.0 * atr)
         compression_threshold_down = pivot - (2.0 * atr)
         expansion_threshold_up = pivot + (1.854 * atr)
@@ -79,17 +116,12 @@ class SatyPhaseOscillator:
             bband_up - expansion_threshold_up,
             expansion_threshold_down - bband_down
         )
-        expansion = np.roll(compression, 1) <= compression
+        tolerance = FLAT_TOLERANCE * np.abs(close)
+        expansion = np.roll(compression, 1) <= compression + tolerance
 
         # Compression tracker
-        compression_tracker = np.zeros_like(compression, dtype=bool)
-        for i in range(1, len(compression)):
-            if expansion[i] and in_expansion_zone[i] > 0:
-                compression_tracker[i] = False
-            elif compression[i] <= 0:
-                compression_tracker[i] = True
-            else:
-                compression_tracker[i] = False
+        compression_tracker = ~(expansion & (in_expansion_zone > tolerance)) & (compression <= tolerance)
+        compression_tracker[:1] = False
 
         # Phase Oscillator calculation
         raw_signal = ((close - pivot) / (3.0 * atr)) * 100
@@ -112,14 +144,7 @@ class SatyPhaseOscillator:
             'oscillator': oscillator,
             'compression_tracker': compression_tracker,
             'colors': colors,
-            'zones': {
-                'extended_up': 100.0,
-                'distribution': 61.8,
-                'neutral_up': 23.6,
-                'neutral_down': -23.6,
-                'accumulation': -61.8,
-                'extended_down': -100.0
-            },
+            'zones': self.zones(),
             'signals': {
                 'leaving_accumulation': leaving_accumulation,
                 'leaving_extreme_down': leaving_extreme_down,
@@ -127,3 +152,430 @@ class SatyPhaseOscillator:
                 'leaving_extreme_up': leaving_extreme_up
             }
         }
+
+    def calculate_batch(self, close: np.ndarray, high: np.ndarray, low: np.ndarray) -> Dict[str, Any]:
+        """
+        Calculate Saty Phase Oscillator values for many series at once.
+
+        Every output is computed with whole-array operations: no per-bar
+        Python loops and no intermediate pandas objects. Oscillator values
+        agree with calculate() to floating-point rounding, and compression
+        flags exactly, since both compare compressions within FLAT_TOLERANCE.
+
+        Args:
+            close: Array of shape (series, bars), or (bars,) for one series
+            high: Array with the same shape as close
+            low: Array with the same shape as close
+
+        Returns:
+            Dictionary shaped like calculate()'s, with 2-D arrays of shape
+            (series, bars). Colors are returned as uint8 'color_codes'
+            indexing into 'palette' instead of per-bar hex strings.
+        """
+        return IndicatorEngine([self]).run({'close': close, 'high': high, 'low': low})[self.name]
+
+    def requires(self) -> List[Primitive]:
+        """Primitives shared through IndicatorEngine."""
+        return [self.PIVOT, self.STDEV, self.ATR]
+
+    def compute(self, inputs: Mapping[str, np.ndarray], primitives: Mapping[Primitive, np.ndarray]) -> Dict[str, Any]:
+        """Calculate oscillator values from engine inputs; see calculate_batch."""
+        close = inputs['close']
+
+        # Pivot and Bollinger Band calculations
+        pivot = primitives[self.PIVOT]
+        bband_offset = 2.0 * flat_to_zero(primitives[self.STDEV], close)
+
+        # ATR calculations
+        atr = flat_to_zero(primitives[self.ATR], close)
+
+        # Compression calculations. Above and below the pivot the band and
+        # threshold distances reduce to the same expression, so the pivot cancels.
+        compression = bband_offset - 2.0 * atr
+        in_expansion_zone = bband_offset - 1.854 * atr
+        tolerance = FLAT_TOLERANCE * np.abs(close)
+        expansion = kernels.shift_right(compression, np.nan) <= compression + tolerance
+        compression_tracker = ~(expansion & (in_expansion_zone > tolerance)) & (compression <= tolerance)
+
+        # Phase Oscillator calculation
+        with np.errstate(divide='ignore', invalid='ignore'):
+            raw_signal = ((close - pivot) / (3.0 * atr)) * 100
+        oscillator = kernels.ema(raw_signal, 3)
+
+        # Zone crosses
+        prev_oscillator = kernels.shift_right(oscillator, np.nan)
+        leaving_accumulation = (prev_oscillator <= -61.8) & (oscillator > -61.8)
+        leaving_extreme_down = (prev_oscillator <= -100) & (oscillator > -100)
+        leaving_distribution = (prev_oscillator >= 61.8) & (oscillator < 61.8)
+        leaving_extreme_up = (prev_oscillator >= 100) & (oscillator < 100)
+
+        # Color determination
+        color_codes = np.where(oscillator >= 0.0, np.uint8(0), np.uint8(1))
+        color_codes[compression_tracker] = 2
+
+        return {
+            'oscillator': oscillator,
+            'compression_tracker': compression_tracker,
+            'color_codes': color_codes,
+            'palette': [self.colors[name] for name in COLOR_CODES],
+            'zones': self.zones(),
+            'signals': {
+                'leaving_accumulation': leaving_accumulation,
+                'leaving_extreme_down': leaving_extreme_down,
+                'leaving_distribution': leaving_distribution,
+                'leaving_extreme_up': leaving_extreme_up
+            }
+        }
+
+    @staticmethod
+    def zones() -> Dict[str, float]:
+        """Oscillator zone levels."""
+        return {
+            'extended_up': 100.0,
+            'distribution': 61.8,
+            'neutral_up': 23.6,
+            'neutral_down': -23.6,
+            'accumulation': -61.8,
+            'extended_down': -100.0
+        }
+
+
+class _StreamingEMA:
+    """Exponential Moving Average updated one value at a time.
+
+    Mirrors pandas ``ewm(alpha=alpha, adjust=False).mean()`` step for step,
+    including treating NaN and infinite inputs as missing, so results are
+    identical.
+    """
+
+    def __init__(self, period: int):
+        self.alpha = 2 / (period + 1)
+        self.value = math.nan
+        self._old_weight = 1.0
+
+    def save(self) -> Tuple:
+        """State that ``update`` changes, for ``restore``."""
+        return self.value, self._old_weight
+
+    def restore(self, state: Tuple) -> None:
+        """Undo the updates since ``save``."""
+        self.value, self._old_weight = state
+
+    def update(self, x: float) -> float:
+        is_observation = math.isfinite(x)
+        if self.value == self.value:
+            self._old_weight *= 1.0 - self.alpha
+            if is_observation:
+                if self.value != x:
+                    self.value = (self._old_weight * self.value + self.alpha * x) / (self._old_weight + self.alpha)
+                self._old_weight = 1.0
+        elif is_observation:
+            self.value = x
+        return self.value
+
+
+class _StreamingWindow:
+    """Fixed window of the last values fed to a rolling statistic."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self._window = deque(maxlen=period)
+
+    def _save_window(self) -> Tuple:
+        """Length of the window and the value the next update would evict"""
+        full = len(self._window) == self.period
+        return full, self._window[0] if full else None
+
+    def _restore_window(self, state: Tuple) -> None:
+        """Undo the one update made since _save_window."""
+        full, head = state
+        self._window.pop()
+        if full:
+            self._window.appendleft(head)
+
+
+class _StreamingRollingMean(_StreamingWindow):
+    """Fixed-window rolling mean updated one value at a time.
+
+    Uses the same compensated add/remove sums as pandas ``rolling().mean()``.
+    """
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self._sum = 0.0
+        self._compensation_add = 0.0
+        self._compensation_remove = 0.0
+        self._negative_count = 0
+        self._consecutive_same = 0
+        self._prev_value = math.nan
+
+    def save(self) -> Tuple:
+        """State that one ``update`` changes, for ``restore``."""
+        return (self._save_window(), self._sum, self._compensation_add, self._compensation_remove,
+                self._negative_count, self._consecutive_same, self._prev_value)
+
+    def restore(self, state: Tuple) -> None:
+        """Undo the one update made since ``save``."""
+        (window, self._sum, self._compensation_add, self._compensation_remove,
+         self._negative_count, self._consecutive_same, self._prev_value) = state
+        self._restore_window(window)
+
+    def update(self, x: float) -> float:
+        if len(self._window) == self.period:
+            removed = self._window[0]
+            self._negative_count -= math.copysign(1.0, removed) < 0
+            y = -removed - self._compensation_remove
+            t = self._sum + y
+            self._compensation_remove = t - self._sum - y
+            self._sum = t
+        self._window.append(x)
+
+        y = x - self._compensation_add
+        t = self._sum + y
+        self._compensation_add = t - self._sum - y
+        self._sum = t
+        self._negative_count += math.copysign(1.0, x) < 0
+        self._consecutive_same = self._consecutive_same + 1 if x == self._prev_value else 1
+        self._prev_value = x
+
+        if len(self._window) < self.period:
+            return math.nan
+        if self._consecutive_same >= self.period:
+            return self._prev_value
+        result = self._sum / self.period
+        if self._negative_count == 0 and result < 0:
+            return 0.0
+        if self._negative_count == self.period and result > 0:
+            return 0.0
+        return result
+
+
+class _StreamingRollingStd(_StreamingWindow):
+    """Fixed-window sample standard deviation updated one value at a time.
+
+    Uses the same compensated Welford updates as pandas ``rolling().std()``.
+    """
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self._mean = 0.0
+        self._ssqdm = 0.0
+        self._compensation_add = 0.0
+        self._compensation_remove = 0.0
+        self._consecutive_same = 0
+        self._prev_value = math.nan
+
+    def save(self) -> Tuple:
+        """State that one ``update`` changes, for ``restore``."""
+        return (self._save_window(), self._mean, self._ssqdm, self._compensation_add,
+                self._compensation_remove, self._consecutive_same, self._prev_value)
+
+    def restore(self, state: Tuple) -> None:
+        """Undo the one update made since ``save``."""
+        (window, self._mean, self._ssqdm, self._compensation_add,
+         self._compensation_remove, self._consecutive_same, self._prev_value) = state
+        self._restore_window(window)
+
+    def update(self, x: float) -> float:
+        nobs = len(self._window)
+        if nobs == self.period:
+            removed = self._window[0]
+            nobs -= 1
+            prev_mean = self._mean - self._compensation_remove
+            y = removed - self._compensation_remove
+            t = y - self._mean
+            self._compensation_remove = t + self._mean - y
+            self._mean = self._mean - t / nobs
+            self._ssqdm = self._ssqdm - (removed - prev_mean) * (removed - self._mean)
+        if not self._window:
+            self._prev_value = x
+        self._window.append(x)
+        nobs += 1
+
+        self._consecutive_same = self._consecutive_same + 1 if x == self._prev_value else 1
+        self._prev_value = x
+        prev_mean = self._mean - self._compensation_add
+        y = x - self._compensation_add
+        t = y - self._mean
+        self._compensation_add = t + self._mean - y
+        self._mean = self._mean + t / nobs
+        self._ssqdm = self._ssqdm + (x - prev_mean) * (x - self._mean)
+
+        if nobs < self.period:
+            return math.nan
+        if self._consecutive_same >= nobs:
+            return 0.0
+        variance = self._ssqdm / (nobs - 1)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+
+class SatyPhaseOscillatorStream:
+    """Incremental Saty Phase Oscillator.
+
+    Seed it with the bars already seen, then feed each new bar to ``update``.
+    Every update costs O(1) regardless of how many bars came before, and the
+    values produced are identical to ``SatyPhaseOscillator.calculate`` run over
+    the full history. While the last bar is still forming, ``revise`` replaces
+    it with its latest values.
+    """
+
+    def __init__(self, oscillator: Optional[SatyPhaseOscillator] = None):
+        self.colors = (oscillator or SatyPhaseOscillator()).colors
+        self._pivot = _StreamingEMA(21)
+        self._stdev = _StreamingRollingStd(21)
+        self._atr = _StreamingRollingMean(14)
+        self._signal = _StreamingEMA(3)
+        self._prev_close = None
+        self._prev_compression = math.nan
+        self._prev_oscillator = math.nan
+        self.bar_count = 0
+        self._before_last = None
+
+    def seed(self, df: 'pd.DataFrame') -> Dict[str, Any]:
+        """
+        Feed historical bars into the stream.
+
+        Args:
+            df: DataFrame, or mapping of arrays, with 'close', 'high', 'low' columns
+
+        Returns:
+            Values for the last bar in df, or an empty dict if df is empty
+        """
+        result = {}
+        rows = list(zip(np.asarray(df['high']), np.asarray(df['low']), np.asarray(df['close'])))
+        for high, low, close in rows[:-1]:
+            result = self._step(float(high), float(low), float(close))
+        if rows:
+            result = self.update(dict(zip(('high', 'low', 'close'), rows[-1])))
+        return result
+
+    def update(self, bar: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Advance the oscillator by one bar.
+
+        Args:
+            bar: Mapping with 'close', 'high', 'low' keys
+
+        Returns:
+            Dictionary with the oscillator value, compression flag, color and
+            zone-transition signals for this bar
+        """
+        self._before_last = self._snapshot()
+        return self._step(float(bar['high']), float(bar['low']), float(bar['close']))
+
+    def update_many(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Advance the oscillator by a chunk of bars.
+
+        Only the last bar is snapshotted for ``revise``, so a chunk costs the
+        same per bar as ``seed``.
+
+        Returns:
+            Dictionary of arrays with one value per bar, keyed like ``update`` results
+        """
+        results = [
+            self._step(h, l, c) for h, l, c in zip(high[:-1].tolist(), low[:-1].tolist(), close[:-1].tolist())
+        ]
+        if len(close):
+            results.append(self.update({'high': high[-1], 'low': low[-1], 'close': close[-1]}))
+        keys = ('oscillator', 'compression', 'color', 'leaving_accumulation', 'leaving_extreme_down',
+                'leaving_distribution', 'leaving_extreme_up')
+        return {
+            key: np.array([result[key] for result in results],
+                          dtype=np.float64 if key == 'oscillator' else object if key == 'color' else bool)
+            for key in keys
+        }
+
+    def revise(self, bar: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Recalculate the last bar with revised values.
+
+        Args:
+            bar: Mapping with 'close', 'high', 'low' keys for the last bar
+
+        Returns:
+            Dictionary like ``update`` returns, for the revised bar
+
+        Raises:
+            ValueError: If no bar has been fed yet
+        """
+        if self._before_last is None:
+            raise ValueError("There is no bar to revise")
+        self._restore(self._before_last)
+        return self._step(float(bar['high']), float(bar['low']), float(bar['close']))
+
+    def _snapshot(self) -> Tuple:
+        """Save what the next step changes: scalars and the window values it evicts"""
+        return (self._pivot.save(), self._stdev.save(), self._atr.save(), self._signal.save(),
+                self._prev_close, self._prev_compression, self._prev_oscillator, self.bar_count)
+
+    def _restore(self, snapshot: Tuple) -> None:
+        """Undo the one step taken since _snapshot"""
+        (pivot, stdev, atr, signal, self._prev_close, self._prev_compression,
+         self._prev_oscillator, self.bar_count) = snapshot
+        self._pivot.restore(pivot)
+        self._stdev.restore(stdev)
+        self._atr.restore(atr)
+        self._signal.restore(signal)
+
+    def _step(self, high: float, low: float, close: float) -> Dict[str, Any]:
+        prev_close = close if self._prev_close is None else self._prev_close
+        true_range = max(high - low, max(abs(high - prev_close), abs(low - prev_close)))
+
+        pivot = self._pivot.update(close)
+        above_pivot = close >= pivot
+        stdev = self._stdev.update(close)
+        if abs(stdev) <= FLAT_TOLERANCE * abs(close):
+            stdev = 0.0
+        bband_offset = 2.0 * stdev
+        bband_up = pivot + bband_offset
+        bband_down = pivot - bband_offset
+        atr = self._atr.update(true_range)
+        if abs(atr) <= FLAT_TOLERANCE * abs(close):
+            atr = 0.0
+
+        if above_pivot:
+            compression = bband_up - (pivot + (2.0 * atr))
+            in_expansion_zone = bband_up - (pivot + (1.854 * atr))
+        else:
+            compression = (pivot - (2.0 * atr)) - bband_down
+            in_expansion_zone = (pivot - (1.854 * atr)) - bband_down
+        tolerance = FLAT_TOLERANCE * abs(close)
+        expansion = self._prev_compression <= compression + tolerance
+        if self.bar_count == 0:
+            compression_tracker = False
+        elif expansion and in_expansion_zone > tolerance:
+            compression_tracker = False
+        else:
+            compression_tracker = compression <= tolerance
+
+        denominator = 3.0 * atr
+        if denominator != 0.0:
+            raw_signal = ((close - pivot) / denominator) * 100
+        else:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                raw_signal = float(np.float64(close - pivot) / denominator) * 100
+        oscillator = self._signal.update(raw_signal)
+        prev_oscillator = self._prev_oscillator
+
+        if compression_tracker:
+            color = self.colors['magenta']
+        elif oscillator >= 0.0:
+            color = self.colors['green']
+        else:
+            color = self.colors['red']
+
+        self._prev_close = close
+        self._prev_compression = compression
+        self._prev_oscillator = oscillator
+        self.bar_count += 1
+
+        return {
+            'oscillator': oscillator,
+            'compression': compression_tracker,
+            'color': color,
+            'leaving_accumulation': prev_oscillator <= -61.8 and oscillator > -61.8,
+            'leaving_extreme_down': prev_oscillator <= -100 and oscillator > -100,
+            'leaving_distribution': prev_oscillator >= 61.8 and oscillator < 61.8,
+            'leaving_extreme_up': prev_oscillator >= 100 and oscillator < 100
+        }
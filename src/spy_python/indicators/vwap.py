@@ -0,0 +1,47 @@
+"""
+Volume Weighted Average Price Implementation
+"""
+from typing import Any, Dict, List, Mapping
+import numpy as np
+from .primitives import Primitive
+from .registry import Indicator, register_indicator
+
+
+SECONDS_PER_DAY = 86400
+
+
+def session_cumsum(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Cumulative sum along the last axis, restarting at every True in starts."""
+    totals = np.cumsum(values, axis=-1)
+    positions = np.where(starts, np.arange(values.shape[-1]), 0)
+    anchors = np.maximum.accumulate(positions, axis=-1)
+    return totals - np.take_along_axis(totals - values, anchors, axis=-1)
+
+
+@register_indicator('vwap')
+class VWAP(Indicator):
+    """
+    Session VWAP of the typical price.
+
+    The sums restart at the first bar of each trading day when the inputs
+    carry a 'time' column, so multi-day windows get one VWAP per session;
+    without one they are anchored at the first bar of each series.
+    """
+
+    def requires(self) -> List[Primitive]:
+        """VWAP only needs the raw inputs."""
+        return []
+
+    def compute(self, inputs: Mapping[str, np.ndarray], primitives: Mapping[Primitive, np.ndarray]) -> Dict[str, Any]:
+        """Calculate the cumulative volume weighted typical price of each session."""
+        typical_price = (inputs['high'] + inputs['low'] + inputs['close']) / 3.0
+        volume = inputs['volume']
+        starts = np.zeros(volume.shape, dtype=bool)
+        starts[..., 0] = True
+        if 'time' in inputs:
+            # Bar times are the exchange's wall time as epoch seconds, so days split at midnight
+            day = inputs['time'] // SECONDS_PER_DAY
+            starts[..., 1:] = day[..., 1:] != day[..., :-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vwap = session_cumsum(typical_price * volume, starts) / session_cumsum(volume, starts)
+        return {'vwap': vwap}
@@ -0,0 +1,155 @@
+"""Columnar Bar Model"""
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, Sequence
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# PostgreSQL binary COPY framing
+PGCOPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+PGCOPY_HEADER_SIZE = len(PGCOPY_SIGNATURE) + 8
+
+# PostgreSQL timestamps count microseconds from 2000-01-01
+PG_EPOCH_OFFSET = 946684800
+
+# One binary COPY tuple of (time int8, open/high/low/close float8, volume int8)
+PGCOPY_BAR_DTYPE = np.dtype([
+    ('field_count', '>i2'),
+    ('time_size', '>i4'), ('time', '>i8'),
+    ('open_size', '>i4'), ('open', '>f8'),
+    ('high_size', '>i4'), ('high', '>f8'),
+    ('low_size', '>i4'), ('low', '>f8'),
+    ('close_size', '>i4'), ('close', '>f8'),
+    ('volume_size', '>i4'), ('volume', '>i8'),
+])
+
+
+@dataclass(frozen=True)
+class BarArrays:
+    """OHLCV bars stored as typed NumPy columns, one element per bar."""
+    time: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume')
+    DTYPES = {
+        'time': np.int64,
+        'open': np.float64,
+        'high': np.float64,
+        'low': np.float64,
+        'close': np.float64,
+        'volume': np.int64,
+    }
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    @classmethod
+    def empty(cls) -> 'BarArrays':
+        """Create a container with no bars."""
+        return cls(**{name: np.empty(0, dtype=dtype) for name, dtype in cls.DTYPES.items()})
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Iterable]) -> 'BarArrays':
+        """Create bars from column sequences, converting to the expected dtypes."""
+        return cls(**{
+            name: np.asarray(columns[name], dtype=dtype) for name, dtype in cls.DTYPES.items()
+        })
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence]) -> 'BarArrays':
+        """Create bars from (timestamp, open, high, low, close, volume) rows with naive datetimes."""
+        if not rows:
+            return cls.empty()
+        timestamps, *prices, volume = zip(*rows)
+        return cls.from_columns({
+            'time': np.array(timestamps, dtype='datetime64[s]').astype(np.int64),
+            **dict(zip(('open', 'high', 'low', 'close'), prices)),
+            'volume': volume
+        })
+
+    @classmethod
+    def from_pgcopy_binary(cls, buffer: bytes) -> 'BarArrays':
+        """
+        Decode the output of a binary COPY of (epoch, open, high, low, close, volume).
+
+        Every tuple has the same fixed width, so the whole payload is decoded by
+        a single np.frombuffer call without creating per-row Python objects.
+        """
+        view = memoryview(buffer)
+        if bytes(view[:len(PGCOPY_SIGNATURE)]) != PGCOPY_SIGNATURE:
+            raise ValueError("Not a PostgreSQL binary COPY stream")
+        extension_size = int.from_bytes(view[PGCOPY_HEADER_SIZE - 4:PGCOPY_HEADER_SIZE], 'big')
+        offset = PGCOPY_HEADER_SIZE + extension_size
+        row_count = (len(view) - offset - 2) // PGCOPY_BAR_DTYPE.itemsize
+
+        rows = np.frombuffer(view, dtype=PGCOPY_BAR_DTYPE, count=row_count, offset=offset)
+        if not (np.all(rows['field_count'] == 6) and all(
+                np.all(rows[f'{name}_size'] == 8) for name in cls.COLUMNS)):
+            raise ValueError("Unexpected NULL or non 8-byte column in binary COPY stream")
+        return cls(**{name: rows[name].astype(dtype) for name, dtype in cls.DTYPES.items()})
+
+    @classmethod
+    def from_frame(cls, frame: 'pd.DataFrame') -> 'BarArrays':
+        """
+        Create bars from a DataFrame with a 'timestamp' column and OHLCV columns.
+
+        Timezone-aware timestamps keep their local wall time, which is how
+        the naive timestamps in the database are stored.
+        """
+        import pandas as pd
+
+        timestamps = pd.DatetimeIndex(frame['timestamp'])
+        if timestamps.tz is not None:
+            timestamps = timestamps.tz_localize(None)
+        return cls.from_columns({
+            'time': timestamps.values.astype('datetime64[s]').astype(np.int64),
+            **{name: frame[name].to_numpy() for name in cls.COLUMNS[1:]}
+        })
+
+    def to_pgcopy_binary(self) -> bytes:
+        """
+        Encode the bars as a binary COPY stream of
+        (timestamp, open, high, low, close, volume), for loading into a table
+        with timestamp, float8 and int8 columns.
+        """
+        rows = np.empty(len(self), dtype=PGCOPY_BAR_DTYPE)
+        rows['field_count'] = len(self.COLUMNS)
+        for name in self.COLUMNS:
+            rows[f'{name}_size'] = 8
+            rows[name] = getattr(self, name)
+        rows['time'] = (self.time - PG_EPOCH_OFFSET) * 1_000_000
+        header = PGCOPY_SIGNATURE + bytes(8)
+        return header + rows.tobytes() + b'\xff\xff'
+
+    @classmethod
+    def concat(cls, parts: Iterable['BarArrays']) -> 'BarArrays':
+        """Concatenate several containers in order."""
+        parts = list(parts)
+        if not parts:
+            return cls.empty()
+        return cls(**{name: np.concatenate([getattr(p, name) for p in parts]) for name in cls.COLUMNS})
+
+    def slice(self, start: int, stop: int) -> 'BarArrays':
+        """Return bars [start, stop) as views of the same columns."""
+        return BarArrays(**{name: getattr(self, name)[start:stop] for name in self.COLUMNS})
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Return the columns keyed by name."""
+        return {name: getattr(self, name) for name in self.COLUMNS}
+
+    def indicator_inputs(self) -> Dict[str, np.ndarray]:
+        """Return the columns as float64 arrays for IndicatorEngine."""
+        return {name: getattr(self, name).astype(np.float64, copy=False) for name in self.COLUMNS}
+
+    def to_frame(self) -> 'pd.DataFrame':
+        """Convert to a DataFrame with a naive 'timestamp' column and OHLCV columns."""
+        import pandas as pd
+
+        frame = pd.DataFrame({name: getattr(self, name) for name in self.COLUMNS[1:]})
+        frame.insert(0, 'timestamp', pd.to_datetime(self.time, unit='s'))
+        return frame
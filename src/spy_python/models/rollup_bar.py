@@ -0,0 +1,16 @@
+"""Rollup Bar Model"""
+from sqlalchemy import Column, Integer, Float, DateTime, BigInteger, String
+from .spy_data import Base
+
+class RollupBar(Base):
+    """Higher-timeframe OHLCV bar aggregated from stock_data minute bars"""
+    __tablename__ = 'stock_data_rollup'
+
+    symbol = Column(String, primary_key=True)
+    interval = Column(Integer, primary_key=True)  # Bar length in seconds
+    timestamp = Column(DateTime, primary_key=True)  # Start of the bar
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    volume = Column(BigInteger, nullable=False)
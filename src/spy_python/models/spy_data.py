@@ -2,7 +2,7 @@
 from datetime import datetime
 from typing import Dict, Any, List
 from decimal import Decimal
-from sqlalchemy import Column, Integer, Numeric, DateTime, BigInteger, String
+from sqlalchemy import Column, Integer, Numeric, DateTime, BigInteger, String, Index
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -10,6 +10,11 @@ Base = declarative_base()
 class SPYData(Base):
     """SPY Data Model representing the stock_data table"""
     __tablename__ = 'stock_data'
+    __table_args__ = (
+        # The included columns let keyset pages of bars be answered by index-only scans on PostgreSQL
+        Index('ix_stock_data_symbol_timestamp', 'symbol', 'timestamp', unique=True,
+              postgresql_include=['open', 'high', 'low', 'close', 'volume']),
+    )
 
     id = Column(Integer, primary_key=True)
     symbol = Column(String, nullable=False)
@@ -0,0 +1,83 @@
+"""Script to build or extend the memory-mapped bar store from the database
+
+Appends every closed session newer than the last stored bar, fetching one
+columnar chunk at a time. The current session is left to the database so
+stored bars rarely change; ingestion drops any stored bars it re-ingests,
+and the next run appends them again.
+
+Usage:
+    python -m spy_python.scripts.build_bar_store --symbol SPY
+    python -m spy_python.scripts.build_bar_store --symbol SPY --rebuild
+"""
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+from sqlalchemy import select, func
+from ..models.spy_data import SPYData
+from ..models.bar_arrays import BarArrays
+from ..services.data_service import DataService
+from ..services.bar_store import MemmapBarStore, DEFAULT_BAR_STORE_DIR, from_epoch_seconds
+from ..config.logging import get_logger
+
+logger = get_logger()
+
+
+def build_bar_store(service: DataService, store: MemmapBarStore, rebuild: bool = False,
+                    chunk_days: int = 31) -> int:
+    """
+    Append the closed sessions missing from the store
+
+    Returns:
+        Number of bars appended
+    """
+    try:
+        start_time = datetime.now()
+        if rebuild:
+            store.rewrite(service.symbol, BarArrays.empty())
+
+        last_time = store.last_time(service.symbol)
+        if last_time is not None:
+            start = from_epoch_seconds(last_time + 1)
+        else:
+            with service.engine.connect() as connection:
+                start = connection.execute(
+                    select(func.min(SPYData.timestamp)).where(SPYData.symbol == service.symbol)
+                ).scalar()
+            if start is None:
+                logger.warning(f"No bars found for {service.symbol}")
+                return 0
+        end = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        total_bars = 0
+        chunk_start = start
+        while chunk_start < end:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days), end)
+            bars = service.fetch_bar_arrays(chunk_start, chunk_end)
+            store.append(service.symbol, bars)
+            total_bars += len(bars)
+            logger.info(f"Stored {len(bars)} bars for {chunk_start} to {chunk_end}")
+            chunk_start = chunk_end
+
+        duration = (datetime.now() - start_time).total_seconds()
+        logger.info(f"Appended {total_bars} bars to the bar store in {duration:.2f} seconds")
+        return total_bars
+
+    except Exception as e:
+        logger.error(f"Error building bar store: {str(e)}", exc_info=True)
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbol', default='SPY')
+    parser.add_argument('--store-dir', type=Path, default=Path(DEFAULT_BAR_STORE_DIR or 'cache/store'))
+    parser.add_argument('--rebuild', action='store_true', help="Discard the stored history first")
+    args = parser.parse_args()
+
+    store = MemmapBarStore(args.store_dir)
+    service = DataService(symbol=args.symbol, bar_store=store)
+    build_bar_store(service, store, rebuild=args.rebuild)
+
+
+if __name__ == "__main__":
+    main()
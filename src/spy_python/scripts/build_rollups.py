@@ -0,0 +1,34 @@
+"""Script to build or refresh the multi-timeframe bar rollups
+
+Aggregates minute bars into the 5m, 15m, 1h and 1d bars of
+stock_data_rollup, starting at the last stored bar of each interval.
+
+Usage:
+    python -m spy_python.scripts.build_rollups --symbol SPY
+    python -m spy_python.scripts.build_rollups --symbol SPY --since 2024-01-02
+"""
+import argparse
+from datetime import datetime
+from ..services.data_service import DataService
+from ..services.rollups import ROLLUP_INTERVALS
+from ..config.logging import get_logger
+
+logger = get_logger()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbol', default='SPY')
+    parser.add_argument('--since', type=datetime.fromisoformat,
+                        help="Also rebuild bars from this ISO date on, e.g. after corrections")
+    parser.add_argument('--intervals', nargs='+', choices=ROLLUP_INTERVALS, default=list(ROLLUP_INTERVALS))
+    args = parser.parse_args()
+
+    service = DataService(symbol=args.symbol)
+    written = service.rollups.refresh(since=args.since, intervals=args.intervals)
+    for interval, count in written.items():
+        print(f"{interval}: {count} bars written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Script to export a date range of bars with oscillator values
+
+Streams bars from the database in chunks through a server-side cursor, so
+exports of any length run in constant memory.
+
+Usage:
+    python -m spy_python.scripts.export_bars --start 2015-01-01 --end 2025-01-01 --output spy.parquet
+    python -m spy_python.scripts.export_bars --start 2024-01-02 --end 2024-01-09 --format csv
+
+The format is taken from --format, else from the suffix of --output, which
+must then be one of the formats.
+"""
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+from ..services.data_service import DataService
+from ..services.export import BarExporter, EXPORT_MEDIA_TYPES, DEFAULT_CHUNK_BARS
+from ..config.logging import get_logger
+
+logger = get_logger()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbol', default='SPY')
+    parser.add_argument('--start', type=datetime.fromisoformat, required=True)
+    parser.add_argument('--end', type=datetime.fromisoformat, required=True)
+    parser.add_argument('--format', choices=EXPORT_MEDIA_TYPES,
+                        help="Export format, by default taken from the output suffix, else ndjson")
+    parser.add_argument('--output', type=Path, help="File to write, standard output by default")
+    parser.add_argument('--chunk-bars', type=int, default=DEFAULT_CHUNK_BARS)
+    args = parser.parse_args()
+
+    export_format = args.format or (args.output.suffix.lstrip('.') if args.output else 'ndjson')
+    if export_format not in EXPORT_MEDIA_TYPES:
+        parser.error(f"cannot infer the format from the output suffix '{args.output.suffix}'; "
+                     f"pass --format, one of {', '.join(EXPORT_MEDIA_TYPES)}")
+    exporter = BarExporter(DataService(symbol=args.symbol), chunk_bars=args.chunk_bars)
+    chunks = exporter.export(export_format, args.start, args.end)
+    if args.output is None:
+        for chunk in chunks:
+            sys.stdout.buffer.write(chunk)
+        return
+    with open(args.output, 'wb') as output:
+        for chunk in chunks:
+            output.write(chunk)
+
+
+if __name__ == "__main__":
+    main()
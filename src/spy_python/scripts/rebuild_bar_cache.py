@@ -0,0 +1,84 @@
+"""Script to rebuild the Parquet bar cache from the database
+
+Fetches closed sessions in a date range with one columnar query per chunk,
+splits the bars by day and writes one partition per day, including empty
+partitions for days without bars. Each partition is stamped with its
+session's data version, and sealed if the session is final.
+
+Usage:
+    python -m spy_python.scripts.rebuild_bar_cache --start 2024-01-01 --end 2024-07-01
+"""
+import argparse
+from datetime import date, datetime, timedelta
+from pathlib import Path
+import numpy as np
+from ..services.data_service import DataService
+from ..services.bar_cache import ParquetBarCache, DEFAULT_BAR_CACHE_DIR
+from ..config.logging import get_logger
+
+logger = get_logger()
+
+SECONDS_PER_DAY = 86400
+
+
+def rebuild_bar_cache(service: DataService, cache: ParquetBarCache, start: date, end: date,
+                      chunk_days: int = 31) -> int:
+    """
+    Write cache partitions for the closed sessions in [start, end)
+
+    Returns:
+        Number of bars written
+    """
+    try:
+        start_time = datetime.now()
+        end = min(end, datetime.now().date())
+        total_bars = 0
+        chunk_start = start
+        while chunk_start < end:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days), end)
+            chunk_start_time = datetime.combine(chunk_start, datetime.min.time())
+            chunk_end_time = datetime.combine(chunk_end, datetime.min.time())
+            versions = service.read_session_versions(chunk_start_time, chunk_end_time)
+            bars = service.fetch_bar_arrays(chunk_start_time, chunk_end_time)
+
+            # Bar times are naive epoch seconds, so whole days split on multiples of 86400
+            first_day = (chunk_start - date(1970, 1, 1)).days
+            day_count = (chunk_end - chunk_start).days
+            edges = np.searchsorted(
+                bars.time, (first_day + np.arange(day_count + 1)) * SECONDS_PER_DAY
+            )
+            for offset in range(day_count):
+                day = chunk_start + timedelta(days=offset)
+                version = versions.get(day, service.format_session_version(None, 0, None, None))
+                cache.write(service.symbol, day, bars.slice(edges[offset], edges[offset + 1]), version,
+                            final=service.is_session_final(datetime.combine(day, datetime.min.time())))
+
+            total_bars += len(bars)
+            logger.info(f"Cached {len(bars)} bars for {chunk_start} to {chunk_end}")
+            chunk_start = chunk_end
+
+        duration = (datetime.now() - start_time).total_seconds()
+        logger.info(f"Rebuilt bar cache with {total_bars} bars in {duration:.2f} seconds")
+        return total_bars
+
+    except Exception as e:
+        logger.error(f"Error rebuilding bar cache: {str(e)}", exc_info=True)
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--start', type=date.fromisoformat, required=True)
+    parser.add_argument('--end', type=date.fromisoformat, required=True,
+                        help="Exclusive end date; the current session is never cached")
+    parser.add_argument('--symbol', default='SPY')
+    parser.add_argument('--cache-dir', type=Path, default=Path(DEFAULT_BAR_CACHE_DIR or 'cache/bars'))
+    args = parser.parse_args()
+
+    cache = ParquetBarCache(args.cache_dir)
+    service = DataService(symbol=args.symbol, bar_cache=cache)
+    rebuild_bar_cache(service, cache, args.start, args.end)
+
+
+if __name__ == "__main__":
+    main()
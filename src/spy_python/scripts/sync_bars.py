@@ -0,0 +1,42 @@
+"""Script to sync new bars into the database
+
+Reads the newest stored timestamp of the symbol, ingests only newer bars
+from the chosen source and refreshes the symbol's rollups.
+
+Usage:
+    python -m spy_python.scripts.sync_bars --symbol SPY
+    python -m spy_python.scripts.sync_bars --symbol SPY --file bars.parquet
+"""
+import argparse
+from pathlib import Path
+from ..config.logging import get_logger
+
+logger = get_logger()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbol', default='SPY')
+    parser.add_argument('--file', type=Path,
+                        help="CSV or Parquet file (or Parquet directory) to sync from instead of Yahoo Finance")
+    parser.add_argument('--interval', default='1m', help="Yahoo Finance bar interval")
+    args = parser.parse_args()
+
+    # The services pull in SQLAlchemy, NumPy and pyarrow, so --help returns before loading them
+    from ..config.database import get_engine
+    from ..services.bar_cache import ParquetBarCache
+    from ..services.bar_sources import FileBarSource, YahooBarSource
+    from ..services.bar_store import MemmapBarStore
+    from ..services.data_service import DataService
+    from ..services.ingestion import BarIngestor
+
+    source = FileBarSource(args.file) if args.file else YahooBarSource(interval=args.interval)
+    ingestor = BarIngestor(get_engine(), symbol=args.symbol, bar_cache=ParquetBarCache.from_env(),
+                           rollups=DataService(symbol=args.symbol).rollups,
+                           bar_store=MemmapBarStore.from_env())
+    result = ingestor.sync(source)
+    print(f"Synced {result.rows} bars in {result.seconds:.2f} s ({result.rows_per_second:,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
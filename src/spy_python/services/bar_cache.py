@@ -0,0 +1,147 @@
+"""On-disk Parquet Cache of Daily Bars"""
+import os
+import tempfile
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, List, NamedTuple, Optional
+from ..config.logging import get_logger
+from ..models.bar_arrays import BarArrays
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+logger = get_logger()
+
+# Directory of the on-disk bar cache; set BAR_CACHE_DIR to an empty string to disable it
+DEFAULT_BAR_CACHE_DIR = os.getenv('BAR_CACHE_DIR', 'cache/bars')
+
+# Parquet metadata keys of a partition's data version and final flag
+VERSION_KEY = b'spy_python.version'
+FINAL_KEY = b'spy_python.final'
+
+
+class PartitionStamp(NamedTuple):
+    """What a partition was written from: the session's data version, and whether the session was final"""
+    version: Optional[str]
+    final: bool
+
+
+@lru_cache(maxsize=None)
+def bar_schema() -> 'pa.Schema':
+    """Arrow schema of the cached partitions; pyarrow is imported on first use"""
+    import pyarrow as pa
+
+    return pa.schema([
+        ('time', pa.int64()),
+        ('open', pa.float64()),
+        ('high', pa.float64()),
+        ('low', pa.float64()),
+        ('close', pa.float64()),
+        ('volume', pa.int64()),
+    ])
+
+
+class ParquetBarCache:
+    """
+    Day-partitioned Parquet cache of minute bars.
+
+    Each closed session is stored once as
+    <root>/symbol=<SYMBOL>/date=<YYYY-MM-DD>.parquet, stamped with the data
+    version it was written from (see DataService.get_session_version).
+    Partitions of final sessions are trusted as they are; others are checked
+    against the database's version. Days without bars are stored as empty
+    partitions so they do not hit the database either.
+    """
+
+    def __init__(self, root: Path = Path(DEFAULT_BAR_CACHE_DIR or 'cache/bars')):
+        self.root = Path(root)
+
+    @classmethod
+    def from_env(cls) -> Optional['ParquetBarCache']:
+        """Create the cache configured by BAR_CACHE_DIR, or None if it is disabled."""
+        return cls(Path(DEFAULT_BAR_CACHE_DIR)) if DEFAULT_BAR_CACHE_DIR else None
+
+    def path_for(self, symbol: str, day: date) -> Path:
+        """Path of the partition holding a symbol's bars for a day."""
+        return self.root / f"symbol={symbol}" / f"date={day.isoformat()}.parquet"
+
+    def contains(self, symbol: str, day: date) -> bool:
+        """Check whether a day is cached."""
+        return self.path_for(symbol, day).exists()
+
+    def read(self, symbol: str, day: date) -> Optional[BarArrays]:
+        """Read a cached day, or return None if it is not cached."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self.path_for(symbol, day)
+        try:
+            table = pq.read_table(path, schema=bar_schema())
+        except FileNotFoundError:
+            return None
+        except (OSError, pa.ArrowInvalid) as e:
+            logger.warning(f"Discarding unreadable bar cache partition {path}: {str(e)}")
+            path.unlink(missing_ok=True)
+            return None
+        return BarArrays(**{
+            name: table.column(name).to_numpy() for name in BarArrays.COLUMNS
+        })
+
+    def read_stamp(self, symbol: str, day: date) -> Optional[PartitionStamp]:
+        """Read the stamp of a cached day from the file footer, or return None if it is not cached."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        try:
+            metadata = pq.read_schema(self.path_for(symbol, day)).metadata or {}
+        except FileNotFoundError:
+            return None
+        except (OSError, pa.ArrowInvalid):
+            # read() discards the partition
+            return PartitionStamp(None, False)
+        version = metadata.get(VERSION_KEY)
+        return PartitionStamp(version.decode() if version is not None else None, metadata.get(FINAL_KEY) == b'1')
+
+    def write(self, symbol: str, day: date, bars: BarArrays, version: Optional[str] = None,
+              final: bool = False) -> None:
+        """
+        Write a day's bars, atomically replacing any existing partition.
+
+        Args:
+            version: Data version of the session the bars were read at
+            final: Whether the session is final, so the partition needs no further checks
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self.path_for(symbol, day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        schema = bar_schema()
+        if version is not None:
+            schema = schema.with_metadata({VERSION_KEY: version.encode(), FINAL_KEY: b'1' if final else b'0'})
+        table = pa.Table.from_arrays(
+            [pa.array(getattr(bars, name), type=schema.field(name).type) for name in BarArrays.COLUMNS],
+            schema=schema
+        )
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pq.write_table(table, f, compression='zstd')
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def invalidate(self, symbol: str, day: date) -> None:
+        """Remove a cached day, if present."""
+        self.path_for(symbol, day).unlink(missing_ok=True)
+
+    def cached_days(self, symbol: str) -> List[date]:
+        """List the days cached for a symbol."""
+        directory = self.root / f"symbol={symbol}"
+        if not directory.exists():
+            return []
+        return sorted(
+            date.fromisoformat(path.stem.split('=', 1)[1]) for path in directory.glob('date=*.parquet')
+        )
@@ -0,0 +1,123 @@
+"""Bar Sources for Ingestion"""
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional
+from ..models.bar_arrays import BarArrays
+from ..config.logging import get_logger
+from .bar_store import to_epoch_seconds
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+logger = get_logger()
+
+
+def after(bars: BarArrays, start: Optional[datetime]) -> BarArrays:
+    """Keep only bars strictly newer than start."""
+    if start is None:
+        return bars
+    keep = bars.time > to_epoch_seconds(start)
+    return bars if keep.all() else BarArrays(**{name: values[keep] for name, values in bars.columns().items()})
+
+
+class BarSource(ABC):
+    """A provider of minute bars that ingestion can sync from"""
+
+    @abstractmethod
+    def fetch(self, symbol: str, start: Optional[datetime] = None) -> Iterator[BarArrays]:
+        """
+        Yield a symbol's bars newer than start in time order
+
+        Args:
+            symbol: Symbol to fetch
+            start: Timestamp of the newest stored bar, or None to fetch everything
+                the source offers
+        """
+
+
+class YahooBarSource(BarSource):
+    """Bars downloaded from Yahoo Finance with yfinance"""
+
+    def __init__(self, interval: str = '1m', lookback: timedelta = timedelta(days=7)):
+        """
+        Args:
+            interval: yfinance bar interval
+            lookback: Period fetched when nothing is stored yet; Yahoo only
+                serves 1m bars for the last few weeks
+        """
+        self.interval = interval
+        self.lookback = lookback
+
+    def fetch(self, symbol: str, start: Optional[datetime] = None) -> Iterator[BarArrays]:
+        import yfinance as yf
+
+        # Request from a day early, since Yahoo reads naive times in its own
+        # zone; bars at or before start are dropped below
+        request_start = (start - timedelta(days=1)) if start else datetime.now() - self.lookback
+        df = yf.Ticker(symbol).history(start=request_start, interval=self.interval)
+        logger.info(f"Retrieved {len(df)} {symbol} bars from Yahoo Finance since {request_start}")
+        if df.empty:
+            return
+        df = df.rename(columns=str.lower).rename_axis('timestamp').reset_index()
+        yield after(BarArrays.from_frame(df), start)
+
+
+class FileBarSource(BarSource):
+    """
+    Bars read from a local CSV or Parquet file, or a directory of Parquet files.
+
+    The data needs timestamp, open, high, low, close and volume columns, and
+    may have a symbol column to hold several symbols. Parquet row groups
+    entirely at or before start are skipped using their statistics; CSV
+    files are streamed in blocks.
+    """
+
+    COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, path: Path, batch_size: int = 100_000):
+        self.path = Path(path)
+        self.batch_size = batch_size
+
+    def fetch(self, symbol: str, start: Optional[datetime] = None) -> Iterator[BarArrays]:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.csv as pa_csv
+        import pyarrow.dataset as pa_dataset
+
+        if self.path.suffix.lower() == '.csv':
+            batches = pa_csv.open_csv(
+                self.path, read_options=pa_csv.ReadOptions(block_size=64 * 1024 * 1024)
+            )
+        else:
+            dataset = pa_dataset.dataset(self.path, format='parquet')
+            condition = None
+            if 'symbol' in dataset.schema.names:
+                condition = pc.field('symbol') == symbol
+            timestamp_type = dataset.schema.field('timestamp').type
+            if start is not None and pa.types.is_timestamp(timestamp_type) and timestamp_type.tz is None:
+                after_start = pc.field('timestamp') > pa.scalar(start, timestamp_type)
+                condition = after_start if condition is None else condition & after_start
+            batches = dataset.to_batches(filter=condition, batch_size=self.batch_size)
+
+        for batch in batches:
+            if 'symbol' in batch.schema.names:
+                batch = batch.filter(pc.equal(batch.column('symbol'), symbol))
+            bars = after(self._to_bars(batch), start)
+            if len(bars):
+                yield bars
+
+    def _to_bars(self, batch: 'pa.RecordBatch') -> BarArrays:
+        """Convert a record batch to bars, keeping local wall time of zoned timestamps"""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        timestamps = batch.column('timestamp')
+        if pa.types.is_timestamp(timestamps.type) and timestamps.type.tz is not None:
+            timestamps = pc.local_timestamp(timestamps)
+        elif not pa.types.is_timestamp(timestamps.type):
+            timestamps = pc.strptime(timestamps, format='%Y-%m-%d %H:%M:%S', unit='s')
+        return BarArrays.from_columns({
+            'time': timestamps.cast(pa.timestamp('s')).cast(pa.int64()).to_numpy(),
+            **{name: batch.column(name).to_numpy(zero_copy_only=False) for name in self.COLUMNS[1:]}
+        })
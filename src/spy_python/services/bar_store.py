@@ -0,0 +1,173 @@
+"""Memory-Mapped Full-History Bar Store"""
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import numpy as np
+from ..config.logging import get_logger
+from ..models.bar_arrays import BarArrays
+
+logger = get_logger()
+
+# Directory of the memory-mapped store; set BAR_STORE_DIR to an empty string to disable it
+DEFAULT_BAR_STORE_DIR = os.getenv('BAR_STORE_DIR', 'cache/store')
+
+# File suffix for each column's raw little-endian values
+COLUMN_SUFFIXES = {'int64': 'i64', 'float64': 'f64'}
+
+
+def to_epoch_seconds(moment: datetime) -> int:
+    """Convert a naive datetime to epoch seconds, matching BarArrays.time."""
+    return int(np.datetime64(moment, 's').astype(np.int64))
+
+
+def from_epoch_seconds(seconds: int) -> datetime:
+    """Convert epoch seconds from BarArrays.time back to a naive datetime."""
+    return np.datetime64(int(seconds), 's').astype(datetime)
+
+
+class MemmapBarStore:
+    """
+    Full bar history per symbol as fixed-width column files.
+
+    Each symbol has a directory holding one raw file per column
+    (time.i64, open.f64, ..., volume.i64). The files are opened read-only with
+    np.memmap, so every process serving the same symbol shares the pages
+    through the OS page cache, and slices are views that copy nothing. The
+    time column is sorted, so range lookups are binary searches.
+
+    Bars are only ever appended. The time column is written last, and the
+    number of bars is that of the shortest column, so a reader never sees a
+    partially appended bar. Bars that are corrected in the database are
+    dropped from the store with truncate, and read from the database until
+    they are appended again.
+    """
+
+    def __init__(self, root: Path = Path(DEFAULT_BAR_STORE_DIR or 'cache/store')):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._mapped: Dict[str, Tuple[Tuple[int, int], BarArrays]] = {}
+
+    @classmethod
+    def from_env(cls) -> Optional['MemmapBarStore']:
+        """Create the store configured by BAR_STORE_DIR, or None if it is disabled."""
+        return cls(Path(DEFAULT_BAR_STORE_DIR)) if DEFAULT_BAR_STORE_DIR else None
+
+    def column_path(self, symbol: str, name: str) -> Path:
+        """Path of one column file of a symbol."""
+        suffix = COLUMN_SUFFIXES[np.dtype(BarArrays.DTYPES[name]).name]
+        return self.root / symbol / f"{name}.{suffix}"
+
+    def exists(self, symbol: str) -> bool:
+        """Check whether a symbol has been written to the store."""
+        return self.column_path(symbol, 'time').exists()
+
+    def bars(self, symbol: str) -> BarArrays:
+        """
+        Get a symbol's full history as memory-mapped columns.
+
+        The mapping is reused until the column files change on disk.
+        """
+        time_stat = self.column_path(symbol, 'time').stat()
+        signature = (time_stat.st_ino, time_stat.st_size)
+        with self._lock:
+            mapped = self._mapped.get(symbol)
+            if mapped is None or mapped[0] != signature:
+                mapped = (signature, self._map(symbol))
+                self._mapped[symbol] = mapped
+        return mapped[1]
+
+    def _map(self, symbol: str) -> BarArrays:
+        """Memory-map every column of a symbol, trimmed to the shortest one"""
+        sizes = {
+            name: self.column_path(symbol, name).stat().st_size // np.dtype(dtype).itemsize
+            for name, dtype in BarArrays.DTYPES.items()
+        }
+        length = min(sizes.values())
+        if length == 0:
+            return BarArrays.empty()
+        return BarArrays(**{
+            name: np.memmap(self.column_path(symbol, name), dtype=np.dtype(dtype).newbyteorder('<'),
+                            mode='r', shape=(length,))
+            for name, dtype in BarArrays.DTYPES.items()
+        })
+
+    def last_time(self, symbol: str) -> Optional[int]:
+        """Epoch seconds of a symbol's last stored bar, or None if there is none."""
+        if not self.exists(symbol):
+            return None
+        times = self.bars(symbol).time
+        return int(times[-1]) if len(times) else None
+
+    def range(self, symbol: str, start: datetime, end: datetime) -> BarArrays:
+        """Get the bars in [start, end) as views of the mapped columns."""
+        bars = self.bars(symbol)
+        first, stop = np.searchsorted(bars.time, [to_epoch_seconds(start), to_epoch_seconds(end)])
+        return bars.slice(first, stop)
+
+    def append(self, symbol: str, bars: BarArrays) -> None:
+        """
+        Append bars to a symbol's history.
+
+        Raises:
+            ValueError: If the bars are not sorted or do not start after the
+                last stored bar
+        """
+        if not len(bars):
+            return
+        if np.any(np.diff(bars.time) <= 0):
+            raise ValueError("Appended bars must have strictly increasing times")
+        last_time = self.last_time(symbol)
+        if last_time is not None and bars.time[0] <= last_time:
+            raise ValueError(f"Appended bars must start after the last stored bar ({last_time})")
+
+        (self.root / symbol).mkdir(parents=True, exist_ok=True)
+        length = len(self.bars(symbol)) if self.exists(symbol) else 0
+        for name in (*BarArrays.COLUMNS[1:], 'time'):
+            dtype = np.dtype(BarArrays.DTYPES[name]).newbyteorder('<')
+            path = self.column_path(symbol, name)
+            path.touch()
+            with open(path, 'r+b') as f:
+                # Drop any tail left by an interrupted append before writing
+                f.truncate(length * dtype.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(getattr(bars, name), dtype=dtype).tobytes())
+
+    def truncate(self, symbol: str, start: datetime) -> int:
+        """
+        Drop a symbol's stored bars from a time onwards.
+
+        The kept bars are written through rewrite, so readers that still map
+        the old files are never truncated under them.
+
+        Returns:
+            Number of bars dropped
+        """
+        if not self.exists(symbol):
+            return 0
+        bars = self.bars(symbol)
+        keep = int(np.searchsorted(bars.time, to_epoch_seconds(start)))
+        if keep == len(bars):
+            return 0
+        self.rewrite(symbol, bars.slice(0, keep))
+        return len(bars) - keep
+
+    def rewrite(self, symbol: str, bars: BarArrays) -> None:
+        """Replace a symbol's whole history."""
+        staging = self.root / f".{symbol}.staging"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        for name, dtype in BarArrays.DTYPES.items():
+            filename = self.column_path(symbol, name).name
+            np.ascontiguousarray(getattr(bars, name), dtype=np.dtype(dtype).newbyteorder('<')).tofile(staging / filename)
+
+        # Readers keep the old inodes mapped; new readers see the staged files
+        target = self.root / symbol
+        retired = self.root / f".{symbol}.retired"
+        shutil.rmtree(retired, ignore_errors=True)
+        if target.exists():
+            os.replace(target, retired)
+        os.replace(staging, target)
+        shutil.rmtree(retired, ignore_errors=True)
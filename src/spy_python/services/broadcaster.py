@@ -0,0 +1,269 @@
+"""Live Bar Broadcasting to Push Subscribers"""
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+import numpy as np
+from ..models.bar_arrays import BarArrays
+from ..indicators.saty_phase_oscillator import SatyPhaseOscillatorStream
+from ..config.logging import get_logger
+from .live_session import LiveSession, slice_day
+from .serialization import columnar_payload
+
+logger = get_logger()
+
+# Messages buffered per subscriber before it is considered too slow and dropped
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv('STREAM_QUEUE_SIZE', '256'))
+
+# Seconds between database polls of the live feed
+STREAM_POLL_INTERVAL = float(os.getenv('STREAM_POLL_INTERVAL', '1.0'))
+
+# Longest wait between polls while there is no session, e.g. overnight and on holidays
+STREAM_IDLE_POLL_INTERVAL = float(os.getenv('STREAM_IDLE_POLL_INTERVAL', '60'))
+
+
+class BarFeed(ABC):
+    """Source of new and revised bars with their indicator values, for one symbol"""
+
+    @abstractmethod
+    def poll(self) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the next change
+
+        Returns:
+            Day arrays (see DataService.calculate_indicators) starting at the
+            last bar of the previous change, followed by the bars added since,
+            or None if nothing changed
+        """
+
+
+class DatabaseFeed(BarFeed):
+    """
+    Polls the database through a DataService's live session
+
+    While the current day has no bars the wait between polls doubles, up to
+    idle_poll_interval, and it drops back to poll_interval once bars arrive.
+    """
+
+    def __init__(self, data_service, poll_interval: float = STREAM_POLL_INTERVAL,
+                 idle_poll_interval: float = STREAM_IDLE_POLL_INTERVAL):
+        self.data_service = data_service
+        self.poll_interval = poll_interval
+        self.idle_poll_interval = max(idle_poll_interval, poll_interval)
+        self._wait = poll_interval
+        self._day_start: Optional[datetime] = None
+        self._sent: Optional[tuple] = None
+
+    def poll(self) -> Optional[Dict[str, Any]]:
+        time.sleep(self._wait)
+        now = datetime.now()
+        day = self.data_service.get_day_arrays(now)
+        if day is None:
+            if self._wait < self.idle_poll_interval:
+                self._wait = min(self._wait * 2, self.idle_poll_interval)
+                logger.debug("No session for {}, next poll in {:.0f} seconds", self.data_service.symbol, self._wait)
+            return None
+        self._wait = self.poll_interval
+
+        day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        if day_start != self._day_start or self._sent is None:
+            # Subscribers load history themselves; only the latest bar is news
+            self._day_start = day_start
+            start = len(day['time']) - 1
+        elif self._row(day, len(day['time']) - 1) == self._sent:
+            return None
+        else:
+            # Start at the last bar sent, so clients can check they missed nothing
+            start = int(np.searchsorted(day['time'], self._sent[0]))
+
+        self._sent = self._row(day, len(day['time']) - 1)
+        return slice_day(day, start)
+
+    @staticmethod
+    def _row(day: Dict[str, Any], index: int) -> tuple:
+        return tuple(day[name][index].item() for name in BarArrays.COLUMNS)
+
+
+class ReplayFeed(BarFeed):
+    """
+    Replays bars at a fixed pace as if they were arriving live.
+
+    Stands in for a market data feed in development and load tests. The
+    replayed bars run through their own LiveSession, so subscribers receive
+    the same incremental oscillator values a live session produces.
+    """
+
+    def __init__(self, data_service, bars: BarArrays, interval: float = 1.0, loop: bool = True):
+        """
+        Args:
+            data_service: Service providing the indicator configuration
+            bars: Bars to replay, in time order
+            interval: Seconds between replayed bars
+            loop: Start again from the first bar after the last one
+        """
+        self.data_service = data_service
+        self.bars = bars
+        self.interval = interval
+        self.loop = loop
+        self._position = 0
+        self._session = self._new_session()
+
+    def _new_session(self) -> LiveSession:
+        empty = self.data_service.calculate_indicators(BarArrays.empty())
+        stream = SatyPhaseOscillatorStream(self.data_service.oscillator)
+        return LiveSession(datetime.now(), empty, stream, self.data_service.calculate_overlays)
+
+    def poll(self) -> Optional[Dict[str, Any]]:
+        time.sleep(self.interval)
+        if self._position >= len(self.bars):
+            if not self.loop or not len(self.bars):
+                return None
+            self._position = 0
+            self._session = self._new_session()
+        previous_time = self._session.last_time
+        bar = self.bars.slice(self._position, self._position + 1)
+        self._position += 1
+        self._session.advance(bar)
+        return self._session.since(int(bar.time[0]) if previous_time is None else previous_time)
+
+
+class AsyncSubscriber:
+    """
+    Subscriber queue filled by a broadcaster thread and read by an asyncio task
+
+    Has the queue.Queue methods the broadcaster calls, so streams served
+    from an event loop need no thread of their own.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self._loop = loop
+        self._maxsize = maxsize
+        self._messages = deque()
+        self._ready = asyncio.Event()
+
+    def put_nowait(self, message: Optional[bytes]) -> None:
+        if message is not None and len(self._messages) >= self._maxsize:
+            raise queue.Full
+        self._messages.append(message)
+        self._loop.call_soon_threadsafe(self._ready.set)
+
+    def get_nowait(self) -> Optional[bytes]:
+        try:
+            return self._messages.popleft()
+        except IndexError:
+            raise queue.Empty
+
+    async def get(self, timeout: float) -> Optional[bytes]:
+        """Wait for the next message; raises queue.Empty after timeout seconds without one"""
+        while not self._messages:
+            self._ready.clear()
+            if self._messages:
+                break
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                raise queue.Empty
+        return self._messages.popleft()
+
+
+class Broadcaster:
+    """
+    Fans each change of a symbol's bars out to every subscriber.
+
+    One thread per symbol polls the feed, so indicator values are computed
+    and serialized once per bar whatever the number of subscribers. Each
+    subscriber gets a bounded queue of ready-to-send Server-Sent Events; a
+    subscriber whose queue is full is dropped, and can reconnect and catch up
+    with /api/data?since=.
+    """
+
+    def __init__(self, symbol: str, feed: BarFeed, palette: List[str]):
+        self.symbol = symbol
+        self.feed = feed
+        self.palette = palette
+        self._subscribers: Set[queue.Queue] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.messages_sent = 0
+        self.subscribers_dropped = 0
+
+    def subscribe(self, subscriber: Optional[queue.Queue] = None) -> queue.Queue:
+        """
+        Register a subscriber, starting the feed thread if needed
+
+        Args:
+            subscriber: Queue to deliver to, e.g. an AsyncSubscriber; a new
+                bounded queue.Queue by default
+
+        Returns:
+            Queue of encoded events; None means the subscriber was dropped
+        """
+        if subscriber is None:
+            subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"broadcaster-{self.symbol}", daemon=True
+                )
+                self._thread.start()
+        logger.info("Stream subscriber added for {} ({} total)", self.symbol, len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        """Remove a subscriber"""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+        logger.info("Stream subscriber removed for {} ({} total)", self.symbol, len(self._subscribers))
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, message: bytes) -> None:
+        """Queue a message for every subscriber"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                self._drop(subscriber)
+        self.messages_sent += 1
+
+    def _drop(self, subscriber: queue.Queue) -> None:
+        """Unsubscribe a subscriber that fell behind and tell it to disconnect"""
+        self.unsubscribe(subscriber)
+        self.subscribers_dropped += 1
+        try:
+            while True:
+                subscriber.get_nowait()
+        except queue.Empty:
+            pass
+        subscriber.put_nowait(None)
+        logger.warning(f"Dropped slow stream subscriber for {self.symbol}")
+
+    def _run(self) -> None:
+        """Poll the feed and publish changes while anyone is subscribed"""
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    break
+            try:
+                delta = self.feed.poll()
+                if delta is None or not len(delta['time']):
+                    continue
+                payload = columnar_payload(delta, self.palette)
+                payload['sent_at'] = time.time()
+                self.publish(f"event: bars\ndata: {json.dumps(payload)}\n\n".encode())
+            except Exception as e:
+                logger.error(f"Error in {self.symbol} broadcaster: {str(e)}", exc_info=True)
+                time.sleep(STREAM_POLL_INTERVAL)
+        logger.info(f"Broadcaster for {self.symbol} idle, stopping")
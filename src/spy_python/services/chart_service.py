@@ -4,10 +4,17 @@ from typing import List, Dict, Any
 import pandas as pd
 from lightweight_charts import Chart
 from ..config.logging import get_logger
-from ..models.spy_data import SPYData
 
 logger = get_logger()
 
+def format_volume(volume: int) -> str:
+    """Format volume with K/M suffix."""
+    if volume >= 1_000_000:
+        return f"{volume/1_000_000:.2f}M"
+    if volume >= 1_000:
+        return f"{volume/1_000:.2f}K"
+    return str(volume)
+
 class ChartService:
     """Service class for handling chart operations"""
 
@@ -78,30 +85,30 @@ class ChartService:
             logger.error(f"Error initializing chart: {str(e)}", exc_info=True)
             raise
 
-    def display_chart(self, data: List[SPYData]):
+    def display_chart(self, data: List[Dict[str, Any]], interval: str = '1m'):
         """
         Display SPY data chart
         
         Args:
-            data: List of SPYData objects
+            data: Per-bar dictionaries with oscillator values, as returned by
+                DataService.get_data_for_date
+            interval: Bar interval of the data
         """
         try:
             start_time = datetime.now()
             logger.info("Starting chart display process")
-            logger.debug(f"Input data count: {len(data)}")
+            logger.debug(f"Input data count: {len(data)} {interval} bars")
 
             if not data:
                 logger.warning("No data available to display")
                 return
 
-            # Convert data to OHLC format
-            logger.debug("Converting data to OHLC format")
-            ohlc_data = SPYData.format_ohlc_list(data)
+            ohlc_data = data
 
             # Add candlestick series
             logger.debug("Adding candlestick series")
             candlestick_series = self.chart.candlestick_series(
-                title='SPY',
+                title=f'SPY {interval}',
                 up_color='#26a69a',
                 down_color='#ef5350',
                 border_up_color='#26a69a',
@@ -180,22 +187,25 @@ class ChartService:
                     )
 
             # Set up legend update on crosshair move
+            bars_by_time = {item['time']: item for item in ohlc_data}
+
             def update_legend(param: Dict[str, Any]):
                 if param and 'time' in param:
-                    data_point = next((d for d in data if int(d.timestamp.timestamp()) == param['time']), None)
+                    data_point = bars_by_time.get(param['time'])
                     if data_point:
-                        is_up = data_point.is_bullish
+                        is_up = data_point['close'] >= data_point['open']
                         color = '#26a69a' if is_up else '#ef5350'
+                        change = (data_point['close'] - data_point['open']) / data_point['open'] * 100
                         self.chart.update_legend({
                             'ohlc': {
-                                'open': data_point.format_price(data_point.open),
-                                'high': data_point.format_price(data_point.high),
-                                'low': data_point.format_price(data_point.low),
-                                'close': data_point.format_price(data_point.close),
+                                'open': f"{data_point['open']:.2f}",
+                                'high': f"{data_point['high']:.2f}",
+                                'low': f"{data_point['low']:.2f}",
+                                'close': f"{data_point['close']:.2f}",
                                 'color': color
                             },
-                            'volume': data_point.format_volume(),
-                            'change': f"{data_point.price_change_percent:+.2f}%"
+                            'volume': format_volume(data_point['volume']),
+                            'change': f"{change:+.2f}%"
                         })
 
             self.chart.subscribe_crosshair_move(update_legend)
@@ -1,21 +1,98 @@
 """Data Service for SPY Data"""
-from datetime import datetime, timedelta
-import pandas as pd
+import io
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date as Date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
 from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 from ..models.spy_data import SPYData
-from ..config.database import engine
+from ..models.bar_arrays import BarArrays
+from ..config.database import get_engine
 from ..config.logging import get_logger
-from ..indicators.saty_phase_oscillator import SatyPhaseOscillator
+from ..indicators.engine import IndicatorEngine
+from ..indicators.registry import get_indicator
+from ..indicators.saty_phase_oscillator import COLOR_CODES, SatyPhaseOscillatorStream
+from .indicator_cache import IndicatorCache
+from .bar_cache import ParquetBarCache
+from .bar_store import MemmapBarStore, from_epoch_seconds, to_epoch_seconds
+from .serialization import columnar_payload, row_payload
+from .live_session import LiveSession, slice_day
+from .resample import RESOLUTIONS, aggregate_bars, choose_resolution, lttb
+from .rollups import RollupEngine, interval_seconds
+from .single_flight import SingleFlight
+from .metrics import timed_stage
 
 logger = get_logger()
 
+# Bars of history before the first displayed bar that warm up the oscillator
+# on intervals above one minute
+WARMUP_BARS = 100
+
+# Regular session length, used to convert bar counts into calendar days
+SESSION_SECONDS = 23400
+
+# Days of daily bars shown for a session when the interval is a day or longer
+DAILY_VIEW_DAYS = 365
+
+# Hours after a session's day ends before it is treated as final, so late
+# syncs and corrections land before responses are cached as immutable
+SESSION_FINAL_HOURS = float(os.getenv('SESSION_FINAL_HOURS', '72'))
+
+# Seconds a closed session's data version is reused before it is read again;
+# versions of final sessions are reused until evicted
+SESSION_VERSION_TTL = float(os.getenv('SESSION_VERSION_TTL', '10'))
+
+# Sessions whose data versions are kept in memory
+SESSION_VERSION_CACHE_SIZE = 4096
+
 class DataService:
     """Service class for handling data operations"""
 
-    def __init__(self):
-        self.engine = engine
-        self.oscillator = SatyPhaseOscillator()
+    def __init__(self, symbol: str = 'SPY', cache: Optional[IndicatorCache] = None,
+                 overlays: Iterable[str] = (), bar_cache: Optional[ParquetBarCache] = None,
+                 bar_store: Optional[MemmapBarStore] = None):
+        """
+        Args:
+            symbol: Symbol whose bars are served
+            cache: Indicator result cache, a private one by default
+            bar_cache: On-disk cache of closed sessions, configured from
+                BAR_CACHE_DIR by default
+            bar_store: Memory-mapped full-history store used for range
+                queries, configured from BAR_STORE_DIR by default
+            overlays: Names of registered indicators to calculate alongside
+                the Saty Phase Oscillator, e.g. 'bollinger_bands' or 'vwap'
+        """
+        self._engine = None
+        self.symbol = symbol
+        self.oscillator = get_indicator('saty_phase_oscillator')
+        self.overlays = [get_indicator(name) for name in overlays]
+        self.indicator_engine = IndicatorEngine([self.oscillator, *self.overlays])
+        self.cache = cache or IndicatorCache()
+        self.bar_cache = bar_cache if bar_cache is not None else ParquetBarCache.from_env()
+        self.bar_store = bar_store if bar_store is not None else MemmapBarStore.from_env()
+        self.overlay_engine = IndicatorEngine(self.overlays)
+        self.rollups = RollupEngine(self)
+        self.single_flight = SingleFlight()
+        self._live_session: Optional[LiveSession] = None
+        self._live_session_lock = threading.Lock()
+        self._session_versions: 'OrderedDict[Date, Tuple[float, str]]' = OrderedDict()
+        self._session_versions_lock = threading.Lock()
+
+    @property
+    def engine(self):
+        """Database engine, the shared one from config/database.py unless set"""
+        if self._engine is None:
+            self._engine = get_engine()
+        return self._engine
+
+    @engine.setter
+    def engine(self, engine) -> None:
+        self._engine = engine
 
     def get_latest_date(self) -> datetime:
         """Get the latest date from the database"""
@@ -29,74 +106,608 @@ class DataService:
             logger.error(f"Error getting latest date: {str(e)}", exc_info=True)
             raise
 
-    def get_data_for_date(self, date: datetime) -> dict:
+    def get_previous_session(self, date: datetime) -> Optional[datetime]:
+        """Get the last bar timestamp of the latest session before date, or None"""
+        day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(func.max(SPYData.timestamp)).where(
+                    SPYData.symbol == self.symbol,
+                    SPYData.timestamp < day_start
+                )
+            ).scalar()
+
+    def warm_up(self, days: int, intervals: Iterable[str] = ('1m',)) -> int:
+        """
+        Load the latest sessions into the bar and indicator caches
+
+        Args:
+            days: Number of trading days to load, counting back from the latest
+            intervals: Bar intervals to calculate for each day
+
+        Returns:
+            Number of sessions loaded
+        """
+        try:
+            start_time = datetime.now()
+            date = self.get_latest_date()
+            warmed = 0
+            while date is not None and warmed < days:
+                for interval in intervals:
+                    self.get_interval_day_arrays(date, interval)
+                warmed += 1
+                date = self.get_previous_session(date)
+
+            duration = (datetime.now() - start_time).total_seconds()
+            logger.info("Warmed up {} {} sessions ({}) in {:.2f} seconds",
+                        warmed, self.symbol, ', '.join(intervals), duration)
+            return warmed
+
+        except Exception as e:
+            logger.error("Error warming up caches: {}", e, exc_info=True)
+            raise
+
+    @staticmethod
+    def is_session_closed(date: datetime) -> bool:
+        """Check whether a trading day is over, so its bars can no longer change"""
+        return date.date() < datetime.now().date()
+
+    @staticmethod
+    def is_session_final(date: datetime) -> bool:
+        """Check whether a trading day ended SESSION_FINAL_HOURS ago, so its bars are not expected to change"""
+        day_end = date.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        return datetime.now() >= day_end + timedelta(hours=SESSION_FINAL_HOURS)
+
+    def get_session_version(self, date: datetime) -> str:
+        """
+        Get the data version of a trading day
+
+        The version is built from the day's last bar timestamp, row count and
+        weighted sums of its prices and volumes, so it changes whenever bars
+        land or any value is corrected. The version of a closed session is
+        reused for SESSION_VERSION_TTL seconds. A final session's version is
+        taken from its sealed bar cache partition, or without a bar cache read
+        once and kept, so requests for it do not query the database. As the
+        ingestor deletes the partitions of days it corrects, such a day's
+        version is then read again.
+        """
+        if not self.is_session_closed(date):
+            return self._read_session_version(date)
+        key = date.date()
+        keep = self.is_session_final(date)
+        if keep and self.bar_cache is not None:
+            stamp = self.bar_cache.read_stamp(self.symbol, key)
+            if stamp is not None and stamp.final and stamp.version is not None:
+                return stamp.version
+            keep = False
+        now = time.monotonic()
+        with self._session_versions_lock:
+            memo = self._session_versions.get(key)
+            if memo is not None and (keep or now - memo[0] < SESSION_VERSION_TTL):
+                self._session_versions.move_to_end(key)
+                return memo[1]
+
+        version = self._read_session_version(date)
+        with self._session_versions_lock:
+            self._session_versions[key] = (now, version)
+            self._session_versions.move_to_end(key)
+            while len(self._session_versions) > SESSION_VERSION_CACHE_SIZE:
+                self._session_versions.popitem(last=False)
+        return version
+
+    def _read_session_version(self, date: datetime) -> str:
+        """Query the data version of a trading day, see get_session_version"""
+        day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        versions = self.read_session_versions(day_start, day_start + timedelta(days=1))
+        return versions.get(day_start.date(), self.format_session_version(None, 0, None, None))
+
+    def read_session_versions(self, start: datetime, end: datetime) -> Dict[Date, str]:
+        """Query the data versions of the trading days with bars in [start, end), in one grouped query"""
+        day = func.date(SPYData.timestamp)
+        # Distinct weights make a correction that swaps two prices change the sum too
+        prices = SPYData.open + 2 * SPYData.high + 3 * SPYData.low + 5 * SPYData.close
+        with Session(self.engine) as session:
+            rows = session.execute(
+                select(day, func.max(SPYData.timestamp), func.count(), func.sum(prices), func.sum(SPYData.volume))
+                .where(
+                    SPYData.symbol == self.symbol,
+                    SPYData.timestamp >= start,
+                    SPYData.timestamp < end
+                ).group_by(day)
+            ).all()
+        return {
+            Date.fromisoformat(str(session_day)[:10]): self.format_session_version(*values)
+            for session_day, *values in rows
+        }
+
+    @staticmethod
+    def format_session_version(last_timestamp, row_count: int, price_sum, volume_sum) -> str:
+        """Format a session's data version, e.g. for ETags and bar cache stamps"""
+        return f"{last_timestamp}/{row_count}/{price_sum}/{volume_sum}"
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get indicator cache and request coalescing counters"""
+        stats = self.cache.stats()
+        stats['single_flight'] = self.single_flight.stats()
+        return stats
+
+    def fetch_bar_arrays(self, start: datetime, end: datetime) -> BarArrays:
+        """
+        Fetch OHLCV bars in [start, end) straight into typed NumPy columns
+
+        Only the OHLCV columns are selected and no ORM objects are built. On
+        PostgreSQL with psycopg2 the rows are streamed with a binary COPY and
+        decoded in one pass; other engines fall back to a SQLAlchemy Core
+        select of the same columns.
+        """
+        if self.engine.dialect.name == 'postgresql' and self.engine.dialect.driver == 'psycopg2':
+            return self._copy_bar_arrays(start, end)
+        return self._select_bar_arrays(start, end)
+
+    def _select_bar_arrays(self, start: datetime, end: datetime) -> BarArrays:
+        """Fetch bars with a SQLAlchemy Core select of the OHLCV columns"""
+        query = select(
+            SPYData.timestamp, SPYData.open, SPYData.high,
+            SPYData.low, SPYData.close, SPYData.volume
+        ).where(
+            SPYData.symbol == self.symbol,
+            SPYData.timestamp >= start,
+            SPYData.timestamp < end
+        ).order_by(SPYData.timestamp)
+        with timed_stage('db_query'), self.engine.connect() as connection:
+            rows = connection.execute(query).all()
+        with timed_stage('conversion'):
+            return BarArrays.from_rows(rows)
+
+    def get_day_bars(self, date: datetime, version: Optional[str] = None) -> BarArrays:
+        """
+        Get a day's bars, reading closed sessions through the Parquet bar cache
+
+        A closed session is fetched from the database once and then served
+        from its cached partition. Until the session is final, the partition
+        is only used while its stamp matches the session's data version. Once
+        it is final, the partition is sealed and served without querying the
+        database. The current session always comes from the database.
+
+        Args:
+            date: Trading day
+            version: Data version of the day (see get_session_version), read if not given
+        """
+        day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        if self.bar_cache is None or not self.is_session_closed(date):
+            return self.fetch_bar_arrays(day_start, day_start + timedelta(days=1))
+
+        day = day_start.date()
+        final = self.is_session_final(date)
+        stamp = self.bar_cache.read_stamp(self.symbol, day)
+        if stamp is not None and stamp.final:
+            bars = self.bar_cache.read(self.symbol, day)
+            if bars is not None:
+                logger.debug("Bar cache hit for {} {}", self.symbol, day)
+                return bars
+
+        if version is None:
+            version = self.get_session_version(date)
+        if stamp is not None and stamp.version == version:
+            bars = self.bar_cache.read(self.symbol, day)
+            if bars is not None:
+                logger.debug("Bar cache hit for {} {}", self.symbol, day)
+                if final:
+                    self.bar_cache.write(self.symbol, day, bars, version, final=True)
+                return bars
+        if stamp is not None:
+            logger.info("Bar cache of {} {} is stale, refetching", self.symbol, day)
+
+        bars = self.fetch_bar_arrays(day_start, day_start + timedelta(days=1))
+        self.bar_cache.write(self.symbol, day, bars, version, final)
+        return bars
+
+    def get_bars_range(self, start: datetime, end: datetime) -> BarArrays:
+        """
+        Get the bars in [start, end) for multi-day views
+
+        Bars held by the memory-mapped store are returned as zero-copy views
+        found by binary search on the time column. Only bars newer than the
+        store's last bar are fetched from the database, and only then are
+        the columns copied to join the two parts. Ingestion truncates the
+        store at the earliest bar it writes, so corrected bars come from the
+        database.
+        """
+        if self.bar_store is None or not self.bar_store.exists(self.symbol):
+            return self.fetch_bar_arrays(start, end)
+
+        stored = self.bar_store.range(self.symbol, start, end)
+        last_time = self.bar_store.last_time(self.symbol)
+        if last_time is None:
+            return self.fetch_bar_arrays(start, end)
+        tail_start = max(start, from_epoch_seconds(last_time + 1))
+        if tail_start >= end:
+            return stored
+        tail = self.fetch_bar_arrays(tail_start, end)
+        return BarArrays.concat([stored, tail]) if len(tail) else stored
+
+    def fetch_bars_before(self, before: datetime, limit: int, interval: str = '1m') -> BarArrays:
+        """
+        Fetch the newest limit bars of an interval starting before a time
+
+        A keyset query: the (symbol, timestamp) index is walked backwards
+        from before, so every page costs the same however far back it is.
+        On PostgreSQL the unique index includes the bar columns, so it answers
+        with an index-only scan. Coarser intervals are read from the stored
+        rollups, see _fetch_interval_bars_before.
+
+        Returns:
+            Bars in time order
+        """
+        if interval_seconds(interval) != 60:
+            return self._fetch_interval_bars_before(interval, before, limit)
+
+        query = select(
+            SPYData.timestamp, SPYData.open, SPYData.high,
+            SPYData.low, SPYData.close, SPYData.volume
+        ).where(
+            SPYData.symbol == self.symbol,
+            SPYData.timestamp < before
+        ).order_by(SPYData.timestamp.desc()).limit(limit)
+        with timed_stage('db_query'), self.engine.connect() as connection:
+            rows = connection.execute(query).all()
+        with timed_stage('conversion'):
+            return BarArrays.from_rows(rows[::-1])
+
+    def _fetch_interval_bars_before(self, interval: str, before: datetime, limit: int) -> BarArrays:
+        """
+        Fetch the newest limit bars of a coarser interval starting before a time
+
+        Stored rollups older than the newest one are read with a keyset query.
+        The newest stored bar, which may have been incomplete, and any newer
+        bars are aggregated from minute bars, as in get_interval_bars. Without
+        stored rollups, every bar is aggregated from a keyset page of minute
+        bars.
+        """
+        seconds = interval_seconds(interval)
+        # End of the bucket holding the cursor, so the buckets before it get all their minutes
+        minute_end = from_epoch_seconds(-(-to_epoch_seconds(before) // seconds) * seconds)
+        last_stored = self.rollups.last_bar_start(interval)
+        if last_stored is None:
+            # A bucket holds at most seconds // 60 minute bars, so this spans limit + 1 buckets
+            minute_limit = (limit + 1) * (seconds // 60)
+            minutes = self.fetch_bars_before(minute_end, minute_limit)
+            bars = aggregate_bars(minutes, seconds)
+            if len(minutes) == minute_limit:
+                # The oldest bucket may be missing its first minutes
+                bars = bars.slice(1, len(bars))
+        else:
+            stored = self.rollups.read_before(interval, min(before, last_stored), limit)
+            tail = (aggregate_bars(self.get_bars_range(last_stored, minute_end), seconds)
+                    if last_stored < minute_end else BarArrays.empty())
+            bars = BarArrays.concat([stored, tail])
+        return bars.slice(max(len(bars) - limit, 0), len(bars))
+
+    def get_history_page(self, before: datetime, limit: int,
+                         interval: str = '1m') -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Get a page of bars before a time with their indicator values
+
+        WARMUP_BARS extra bars are fetched ahead of the page to warm up the
+        oscillator, so each page costs the same whatever its position.
+
+        Args:
+            before: Bars starting before this time are returned
+            limit: Maximum number of bars
+            interval: Bar interval
+
+        Returns:
+            Day arrays of the page (None if there are no bars before the
+            cursor) and whether older bars exist
+        """
+        try:
+            bars = self.fetch_bars_before(before, limit + WARMUP_BARS, interval)
+            if not len(bars):
+                return None, False
+            day = self.calculate_indicators(bars)
+            logger.debug("Loaded {} {} bars before {}", min(len(bars), limit), interval, before)
+            return slice_day(day, max(len(bars) - limit, 0)), len(bars) > limit
+
+        except Exception as e:
+            logger.error(f"Error getting history page: {str(e)}", exc_info=True)
+            raise
+
+    def get_interval_bars(self, interval: str, start: datetime, end: datetime) -> BarArrays:
+        """
+        Get bars of an interval starting in [start, end)
+
+        Minute bars come from get_bars_range. Coarser bars are read from the
+        stored rollups; the last stored bar, which may have been incomplete,
+        and any newer bars are aggregated from minute bars.
+
+        Raises:
+            ValueError: If the interval is not supported
+        """
+        seconds = interval_seconds(interval)
+        if seconds == 60:
+            return self.get_bars_range(start, end)
+
+        stored = self.rollups.read(interval, start, end)
+        tail_start = from_epoch_seconds(int(stored.time[-1])) if len(stored) else start
+        tail = aggregate_bars(self.get_bars_range(tail_start, end), seconds)
+        if not len(stored):
+            return tail
+        return BarArrays.concat([stored.slice(0, len(stored) - 1), tail])
+
+    def get_interval_day_arrays(self, date: datetime, interval: str = '1m') -> Optional[Dict[str, Any]]:
+        """
+        Get a day's bars of an interval and their indicator values
+
+        Minute bars go through get_day_arrays. On coarser intervals the
+        oscillator is calculated over the day's bars preceded by WARMUP_BARS
+        bars of history, and intervals of a day or longer show the
+        DAILY_VIEW_DAYS days up to the session. Closed sessions are served
+        from the indicator cache.
+
+        Concurrent calls for the same day and interval share one computation.
+
+        Returns:
+            Day arrays (see calculate_indicators), or None if the day has no bars
+
+        Raises:
+            ValueError: If the interval is not supported
+        """
+        return self.single_flight.do(
+            (self.symbol, date.date(), interval),
+            lambda: self._get_interval_day_arrays(date, interval)
+        )
+
+    def _get_interval_day_arrays(self, date: datetime, interval: str) -> Optional[Dict[str, Any]]:
+        """Get a day's bars of an interval and their indicator values, see get_interval_day_arrays"""
+        seconds = interval_seconds(interval)
+        if seconds == 60:
+            return self.get_day_arrays(date)
+
+        cache_symbol = f"{self.symbol}:{interval}"
+        closed = self.is_session_closed(date)
+        if closed:
+            version = self.get_session_version(date)
+            cached = self.cache.get(cache_symbol, date.date(), version)
+            if cached is not None:
+                logger.debug("Indicator cache hit for {} {}", cache_symbol, date.date())
+                return cached
+
+        start_time = datetime.now()
+        day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        view_start = day_start if seconds < 86400 else day_start - timedelta(days=DAILY_VIEW_DAYS)
+        bars_per_day = max(SESSION_SECONDS / seconds, 1)
+        warmup_days = math.ceil(WARMUP_BARS / bars_per_day * 7 / 5) + 4
+        bars = self.get_interval_bars(
+            interval, view_start - timedelta(days=warmup_days), day_start + timedelta(days=1)
+        )
+        first = int(np.searchsorted(bars.time, to_epoch_seconds(view_start)))
+        if first == len(bars):
+            logger.warning("No {} data found for date: {}", interval, date)
+            return None
+
+        day = slice_day(self.calculate_indicators(bars), first)
+        duration = (datetime.now() - start_time).total_seconds()
+        logger.info("Calculated {} {} bars for {} in {:.2f} seconds", len(day['time']), interval, date.date(), duration)
+        if closed:
+            self.cache.put(cache_symbol, date.date(), version, day)
+        return day
+
+    def get_range(self, start: datetime, end: datetime, points: int,
+                  interval: str = '1m') -> Dict[str, Any]:
+        """
+        Get bars and oscillator values in [start, end) sized for a chart
+
+        The oscillator is calculated over the bars of the interval for the
+        whole range and downsampled to points values with LTTB. The bars are
+        aggregated to the finest resolution, no finer than the interval, that
+        fits in points bars.
+
+        Args:
+            start: Start of the range
+            end: End of the range, exclusive
+            points: Point budget, typically the chart width in pixels
+            interval: Bar interval the oscillator is calculated on
+
+        Returns:
+            Dictionary with 'resolution' (seconds per bar), 'bars'
+            (aggregated BarArrays) and 'oscillator_time'/'oscillator' arrays
+        """
+        try:
+            start_time = datetime.now()
+            seconds = interval_seconds(interval)
+            bars = self.get_interval_bars(interval, start, end)
+            oscillator = self.indicator_engine.run(
+                bars.indicator_inputs()
+            )[self.oscillator.name]['oscillator'][0] if len(bars) else np.empty(0)
+
+            resolution = choose_resolution(
+                bars.time, points, [step for step in RESOLUTIONS if step >= seconds]
+            )
+            kept = lttb(bars.time, oscillator, points)
+            duration = (datetime.now() - start_time).total_seconds()
+            logger.info(
+                "Prepared {} bars from {} to {} at {}s resolution in {:.2f} seconds",
+                len(bars), start, end, resolution, duration
+            )
+            return {
+                'resolution': resolution,
+                'bars': aggregate_bars(bars, resolution),
+                'oscillator_time': bars.time[kept],
+                'oscillator': oscillator[kept],
+            }
+        except Exception as e:
+            logger.error(f"Error getting range data: {str(e)}", exc_info=True)
+            raise
+
+    def _copy_bar_arrays(self, start: datetime, end: datetime) -> BarArrays:
+        """Fetch bars with a binary COPY on PostgreSQL"""
+        with timed_stage('db_query'), self.engine.connect() as connection:
+            with connection.connection.cursor() as cursor:
+                query = cursor.mogrify(
+                    "SELECT extract(epoch FROM timestamp)::int8, open::float8, high::float8, "
+                    "low::float8, close::float8, volume::int8 "
+                    "FROM stock_data WHERE symbol = %s AND timestamp >= %s AND timestamp < %s "
+                    "ORDER BY timestamp",
+                    (self.symbol, start, end)
+                ).decode()
+                buffer = io.BytesIO()
+                cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT binary)", buffer)
+        with timed_stage('conversion'):
+            return BarArrays.from_pgcopy_binary(buffer.getbuffer())
+
+    def get_data_for_date(self, date: datetime, columnar: bool = False, interval: str = '1m'):
         """
         Get data for a specific date
+
+        Results are served from the indicator cache while the day's data
+        version is unchanged.
         
         Args:
             date: Date to get data for
+            columnar: Return parallel arrays per field instead of one dict per bar
+            interval: Bar interval
             
         Returns:
-            Dictionary containing candlestick and oscillator data
+            Candlestick and oscillator data, as a list of per-bar dictionaries
+            or as a columnar dictionary (see serialization.columnar_payload)
         """
         try:
-            start_time = datetime.now()
-            logger.info(f"Fetching data for date: {date}")
-
-            # Get data from database
-            with Session(self.engine) as session:
-                query = select(SPYData).where(
-                    SPYData.timestamp >= date.replace(hour=0, minute=0, second=0),
-                    SPYData.timestamp < (date + timedelta(days=1)).replace(hour=0, minute=0, second=0)
-                ).order_by(SPYData.timestamp)
-                
-                result = session.execute(query)
-                data = result.scalars().all()
-
-            if not data:
-                logger.warning(f"No data found for date: {date}")
+            day = self.get_interval_day_arrays(date, interval)
+            if columnar:
+                return columnar_payload(day, self.palette)
+            if day is None:
                 return {'candlesticks': [], 'volume': [], 'oscillator': []}
-
-            # Convert to DataFrame for calculations
-            df = pd.DataFrame([{
-                'timestamp': d.timestamp,
-                'open': float(d.open),
-                'high': float(d.high),
-                'low': float(d.low),
-                'close': float(d.close),
-                'volume': d.volume
-            } for d in data])
-
-            # Calculate oscillator values
-            oscillator_data = self.oscillator.calculate(df)
-
-            # Prepare response data
-            response_data = []
-            for i, row in df.iterrows():
-                time = int(row['timestamp'].timestamp())
-                item = {
-                    'time': time,
-                    'open': row['open'],
-                    'high': row['high'],
-                    'low': row['low'],
-                    'close': row['close'],
-                    'volume': row['volume'],
-                    'oscillator': oscillator_data['oscillator'][i],
-                    'compression': oscillator_data['compression_tracker'][i],
-                    'color': oscillator_data['colors'][i],
-                    'leaving_accumulation': oscillator_data['signals']['leaving_accumulation'][i],
-                    'leaving_extreme_down': oscillator_data['signals']['leaving_extreme_down'][i],
-                    'leaving_distribution': oscillator_data['signals']['leaving_distribution'][i],
-                    'leaving_extreme_up': oscillator_data['signals']['leaving_extreme_up'][i]
-                }
-                response_data.append(item)
-
-            end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds()
-            logger.info(f"Data fetched successfully in {duration:.2f} seconds")
-
-            return response_data
+            return row_payload(day, self.palette)
 
         except Exception as e:
             logger.error(f"Error fetching data: {str(e)}", exc_info=True)
             raise
+
+    def get_day_delta(self, date: datetime, since: int, interval: str = '1m') -> Optional[Dict[str, Any]]:
+        """
+        Get a day's bars at or after a cursor, with their indicator values
+
+        Clients pass the time of the last bar they hold, so the response is
+        that bar, possibly revised while it was still forming, followed by
+        any newer bars.
+
+        Args:
+            date: Date to get data for
+            since: Epoch seconds of the first bar to return
+            interval: Bar interval
+
+        Returns:
+            Day arrays restricted to bars at or after since, or None if the
+            day has no bars
+        """
+        day = self.get_interval_day_arrays(date, interval)
+        if day is None:
+            return None
+        return slice_day(day, int(np.searchsorted(day['time'], since)))
+
+    def get_day_arrays(self, date: datetime) -> Optional[Dict[str, Any]]:
+        """
+        Get a day's bars and indicator values as NumPy arrays
+
+        Closed sessions are served from the indicator cache. The current
+        session is kept up to date incrementally by a LiveSession.
+
+        Returns:
+            Day arrays (see _calculate_day_arrays), or None if the day has no bars
+        """
+        if not self.is_session_closed(date):
+            return self._advance_live_session(date)
+
+        version = self.get_session_version(date)
+        cached = self.cache.get(self.symbol, date.date(), version)
+        if cached is not None:
+            logger.debug("Indicator cache hit for {} {}", self.symbol, date.date())
+            return cached
+
+        day = self._calculate_day_arrays(date, version)
+        if day is not None:
+            self.cache.put(self.symbol, date.date(), version, day)
+        return day
+
+    def _advance_live_session(self, date: datetime) -> Optional[Dict[str, Any]]:
+        """Bring the current session up to date with the bars stored since the last call"""
+        day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        with self._live_session_lock:
+            live = self._live_session
+            if live is None or live.day_start != day_start:
+                day = self._calculate_day_arrays(date)
+                if day is None:
+                    return None
+                stream = SatyPhaseOscillatorStream(self.oscillator)
+                stream.seed(day)
+                live = self._live_session = LiveSession(day_start, day, stream, self.calculate_overlays)
+                logger.info("Started live session for {} {}", self.symbol, day_start.date())
+
+        with live.lock:
+            # Re-read the last known bar too, in case it was still forming
+            live.advance(self.fetch_bar_arrays(
+                from_epoch_seconds(live.last_time), day_start + timedelta(days=1)
+            ))
+            return live.day
+
+    def _calculate_day_arrays(self, date: datetime, version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Query a day's bars and calculate its oscillator values"""
+        start_time = datetime.now()
+        logger.info("Fetching data for date: {}", date)
+
+        # Get data from the bar cache or the database
+        bars = self.get_day_bars(date, version)
+
+        if not len(bars):
+            logger.warning("No data found for date: {}", date)
+            return None
+
+        day = self.calculate_indicators(bars)
+
+        end_time = datetime.now()
+        duration = (end_time - start_time).total_seconds()
+        logger.info("Data fetched successfully in {:.2f} seconds", duration)
+
+        return day
+
+    @property
+    def palette(self) -> List[str]:
+        """Hex colors indexed by the oscillator color codes"""
+        return [self.oscillator.colors[name] for name in COLOR_CODES]
+
+    def calculate_indicators(self, bars: BarArrays) -> Dict[str, Any]:
+        """
+        Calculate oscillator and overlay values for bars
+
+        Returns:
+            Dictionary of 1-D arrays: the bar columns, 'oscillator',
+            'compression', 'color' (codes into palette), 'signals' and
+            'overlays', the last two keyed by name
+        """
+        # Shared primitives are computed once for the oscillator and all overlays
+        with timed_stage('indicators'):
+            results = self.indicator_engine.run(bars.indicator_inputs())
+        oscillator_data = results[self.oscillator.name]
+        return {
+            **bars.columns(),
+            'oscillator': oscillator_data['oscillator'][0],
+            'compression': oscillator_data['compression_tracker'][0],
+            'color': oscillator_data['color_codes'][0],
+            'signals': {key: values[0] for key, values in oscillator_data['signals'].items()},
+            'overlays': self._overlay_columns(results)
+        }
+
+    def calculate_overlays(self, bars: BarArrays) -> Dict[str, np.ndarray]:
+        """Calculate only the overlay values for bars, keyed by column name"""
+        if not self.overlays:
+            return {}
+        with timed_stage('indicators'):
+            return self._overlay_columns(self.overlay_engine.run(bars.indicator_inputs()))
+
+    def _overlay_columns(self, results: Dict[str, Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """Name overlay outputs after their indicator and output key"""
+        return {
+            overlay.name if key == overlay.name else f"{overlay.name}_{key}": values[0]
+            for overlay in self.overlays
+            for key, values in results[overlay.name].items()
+        }
@@ -0,0 +1,170 @@
+"""Streaming Export of Bars with Oscillator Values"""
+import io
+import json
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Tuple
+import numpy as np
+from sqlalchemy import select
+from ..models.bar_arrays import BarArrays
+from ..models.spy_data import SPYData
+from ..indicators.saty_phase_oscillator import SatyPhaseOscillatorStream
+from ..config.logging import get_logger
+from .data_service import WARMUP_BARS
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+logger = get_logger()
+
+# Bars fetched from the server-side cursor, and written, per chunk
+DEFAULT_CHUNK_BARS = 50_000
+
+# Media types of the export formats
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting bytes until they are taken"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+class BarExporter:
+    """
+    Streams a range of bars with their oscillator values in chunks.
+
+    Bars are read with a server-side cursor (stream_results) and each chunk
+    is run through a SatyPhaseOscillatorStream seeded with the bars before
+    the range, then encoded and yielded before the next chunk is fetched.
+    Memory use depends on the chunk size, not on the length of the range.
+    """
+
+    def __init__(self, data_service, chunk_bars: int = DEFAULT_CHUNK_BARS):
+        """
+        Args:
+            data_service: DataService whose engine, symbol and oscillator are used
+            chunk_bars: Bars per chunk
+        """
+        self.data_service = data_service
+        self.chunk_bars = chunk_bars
+
+    def iter_bars(self, start: datetime, end: datetime) -> Iterator[BarArrays]:
+        """Fetch bars in [start, end) through a server-side cursor, chunk_bars at a time"""
+        query = select(
+            SPYData.timestamp, SPYData.open, SPYData.high,
+            SPYData.low, SPYData.close, SPYData.volume
+        ).where(
+            SPYData.symbol == self.data_service.symbol,
+            SPYData.timestamp >= start,
+            SPYData.timestamp < end
+        ).order_by(SPYData.timestamp)
+        with self.data_service.engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, yield_per=self.chunk_bars).execute(query)
+            for rows in result.partitions():
+                yield BarArrays.from_rows(rows)
+
+    def chunks(self, start: datetime, end: datetime) -> Iterator[Tuple[BarArrays, Dict[str, np.ndarray]]]:
+        """Yield each chunk of bars in [start, end) with its oscillator values"""
+        stream = SatyPhaseOscillatorStream(self.data_service.oscillator)
+        stream.seed(self.data_service.fetch_bars_before(start, WARMUP_BARS).indicator_inputs())
+        total_bars = 0
+        for bars in self.iter_bars(start, end):
+            values = stream.update_many(bars.high.astype(np.float64), bars.low.astype(np.float64),
+                                        bars.close.astype(np.float64))
+            total_bars += len(bars)
+            logger.debug("Exported {} {} bars so far", total_bars, self.data_service.symbol)
+            yield bars, values
+        logger.info(f"Exported {total_bars} {self.data_service.symbol} bars from {start} to {end}")
+
+    @staticmethod
+    def to_table(bars: BarArrays, values: Dict[str, np.ndarray]) -> 'pa.Table':
+        """Build the export table of a chunk"""
+        import pyarrow as pa
+
+        return pa.table({
+            'timestamp': pa.array(bars.time.astype('datetime64[s]'), type=pa.timestamp('s')),
+            **{name: getattr(bars, name) for name in BarArrays.COLUMNS[1:]},
+            'oscillator': pa.array(values['oscillator'], from_pandas=True),
+            **{name: pa.array(column, type=pa.string() if name == 'color' else None)
+               for name, column in values.items() if name != 'oscillator'}
+        })
+
+    def ndjson(self, start: datetime, end: datetime) -> Iterator[bytes]:
+        """Yield the range as newline-delimited JSON, one object per bar"""
+        for bars, values in self.chunks(start, end):
+            columns: Dict[str, Any] = {
+                'timestamp': np.datetime_as_string(bars.time.astype('datetime64[s]')).tolist(),
+                **{name: getattr(bars, name).tolist() for name in BarArrays.COLUMNS[1:]},
+                'oscillator': [None if np.isnan(value) else value for value in values['oscillator'].tolist()],
+                **{name: column.tolist() for name, column in values.items() if name != 'oscillator'}
+            }
+            keys = list(columns)
+            yield ''.join(
+                json.dumps(dict(zip(keys, row))) + '\n' for row in zip(*columns.values())
+            ).encode()
+
+    def csv(self, start: datetime, end: datetime) -> Iterator[bytes]:
+        """Yield the range as CSV with a header row"""
+        import pyarrow.csv as pa_csv
+
+        header = True
+        for bars, values in self.chunks(start, end):
+            buffer = io.BytesIO()
+            pa_csv.write_csv(self.to_table(bars, values), buffer,
+                             write_options=pa_csv.WriteOptions(include_header=header))
+            header = False
+            yield buffer.getvalue()
+
+    def parquet(self, start: datetime, end: datetime) -> Iterator[bytes]:
+        """Yield the range as a Parquet file with one row group per chunk"""
+        import pyarrow.parquet as pq
+
+        sink = _ChunkSink()
+        writer = None
+        for bars, values in self.chunks(start, end):
+            table = self.to_table(bars, values)
+            if writer is None:
+                writer = pq.ParquetWriter(sink, table.schema, compression='zstd')
+            writer.write_table(table)
+            yield sink.take()
+        if writer is None:
+            writer = pq.ParquetWriter(sink, self.to_table(BarArrays.empty(), self._empty_values()).schema)
+        writer.close()
+        yield sink.take()
+
+    def export(self, export_format: str, start: datetime, end: datetime) -> Iterator[bytes]:
+        """
+        Yield the range encoded in an export format
+
+        Raises:
+            ValueError: If the format is not one of EXPORT_MEDIA_TYPES
+        """
+        if export_format not in EXPORT_MEDIA_TYPES:
+            raise ValueError(f"Unknown export format '{export_format}'. Available: {', '.join(EXPORT_MEDIA_TYPES)}")
+        return getattr(self, export_format)(start, end)
+
+    @staticmethod
+    def _empty_values() -> Dict[str, np.ndarray]:
+        return SatyPhaseOscillatorStream().update_many(np.empty(0), np.empty(0), np.empty(0))
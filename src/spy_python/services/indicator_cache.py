@@ -0,0 +1,119 @@
+"""Indicator Result Cache"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+import numpy as np
+from ..config.logging import get_logger
+
+logger = get_logger()
+
+DEFAULT_MAX_BYTES = int(os.getenv('INDICATOR_CACHE_MAX_MB', '256')) * 1024 * 1024
+
+
+def estimate_size(value: Any) -> int:
+    """Estimate the memory footprint of a cached value in bytes."""
+    if isinstance(value, np.ndarray):
+        # getsizeof already includes the buffer of arrays that own their data
+        return sys.getsizeof(value) if value.flags.owndata else sys.getsizeof(value) + value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class _CacheEntry(NamedTuple):
+    version: Hashable
+    value: Any
+    size: int
+
+
+class IndicatorCache:
+    """
+    LRU cache for indicator results with a memory budget.
+
+    Entries are keyed by (symbol, session date) and stamped with the data
+    version they were computed from. A lookup with a different version
+    invalidates the entry, so a session is recomputed once new or corrected
+    bars land; otherwise entries only leave the cache when the memory budget
+    forces an eviction.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Tuple[str, date], _CacheEntry]' = OrderedDict()
+        self._lock = threading.RLock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, symbol: str, session: date, version: Hashable) -> Optional[Any]:
+        """Return the cached value for a session if it matches version."""
+        key = (symbol, session)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            if entry is not None:
+                self._remove(key)
+                self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def put(self, symbol: str, session: date, version: Hashable, value: Any) -> None:
+        """Store a value computed from the given data version."""
+        key = (symbol, session)
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            logger.warning(f"Not caching {symbol} {session}: {size} bytes exceeds the cache budget")
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _CacheEntry(version, value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                evicted_key, _ = next(iter(self._entries.items()))
+                self._remove(evicted_key)
+                self.evictions += 1
+
+    def invalidate(self, symbol: str, session: date) -> None:
+        """Drop the cached value for a session, if any."""
+        with self._lock:
+            if (symbol, session) in self._entries:
+                self._remove((symbol, session))
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every cached value."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit, miss and eviction counters along with current usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'current_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+    def _remove(self, key: Tuple[str, date]) -> None:
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size
@@ -0,0 +1,251 @@
+"""Bulk Bar Ingestion"""
+import io
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional, Set
+import numpy as np
+from sqlalchemy import text, select, func
+from sqlalchemy.engine import Engine
+from ..models.spy_data import SPYData
+from ..models.bar_arrays import BarArrays
+from ..config.logging import get_logger
+from .bar_cache import ParquetBarCache
+from .rollups import RollupEngine
+from .bar_store import MemmapBarStore, from_epoch_seconds
+from .bar_sources import BarSource
+
+logger = get_logger()
+
+DEFAULT_BATCH_SIZE = 100_000
+
+UNIQUE_INDEX_DDL = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_stock_data_symbol_timestamp "
+    "ON stock_data (symbol, timestamp)"
+)
+
+# On PostgreSQL the unique index also covers the bar columns, for index-only keyset pages
+COVERING_UNIQUE_INDEX_DDL = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS {name} "
+    "ON stock_data (symbol, timestamp) INCLUDE (open, high, low, close, volume)"
+)
+
+# Key and total column counts of the unique index; equal when it includes no columns
+INDEX_COLUMNS_SQL = (
+    "SELECT indnkeyatts, indnatts FROM pg_index "
+    "WHERE indexrelid = to_regclass('ix_stock_data_symbol_timestamp')"
+)
+
+# Separate covering index of earlier versions, superseded by the covering unique index
+LEGACY_INDEX_DDL = "DROP INDEX IF EXISTS ix_stock_data_symbol_timestamp_ohlcv"
+
+STAGING_DDL = (
+    "CREATE TEMP TABLE IF NOT EXISTS stock_data_staging ("
+    "timestamp timestamp NOT NULL, open float8 NOT NULL, high float8 NOT NULL, "
+    "low float8 NOT NULL, close float8 NOT NULL, volume int8 NOT NULL)"
+)
+
+# Bars already present are only rewritten when a value actually changed
+MERGE_SQL = (
+    "INSERT INTO stock_data (symbol, timestamp, open, high, low, close, volume) "
+    "SELECT %s, timestamp, open::numeric, high::numeric, low::numeric, close::numeric, volume "
+    "FROM stock_data_staging "
+    "ON CONFLICT (symbol, timestamp) DO UPDATE SET "
+    "open = EXCLUDED.open, high = EXCLUDED.high, low = EXCLUDED.low, "
+    "close = EXCLUDED.close, volume = EXCLUDED.volume "
+    "WHERE (stock_data.open, stock_data.high, stock_data.low, stock_data.close, stock_data.volume) "
+    "IS DISTINCT FROM (EXCLUDED.open, EXCLUDED.high, EXCLUDED.low, EXCLUDED.close, EXCLUDED.volume)"
+)
+
+
+@dataclass
+class IngestResult:
+    """Outcome of an ingestion run"""
+    rows: int = 0
+    written: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def deduplicate(bars: BarArrays) -> BarArrays:
+    """Sort bars by time, keeping the last of any bars sharing a timestamp."""
+    order = np.argsort(bars.time, kind='stable')
+    times = bars.time[order]
+    keep = np.append(times[1:] != times[:-1], True) if len(times) else np.empty(0, dtype=bool)
+    return BarArrays(**{name: getattr(bars, name)[order][keep] for name in BarArrays.COLUMNS})
+
+
+class BarIngestor:
+    """
+    Loads bars into stock_data in large batches.
+
+    On PostgreSQL with psycopg2 each batch is streamed with a binary COPY
+    into a temporary staging table and merged with
+    INSERT ... ON CONFLICT (symbol, timestamp), so re-running a load updates
+    bars in place instead of duplicating them. Other engines fall back to a
+    Core upsert of the same rows. Each batch is committed on its own.
+    """
+
+    def __init__(self, engine: Engine, symbol: str = 'SPY', batch_size: int = DEFAULT_BATCH_SIZE,
+                 bar_cache: Optional[ParquetBarCache] = None, rollups: Optional[RollupEngine] = None,
+                 bar_store: Optional[MemmapBarStore] = None):
+        """
+        Args:
+            engine: Database engine
+            symbol: Symbol the bars belong to
+            batch_size: Bars per COPY and merge
+            bar_cache: Parquet bar cache whose partitions are invalidated for
+                every day that receives bars
+            rollups: Rollup engine refreshed from the earliest ingested bar
+            bar_store: Memory-mapped store truncated at the earliest ingested
+                bar, so upserted or corrected bars are read from the database
+        """
+        self.engine = engine
+        self.symbol = symbol
+        self.batch_size = batch_size
+        self.bar_cache = bar_cache
+        self.rollups = rollups
+        self.bar_store = bar_store
+
+    def ensure_indexes(self) -> None:
+        """
+        Create the (symbol, timestamp) unique index the merge relies on
+
+        On PostgreSQL it includes the bar columns for keyset history pages.
+        A unique index without them is rebuilt once, and the separate
+        covering index of earlier versions is dropped.
+        """
+        with self.engine.begin() as connection:
+            if self.engine.dialect.name != 'postgresql':
+                connection.execute(text(UNIQUE_INDEX_DDL))
+                return
+            columns = connection.execute(text(INDEX_COLUMNS_SQL)).first()
+            if columns is None:
+                connection.execute(text(COVERING_UNIQUE_INDEX_DDL.format(name='ix_stock_data_symbol_timestamp')))
+            elif columns.indnkeyatts == columns.indnatts:
+                logger.info("Rebuilding ix_stock_data_symbol_timestamp to include the bar columns")
+                connection.execute(text(COVERING_UNIQUE_INDEX_DDL.format(name='ix_stock_data_symbol_timestamp_new')))
+                connection.execute(text("DROP INDEX ix_stock_data_symbol_timestamp"))
+                connection.execute(text(
+                    "ALTER INDEX ix_stock_data_symbol_timestamp_new RENAME TO ix_stock_data_symbol_timestamp"
+                ))
+            connection.execute(text(LEGACY_INDEX_DDL))
+
+    def latest_timestamp(self) -> Optional[datetime]:
+        """Get the timestamp of the symbol's newest stored bar"""
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(func.max(SPYData.timestamp)).where(SPYData.symbol == self.symbol)
+            ).scalar()
+
+    def sync(self, source: BarSource) -> IngestResult:
+        """
+        Ingest only the bars newer than the symbol's newest stored bar
+
+        The cost of a sync grows with the amount of new data rather than with
+        the period the source covers.
+        """
+        latest = self.latest_timestamp()
+        logger.info("Syncing {} bars after {}", self.symbol, latest or 'the beginning')
+        return self.ingest(source.fetch(self.symbol, latest))
+
+    def ingest(self, batches: Iterable[BarArrays]) -> IngestResult:
+        """
+        Ingest bars, re-chunked into batches of batch_size
+
+        Returns:
+            Row counts and timing, including rows per second
+        """
+        try:
+            start_time = datetime.now()
+            self.ensure_indexes()
+            result = IngestResult()
+            touched_days: Set[int] = set()
+            earliest: Optional[int] = None
+
+            for batch in self._rebatch(batches):
+                batch = deduplicate(batch)
+                result.rows += len(batch)
+                result.written += self._merge(batch)
+                touched_days.update(np.unique(batch.time // 86400).tolist())
+                if len(batch) and (earliest is None or batch.time[0] < earliest):
+                    earliest = int(batch.time[0])
+                logger.debug("Merged {} {} bars so far", result.rows, self.symbol)
+
+            if self.bar_cache is not None:
+                for day in touched_days:
+                    self.bar_cache.invalidate(self.symbol, from_epoch_seconds(day * 86400).date())
+            if self.bar_store is not None and earliest is not None:
+                dropped = self.bar_store.truncate(self.symbol, from_epoch_seconds(earliest))
+                if dropped:
+                    logger.info("Dropped {} {} bars from the bar store for re-ingested bars",
+                                dropped, self.symbol)
+            if self.rollups is not None and touched_days:
+                self.rollups.refresh(since=from_epoch_seconds(min(touched_days) * 86400))
+
+            result.seconds = (datetime.now() - start_time).total_seconds()
+            logger.info(
+                "Ingested {} {} bars ({} inserted or changed) in {:.2f} seconds, {:,.0f} rows/sec",
+                result.rows, self.symbol, result.written, result.seconds, result.rows_per_second
+            )
+            return result
+
+        except Exception as e:
+            logger.error("Error ingesting bars: {}", e, exc_info=True)
+            raise
+
+    def _rebatch(self, batches: Iterable[BarArrays]) -> Iterable[BarArrays]:
+        """Regroup incoming bars into batches of batch_size"""
+        pending, pending_rows = [], 0
+        for bars in batches:
+            start = 0
+            while start < len(bars):
+                part = bars.slice(start, start + self.batch_size - pending_rows)
+                pending.append(part)
+                pending_rows += len(part)
+                start += len(part)
+                if pending_rows == self.batch_size:
+                    yield BarArrays.concat(pending)
+                    pending, pending_rows = [], 0
+        if pending_rows:
+            yield BarArrays.concat(pending)
+
+    def _merge(self, bars: BarArrays) -> int:
+        """Write one batch, returning the number of rows inserted or changed"""
+        if self.engine.dialect.name == 'postgresql' and self.engine.dialect.driver == 'psycopg2':
+            return self._copy_merge(bars)
+        return self._core_merge(bars)
+
+    def _copy_merge(self, bars: BarArrays) -> int:
+        """COPY a batch into the staging table and merge it into stock_data"""
+        with self.engine.begin() as connection:
+            with connection.connection.cursor() as cursor:
+                cursor.execute(STAGING_DDL)
+                cursor.execute("TRUNCATE stock_data_staging")
+                cursor.copy_expert(
+                    "COPY stock_data_staging FROM STDIN WITH (FORMAT binary)",
+                    io.BytesIO(bars.to_pgcopy_binary())
+                )
+                cursor.execute(MERGE_SQL, (self.symbol,))
+                return cursor.rowcount
+
+    def _core_merge(self, bars: BarArrays) -> int:
+        """Upsert a batch with SQLAlchemy Core on engines without COPY"""
+        if self.engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        rows = [
+            {'symbol': self.symbol, 'timestamp': from_epoch_seconds(t), 'open': o, 'high': h,
+             'low': l, 'close': c, 'volume': v}
+            for t, o, h, l, c, v in zip(*(getattr(bars, name).tolist() for name in BarArrays.COLUMNS))
+        ]
+        statement = insert(SPYData.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=['symbol', 'timestamp'],
+            set_={name: statement.excluded[name] for name in BarArrays.COLUMNS[1:]}
+        )
+        with self.engine.begin() as connection:
+            return connection.execute(statement, rows).rowcount
@@ -0,0 +1,110 @@
+"""Incrementally Updated State of the Current Session"""
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from ..models.bar_arrays import BarArrays
+from ..indicators.saty_phase_oscillator import SatyPhaseOscillatorStream, COLOR_CODES
+from ..config.logging import get_logger
+
+logger = get_logger()
+
+
+class LiveSession:
+    """
+    Day arrays of a session that is still receiving bars.
+
+    The streaming oscillator is seeded once from the day's bars; after that
+    each new bar costs one streaming update, and a changed last bar is
+    recalculated from the state before it. Overlays, which have no streaming
+    form, are recalculated over the day's bars when anything changes.
+    """
+
+    def __init__(self, day_start: datetime, day: Dict[str, Any], stream: SatyPhaseOscillatorStream,
+                 calculate_overlays: Callable[[BarArrays], Dict[str, np.ndarray]]):
+        """
+        Args:
+            day_start: Midnight of the session
+            day: Day arrays as built by DataService.calculate_indicators
+            stream: Oscillator stream seeded with the day's bars
+            calculate_overlays: Function returning overlay arrays for bars
+        """
+        self.day_start = day_start
+        self.day = day
+        self.stream = stream
+        self.calculate_overlays = calculate_overlays
+        self.lock = threading.Lock()
+        self._color_codes = {stream.colors[name]: code for code, name in enumerate(COLOR_CODES)}
+
+    @property
+    def last_time(self) -> Optional[int]:
+        """Epoch seconds of the last bar, or None before the first bar"""
+        return int(self.day['time'][-1]) if len(self.day['time']) else None
+
+    def advance(self, bars: BarArrays) -> int:
+        """
+        Apply bars fetched from the last known bar onwards
+
+        The first bar may repeat the last known one, with revised values.
+
+        Returns:
+            Number of bars added or revised
+        """
+        if not len(bars):
+            return 0
+        last_time = self.last_time
+        revised = last_time is not None and bars.time[0] == last_time
+        if revised and all(getattr(bars, name)[0] == self.day[name][-1] for name in BarArrays.COLUMNS):
+            bars = bars.slice(1, len(bars))
+            revised = False
+        if last_time is not None:
+            bars = bars.slice(int(np.searchsorted(bars.time, last_time)), len(bars))
+        if not len(bars):
+            return 0
+
+        results: List[Dict[str, Any]] = []
+        for index in range(len(bars)):
+            bar = {'high': bars.high[index], 'low': bars.low[index], 'close': bars.close[index]}
+            if index == 0 and revised:
+                results.append(self.stream.revise(bar))
+            else:
+                results.append(self.stream.update(bar))
+
+        keep = len(self.day['time']) - 1 if revised else len(self.day['time'])
+        day = {
+            name: np.concatenate((self.day[name][:keep], getattr(bars, name)))
+            for name in BarArrays.COLUMNS
+        }
+        day['oscillator'] = np.concatenate(
+            (self.day['oscillator'][:keep], [r['oscillator'] for r in results])
+        )
+        day['compression'] = np.concatenate(
+            (self.day['compression'][:keep], [r['compression'] for r in results])
+        ).astype(bool)
+        day['color'] = np.concatenate(
+            (self.day['color'][:keep], [self._color_codes[r['color']] for r in results])
+        ).astype(self.day['color'].dtype)
+        day['signals'] = {
+            name: np.concatenate((values[:keep], [r[name] for r in results])).astype(bool)
+            for name, values in self.day['signals'].items()
+        }
+        day['overlays'] = (
+            self.calculate_overlays(BarArrays(**{name: day[name] for name in BarArrays.COLUMNS}))
+            if self.day['overlays'] else {}
+        )
+        self.day = day
+        logger.debug("Live session advanced by {} bars (last revised: {})", len(bars), revised)
+        return len(bars)
+
+    def since(self, since: int) -> Dict[str, Any]:
+        """Get the day arrays of bars at or after epoch second since"""
+        return slice_day(self.day, int(np.searchsorted(self.day['time'], since)))
+
+
+def slice_day(day: Dict[str, Any], start: int) -> Dict[str, Any]:
+    """Get day arrays from bar index start onwards"""
+    return {
+        name: ({key: values[start:] for key, values in value.items()}
+               if isinstance(value, dict) else value[start:])
+        for name, value in day.items()
+    }
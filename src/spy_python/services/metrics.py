@@ -0,0 +1,282 @@
+"""Latency Histograms and Prometheus Exposition"""
+import bisect
+import glob
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Endpoint whose request is being handled, attached to stage timings
+current_endpoint: ContextVar[str] = ContextVar('current_endpoint', default='background')
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def bucket_quantile(q: float, bounds: Sequence[float], cumulative: Sequence[float]) -> float:
+    """
+    Estimate a quantile from cumulative bucket counts, like histogram_quantile
+
+    Args:
+        q: Quantile between 0 and 1
+        bounds: Upper bounds of the buckets, the last one +Inf
+        cumulative: Observations at or below each bound
+
+    Returns:
+        The estimate, interpolated linearly within its bucket, or NaN
+        without observations
+    """
+    if not cumulative or not cumulative[-1]:
+        return math.nan
+    rank = q * cumulative[-1]
+    index = bisect.bisect_left(cumulative, rank)
+    if index >= len(bounds) - 1:
+        # Ranks in the +Inf bucket are reported as the largest finite bound
+        return bounds[-2] if len(bounds) > 1 else math.nan
+    lower = bounds[index - 1] if index else 0.0
+    below = cumulative[index - 1] if index else 0
+    in_bucket = cumulative[index] - below
+    return lower + (bounds[index] - lower) * (rank - below) / in_bucket if in_bucket else bounds[index]
+
+
+class Histogram:
+    """
+    Cumulative histogram of observations, one series per label combination.
+
+    Observing costs a binary search and three increments under a lock.
+    Percentiles are estimated from the buckets when queried, as Prometheus
+    does with histogram_quantile (see bucket_quantile).
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """Record one observation for the given label values"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labelvalues: str) -> Iterator[None]:
+        """Observe the duration of the block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labelvalues)
+
+    def reset(self) -> None:
+        """Drop every series"""
+        with self._lock:
+            self._series = {}
+
+    def snapshot(self) -> Dict[Tuple[str, ...], List]:
+        """Copy the bucket counts, sum and count of every series"""
+        with self._lock:
+            return {labels: [list(counts), total, count] for labels, (counts, total, count) in self._series.items()}
+
+    def render(self, series: Optional[Dict[Tuple[str, ...], List]] = None) -> List[str]:
+        """Render the histogram, or merged series of it, in the Prometheus text format"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labelvalues, (counts, total, count) in sorted((series or self.snapshot()).items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Metrics of one process, rendered together for a /metrics scrape.
+
+    Besides histograms it holds callbacks that report counters or gauges
+    kept elsewhere, such as cache statistics, when rendered.
+
+    Pre-forked workers each keep their own metrics. Given a directory, each
+    process writes snapshots of its metrics there as <pid>.json, and a
+    scrape answered by any worker renders the sum over all of them.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._callbacks: List[Tuple[str, str, str, Sequence[str], Callable[[], Dict[Tuple[str, ...], float]]]] = []
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._next_snapshot = 0.0
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Get the histogram of a name, creating it on first use"""
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram(name, documentation, labelnames, buckets)
+            return self._histograms[name]
+
+    def register_callback(self, name: str, documentation: str, metric_type: str, labelnames: Sequence[str],
+                          callback: Callable[[], Dict[Tuple[str, ...], float]]) -> None:
+        """
+        Report values computed at scrape time
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            metric_type: 'counter' or 'gauge'; gauges are summed across processes too
+            labelnames: Label names
+            callback: Function returning values keyed by label values
+        """
+        with self._lock:
+            self._callbacks = [entry for entry in self._callbacks if entry[0] != name]
+            self._callbacks.append((name, documentation, metric_type, tuple(labelnames), callback))
+
+    def reset(self) -> None:
+        """Drop the observations of every histogram, e.g. those a forked worker inherited"""
+        with self._lock:
+            histograms = list(self._histograms.values())
+        for histogram in histograms:
+            histogram.reset()
+
+    def snapshot(self) -> Dict[str, Dict[Tuple[str, ...], object]]:
+        """Current series of every metric, keyed by metric name and label values"""
+        with self._lock:
+            histograms = list(self._histograms.values())
+            callbacks = list(self._callbacks)
+        snapshot = {histogram.name: histogram.snapshot() for histogram in histograms}
+        for name, _, _, _, callback in callbacks:
+            snapshot[name] = dict(callback())
+        return snapshot
+
+    def write_snapshot(self, directory: str, min_interval: float = 0.0) -> bool:
+        """
+        Write this process's snapshot to <directory>/<pid>.json, replacing the last one
+
+        Args:
+            directory: Snapshot directory shared by the worker processes
+            min_interval: Seconds to wait after the last write before writing again
+
+        Returns:
+            Whether a snapshot was written
+        """
+        if time.monotonic() < self._next_snapshot or not self._snapshot_lock.acquire(blocking=False):
+            return False
+        try:
+            self._next_snapshot = time.monotonic() + min_interval
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{os.getpid()}.json")
+            payload = {name: [[list(labels), value] for labels, value in series.items()]
+                       for name, series in self.snapshot().items()}
+            with open(f"{path}.tmp", 'w') as f:
+                json.dump(payload, f)
+            os.replace(f"{path}.tmp", path)
+            return True
+        finally:
+            self._snapshot_lock.release()
+
+    def render(self, directory: Optional[str] = None) -> str:
+        """
+        Render every metric in the Prometheus text format
+
+        Args:
+            directory: Snapshot directory of sibling processes to add in, if any
+        """
+        merged = self.snapshot()
+        if directory:
+            own_path = os.path.join(directory, f"{os.getpid()}.json")
+            for path in glob.glob(os.path.join(directory, '*.json')):
+                if path == own_path:
+                    continue
+                try:
+                    with open(path) as f:
+                        self._merge(merged, json.load(f))
+                except (OSError, ValueError):
+                    continue
+
+        with self._lock:
+            histograms = list(self._histograms.values())
+            callbacks = list(self._callbacks)
+        lines = []
+        for histogram in histograms:
+            lines.extend(histogram.render(merged.get(histogram.name, {})))
+        for name, documentation, metric_type, labelnames, _ in callbacks:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labelvalues, value in sorted(merged.get(name, {}).items()):
+                lines.append(f"{name}{_format_labels(labelnames, labelvalues)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _merge(merged: Dict[str, Dict[Tuple[str, ...], object]], snapshot: Dict[str, list]) -> None:
+        """Add a snapshot read from disk into merged series"""
+        for name, series in snapshot.items():
+            target = merged.setdefault(name, {})
+            for labels, value in series:
+                labels = tuple(labels)
+                current = target.get(labels)
+                if current is None:
+                    target[labels] = value
+                elif isinstance(value, list):
+                    target[labels] = [[a + b for a, b in zip(current[0], value[0])],
+                                      current[1] + value[1], current[2] + value[2]]
+                else:
+                    target[labels] = current + value
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'spy_request_duration_seconds', 'Time to handle a request, by endpoint',
+    ('endpoint', 'method', 'status')
+)
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'spy_stage_duration_seconds',
+    'Time spent in each processing stage: db_query, conversion, indicators, serialization, compression',
+    ('endpoint', 'stage')
+)
+
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    """Observe the duration of a processing stage of the current request"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, current_endpoint.get(), stage)
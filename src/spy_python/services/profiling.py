@@ -0,0 +1,201 @@
+"""On-Demand Request Profiling
+
+A request is profiled with cProfile, written as a .prof file for pstats or
+snakeviz, with a stack sampler, written as collapsed stacks for flamegraph.pl
+or speedscope, or with both. One request per process is profiled at a time;
+requests arriving while another one is profiled run unprofiled. Only the
+newest profile files of a directory are kept.
+"""
+import cProfile
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import FrozenSet, List, Optional
+from ..config.logging import get_logger
+
+logger = get_logger()
+
+# Profilers a request can be run under
+PROFILE_MODES = ('cprofile', 'sample')
+
+# Seconds between stack samples
+DEFAULT_SAMPLE_INTERVAL = 0.001
+
+# Profile files kept in a directory; older ones are deleted as new ones are written
+DEFAULT_MAX_FILES = 200
+
+_active = threading.Lock()
+_sequence = itertools.count(1)
+
+
+def parse_modes(value: Optional[str]) -> FrozenSet[str]:
+    """
+    Parse a comma-separated list of profilers
+
+    '1', 'true' and 'on' select cProfile, 'all' selects every profiler, and
+    unknown names are ignored.
+    """
+    modes = set()
+    for name in (value or '').lower().split(','):
+        name = name.strip()
+        if name in ('1', 'true', 'on'):
+            modes.add('cprofile')
+        elif name == 'all':
+            modes.update(PROFILE_MODES)
+        elif name in PROFILE_MODES:
+            modes.add(name)
+    return frozenset(modes)
+
+
+def prune_profiles(directory: Path, max_files: int = DEFAULT_MAX_FILES) -> int:
+    """
+    Delete all but the newest max_files profile files of a directory
+
+    Returns:
+        Number of files deleted
+    """
+    files = []
+    for pattern in ('profile-*.prof', 'profile-*.collapsed'):
+        for path in directory.glob(pattern):
+            try:
+                files.append((path.stat().st_mtime_ns, path))
+            except FileNotFoundError:
+                # Pruned by another worker sharing the directory
+                pass
+    deleted = 0
+    for _, path in sorted(files)[:max(len(files) - max_files, 0)]:
+        try:
+            path.unlink()
+            deleted += 1
+        except FileNotFoundError:
+            pass
+    return deleted
+
+
+def frame_label(frame) -> str:
+    """Name of a stack frame in collapsed stacks: function (file:first line)"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+
+
+class StackSampler:
+    """
+    Count the stacks of one thread, sampled at a fixed interval from a background thread
+
+    While it runs, the interpreter's thread switch interval is lowered to the
+    sample interval so that the sampler gets the GIL from a busy thread; the
+    default of 5 ms would leave short requests with few or no samples.
+    """
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._switch_interval = None
+
+    def start(self):
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(frame_label(frame))
+                frame = frame.f_back
+            if labels:
+                self.stacks[';'.join(reversed(labels))] += 1
+
+    def write(self, path: Path):
+        """Write the stacks in the collapsed format, one 'root;...;leaf count' line each"""
+        with open(path, 'w') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class RequestProfile:
+    """Profilers running for one request on the current thread"""
+
+    def __init__(self, modes: FrozenSet[str], sample_interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.modes = modes
+        self.profiler = cProfile.Profile() if 'cprofile' in modes else None
+        self.sampler = StackSampler(threading.get_ident(), sample_interval) if 'sample' in modes else None
+        self.started = None
+        self.duration = None
+
+    @classmethod
+    def start(cls, modes: FrozenSet[str], sample_interval: float = DEFAULT_SAMPLE_INTERVAL) -> Optional['RequestProfile']:
+        """
+        Start profiling the current thread
+
+        Returns None if another request is being profiled or a profiler
+        cannot start, e.g. because another profiling tool is active.
+        """
+        if not modes or not _active.acquire(blocking=False):
+            return None
+        profile = cls(modes, sample_interval)
+        try:
+            if profile.profiler is not None:
+                profile.profiler.enable()
+        except Exception as e:
+            _active.release()
+            logger.warning("Could not start profiling: {}", e)
+            return None
+        if profile.sampler is not None:
+            profile.sampler.start()
+        profile.started = time.perf_counter()
+        return profile
+
+    def stop(self):
+        """Stop the profilers; safe to call more than once"""
+        if self.duration is not None:
+            return
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.duration = time.perf_counter() - self.started
+        try:
+            if self.sampler is not None:
+                self.sampler.stop()
+        finally:
+            _active.release()
+
+    def write(self, directory: Path, label: str, max_files: int = DEFAULT_MAX_FILES) -> List[Path]:
+        """
+        Write the profiles to a directory, pruning it to the newest max_files files
+
+        Args:
+            directory: Directory of the files, created if missing
+            label: Describes the request in the file names, e.g. its endpoint
+            max_files: Profile files kept in the directory
+
+        Returns:
+            Paths of the .prof and .collapsed files written
+        """
+        self.stop()
+        directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r'\W+', '_', label).strip('_') or 'root'
+        stem = f"profile-{datetime.now():%Y%m%d-%H%M%S}-{slug}-{os.getpid()}-{next(_sequence)}"
+        paths = []
+        if self.profiler is not None:
+            paths.append(directory / f"{stem}.prof")
+            self.profiler.dump_stats(paths[-1])
+        if self.sampler is not None:
+            paths.append(directory / f"{stem}.collapsed")
+            self.sampler.write(paths[-1])
+        prune_profiles(directory, max(max_files, len(paths)))
+        return paths
@@ -0,0 +1,96 @@
+"""Bar Aggregation and Line Downsampling for Wide Ranges"""
+from typing import Sequence
+import numpy as np
+from ..models.bar_arrays import BarArrays
+
+# Bar resolutions in seconds, from finest to coarsest
+RESOLUTIONS = (60, 300, 900, 1800, 3600, 14400, 86400, 604800)
+
+
+def bucket_starts(times: np.ndarray, step: int) -> np.ndarray:
+    """Indexes of the first bar of each step-second bucket of sorted times."""
+    buckets = times // step
+    return np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1)) if len(times) else np.empty(0, dtype=np.intp)
+
+
+def choose_resolution(times: np.ndarray, points: int, resolutions: Sequence[int] = RESOLUTIONS) -> int:
+    """
+    Pick the finest resolution that fits sorted bar times into points buckets.
+
+    Only buckets holding bars count, so nights, weekends and holidays do not
+    use up the budget.
+    """
+    for step in resolutions:
+        if len(bucket_starts(times, step)) <= points:
+            return step
+    return resolutions[-1]
+
+
+def aggregate_bars(bars: BarArrays, step: int) -> BarArrays:
+    """
+    Aggregate sorted bars into step-second OHLCV bars.
+
+    Each aggregated bar is stamped with the start of its bucket and takes the
+    first open, highest high, lowest low, last close and total volume of the
+    bars in it.
+    """
+    if not len(bars):
+        return BarArrays.empty()
+    starts = bucket_starts(bars.time, step)
+    ends = np.append(starts[1:], len(bars)) - 1
+    return BarArrays(
+        time=bars.time[starts] // step * step,
+        open=bars.open[starts],
+        high=np.maximum.reduceat(bars.high, starts),
+        low=np.minimum.reduceat(bars.low, starts),
+        close=bars.close[ends],
+        volume=np.add.reduceat(bars.volume, starts),
+    )
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Downsample a line with Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last points, splits the rest into threshold - 2
+    buckets and from each keeps the point forming the largest triangle with
+    the point kept from the previous bucket and the mean of the next bucket,
+    which preserves the peaks and troughs a plot needs. Non-finite values are
+    skipped.
+
+    Args:
+        x: Sorted x values
+        y: y values
+        threshold: Number of points to keep
+
+    Returns:
+        Indexes into x and y of the kept points, in order
+    """
+    finite = np.flatnonzero(np.isfinite(y))
+    if threshold >= len(finite):
+        return finite
+    if threshold < 3:
+        return finite[[0, -1]][:max(threshold, 0)]
+
+    xs = x[finite].astype(np.float64)
+    ys = y[finite].astype(np.float64)
+    edges = np.linspace(1, len(finite) - 1, threshold - 1).astype(np.intp)
+
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0] = 0
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_stop = edges[bucket + 2]
+            next_x, next_y = xs[stop:next_stop].mean(), ys[stop:next_stop].mean()
+        else:
+            next_x, next_y = xs[-1], ys[-1]
+        areas = np.abs(
+            (xs[previous] - next_x) * (ys[start:stop] - ys[previous])
+            - (xs[previous] - xs[start:stop]) * (next_y - ys[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    selected[-1] = len(finite) - 1
+    return finite[selected]
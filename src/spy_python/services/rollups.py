@@ -0,0 +1,195 @@
+"""Persisted Multi-Timeframe Bar Rollups"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+import numpy as np
+from sqlalchemy import select, delete, func, insert
+from ..models.bar_arrays import BarArrays
+from ..models.rollup_bar import RollupBar
+from ..models.spy_data import SPYData
+from ..config.logging import get_logger
+from .bar_store import from_epoch_seconds, to_epoch_seconds
+from .resample import aggregate_bars
+from .metrics import timed_stage
+
+logger = get_logger()
+
+# Supported bar intervals and their length in seconds
+INTERVALS = {'1m': 60, '5m': 300, '15m': 900, '1h': 3600, '1d': 86400}
+
+# Intervals persisted in stock_data_rollup; each is a multiple of the one before
+ROLLUP_INTERVALS = ('5m', '15m', '1h', '1d')
+
+# Days of minute bars aggregated per query when rebuilding
+REFRESH_CHUNK_DAYS = 92
+
+
+def interval_seconds(interval: str) -> int:
+    """
+    Length in seconds of a named interval
+
+    Raises:
+        ValueError: If the interval is not supported
+    """
+    try:
+        return INTERVALS[interval]
+    except KeyError:
+        raise ValueError(f"Unknown interval '{interval}'. Available: {', '.join(INTERVALS)}") from None
+
+
+class RollupEngine:
+    """
+    Maintains 5m, 15m, 1h and 1d bars of a symbol in stock_data_rollup.
+
+    Bars are aligned to whole multiples of their interval since the epoch,
+    in the naive local time of stock_data, so a 1d bar is a calendar day.
+    Minute bars are aggregated with a vectorized reduceat, and each coarser
+    interval is aggregated from the one before it. A refresh starts at the
+    last stored bar of each interval, which may have been incomplete, so
+    keeping rollups current costs time proportional to the new minutes.
+    """
+
+    def __init__(self, data_service):
+        """
+        Args:
+            data_service: DataService whose engine and symbol are used
+        """
+        self.data_service = data_service
+        self._table_ready = False
+
+    @property
+    def engine(self):
+        return self.data_service.engine
+
+    @property
+    def symbol(self) -> str:
+        return self.data_service.symbol
+
+    def ensure_table(self) -> None:
+        """Create the rollup table if it does not exist"""
+        if not self._table_ready:
+            RollupBar.__table__.create(self.engine, checkfirst=True)
+            self._table_ready = True
+
+    def last_bar_start(self, interval: str) -> Optional[datetime]:
+        """Start of the newest stored bar of an interval"""
+        self.ensure_table()
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(func.max(RollupBar.timestamp)).where(
+                    RollupBar.symbol == self.symbol,
+                    RollupBar.interval == interval_seconds(interval)
+                )
+            ).scalar()
+
+    def refresh(self, since: Optional[datetime] = None,
+                intervals: Iterable[str] = ROLLUP_INTERVALS) -> Dict[str, int]:
+        """
+        Bring rollups up to date with stock_data
+
+        Args:
+            since: Also rebuild bars from this time on, e.g. after minute bars
+                before the last rollup were corrected
+            intervals: Intervals to refresh
+
+        Returns:
+            Number of bars written per interval
+        """
+        try:
+            start_time = datetime.now()
+            self.ensure_table()
+            intervals = sorted(intervals, key=interval_seconds)
+
+            starts = {}
+            for interval in intervals:
+                start = self.last_bar_start(interval)
+                if since is not None:
+                    start = min(start, since) if start is not None else since
+                starts[interval] = start
+            if any(start is None for start in starts.values()):
+                with self.engine.connect() as connection:
+                    first = connection.execute(
+                        select(func.min(SPYData.timestamp)).where(SPYData.symbol == self.symbol)
+                    ).scalar()
+                if first is None:
+                    return {interval: 0 for interval in intervals}
+                starts = {interval: start or first for interval, start in starts.items()}
+
+            # Align every start to its bar boundary, and read from the earliest
+            starts = {
+                interval: from_epoch_seconds(
+                    to_epoch_seconds(start) // interval_seconds(interval) * interval_seconds(interval)
+                )
+                for interval, start in starts.items()
+            }
+            written = {interval: 0 for interval in intervals}
+            chunk_start = min(starts.values()).replace(hour=0, minute=0, second=0, microsecond=0)
+            end = datetime.now() + timedelta(days=1)
+            while chunk_start < end:
+                chunk_end = chunk_start + timedelta(days=REFRESH_CHUNK_DAYS)
+                bars = self.data_service.fetch_bar_arrays(chunk_start, chunk_end)
+                for interval in intervals:
+                    bars = aggregate_bars(bars, interval_seconds(interval))
+                    first_time = max(to_epoch_seconds(starts[interval]), to_epoch_seconds(chunk_start))
+                    fresh = bars.slice(int(np.searchsorted(bars.time, first_time)), len(bars))
+                    self._replace(interval, from_epoch_seconds(first_time), fresh)
+                    written[interval] += len(fresh)
+                chunk_start = chunk_end
+
+            duration = (datetime.now() - start_time).total_seconds()
+            logger.info("Refreshed {} rollups {} in {:.2f} seconds", self.symbol, written, duration)
+            return written
+
+        except Exception as e:
+            logger.error(f"Error refreshing rollups: {str(e)}", exc_info=True)
+            raise
+
+    def _replace(self, interval: str, start: datetime, bars: BarArrays) -> None:
+        """Replace the stored bars of an interval from start on with bars"""
+        if not len(bars):
+            return
+        seconds = interval_seconds(interval)
+        with self.engine.begin() as connection:
+            connection.execute(delete(RollupBar).where(
+                RollupBar.symbol == self.symbol,
+                RollupBar.interval == seconds,
+                RollupBar.timestamp >= start,
+                RollupBar.timestamp <= from_epoch_seconds(bars.time[-1])
+            ))
+            connection.execute(insert(RollupBar), [
+                {'symbol': self.symbol, 'interval': seconds, 'timestamp': from_epoch_seconds(t),
+                 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+                for t, o, h, l, c, v in zip(*(getattr(bars, name).tolist() for name in BarArrays.COLUMNS))
+            ])
+
+    def read(self, interval: str, start: datetime, end: datetime) -> BarArrays:
+        """Read the stored bars of an interval starting in [start, end)"""
+        self.ensure_table()
+        query = select(
+            RollupBar.timestamp, RollupBar.open, RollupBar.high,
+            RollupBar.low, RollupBar.close, RollupBar.volume
+        ).where(
+            RollupBar.symbol == self.symbol,
+            RollupBar.interval == interval_seconds(interval),
+            RollupBar.timestamp >= start,
+            RollupBar.timestamp < end
+        ).order_by(RollupBar.timestamp)
+        with timed_stage('db_query'), self.engine.connect() as connection:
+            rows = connection.execute(query).all()
+        with timed_stage('conversion'):
+            return BarArrays.from_rows(rows)
+
+    def read_before(self, interval: str, before: datetime, limit: int) -> BarArrays:
+        """Read the newest limit stored bars of an interval starting before a time, in time order"""
+        self.ensure_table()
+        query = select(
+            RollupBar.timestamp, RollupBar.open, RollupBar.high,
+            RollupBar.low, RollupBar.close, RollupBar.volume
+        ).where(
+            RollupBar.symbol == self.symbol,
+            RollupBar.interval == interval_seconds(interval),
+            RollupBar.timestamp < before
+        ).order_by(RollupBar.timestamp.desc()).limit(limit)
+        with timed_stage('db_query'), self.engine.connect() as connection:
+            rows = connection.execute(query).all()
+        with timed_stage('conversion'):
+            return BarArrays.from_rows(rows[::-1])
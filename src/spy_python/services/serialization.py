@@ -0,0 +1,169 @@
+"""Response Serialization for Bar and Indicator Data"""
+import json
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+BAR_COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+# Media type of Arrow IPC stream responses
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+
+# Media type of packed column responses (see packed_payload)
+PACKED_MEDIA_TYPE = 'application/vnd.spy-python.bars'
+
+# Decimal places kept for indicator values in columnar payloads; the chart
+# displays two, so the extra digits only cost bytes
+INDICATOR_DECIMALS = 4
+
+
+def float_list(values: np.ndarray, decimals: Optional[int] = None) -> List[Optional[float]]:
+    """Convert a float array to a JSON-safe list, mapping NaN and inf to None."""
+    if decimals is not None:
+        values = np.round(values, decimals)
+    invalid = ~np.isfinite(values)
+    if not invalid.any():
+        return values.tolist()
+    converted = values.astype(object)
+    converted[invalid] = None
+    return converted.tolist()
+
+
+def columnar_payload(day: Optional[Dict[str, Any]], palette: List[str]) -> Dict[str, Any]:
+    """
+    Build a columnar response from day arrays.
+
+    Fields are parallel arrays indexed by bar, with indicator values rounded
+    to INDICATOR_DECIMALS. The oscillator color is a small integer code into
+    'palette', and compression and zone-transition signals are sparse lists
+    of the bar indexes where they are set.
+    """
+    if day is None:
+        return {
+            **{column: [] for column in BAR_COLUMNS},
+            'oscillator': [], 'color': [], 'palette': palette,
+            'compression': [], 'signals': {}, 'overlays': {}
+        }
+    return {
+        **{column: day[column].tolist() for column in BAR_COLUMNS},
+        'oscillator': float_list(day['oscillator'], INDICATOR_DECIMALS),
+        'color': day['color'].tolist(),
+        'palette': palette,
+        'compression': np.flatnonzero(day['compression']).tolist(),
+        'signals': {name: np.flatnonzero(values).tolist() for name, values in day['signals'].items()},
+        'overlays': {
+            name: float_list(values, INDICATOR_DECIMALS) for name, values in day['overlays'].items()
+        }
+    }
+
+
+def row_payload(day: Dict[str, Any], palette: List[str]) -> List[Dict[str, Any]]:
+    """Build the per-bar list of dictionaries from day arrays."""
+    columns = {column: day[column].tolist() for column in BAR_COLUMNS}
+    columns['oscillator'] = float_list(day['oscillator'])
+    columns['compression'] = day['compression'].tolist()
+    columns['color'] = np.asarray(palette)[day['color']].tolist()
+    for name, values in day['signals'].items():
+        columns[name] = values.tolist()
+    for name, values in day['overlays'].items():
+        columns[name] = float_list(values)
+
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
+def range_payload(range_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the response for a downsampled range (see DataService.get_range)."""
+    bars = range_data['bars']
+    return {
+        'resolution': range_data['resolution'],
+        **{column: getattr(bars, column).tolist() for column in BAR_COLUMNS},
+        'oscillator': {
+            'time': range_data['oscillator_time'].tolist(),
+            'value': float_list(range_data['oscillator'], INDICATOR_DECIMALS),
+        }
+    }
+
+
+def _dense_columns(day: Optional[Dict[str, Any]]) -> List[Tuple[str, np.ndarray]]:
+    """Per-bar columns of day arrays, overlays prefixed with 'overlays.'"""
+    if day is None:
+        return [(column, np.empty(0)) for column in (*BAR_COLUMNS, 'oscillator', 'color')]
+    return [
+        *((column, day[column]) for column in BAR_COLUMNS),
+        ('oscillator', day['oscillator']),
+        ('color', day['color']),
+        *((f"overlays.{name}", values) for name, values in day['overlays'].items())
+    ]
+
+
+def _sparse_fields(day: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compression and signal flags as lists of the bar indexes where they are set"""
+    if day is None:
+        return {'compression': [], 'signals': {}}
+    return {
+        'compression': np.flatnonzero(day['compression']).tolist(),
+        'signals': {name: np.flatnonzero(values).tolist() for name, values in day['signals'].items()}
+    }
+
+
+def packed_payload(day: Optional[Dict[str, Any]], palette: List[str], **fields: Any) -> bytes:
+    """
+    Encode day arrays as packed little-endian column buffers.
+
+    The payload is a uint32 header length, a JSON header and the column
+    buffers. The header is padded so every buffer starts on an 8-byte
+    boundary, letting browsers wrap them in typed arrays without parsing or
+    copying. It lists each column's name, dtype and byte offset from the end
+    of the header, along with the row count, the palette, the sparse
+    compression and signal indexes of columnar_payload and any extra fields.
+    Columns are float64, with NaN for missing oscillator values, except the
+    uint8 color codes; times and volumes are exact as float64.
+    """
+    columns, buffers, offset = [], [], 0
+    for name, values in _dense_columns(day):
+        dtype = '<u1' if name == 'color' else '<f8'
+        buffer = np.ascontiguousarray(values, dtype=dtype).tobytes()
+        columns.append({'name': name, 'dtype': 'uint8' if name == 'color' else 'float64', 'offset': offset})
+        buffers.append(buffer + bytes(-len(buffer) % 8))
+        offset += len(buffers[-1])
+
+    header = json.dumps({
+        'rows': len(day['time']) if day is not None else 0,
+        'columns': columns,
+        'palette': palette,
+        **_sparse_fields(day),
+        **fields
+    }).encode()
+    header += b' ' * (-(len(header) + 4) % 8)
+    return struct.pack('<I', len(header)) + header + b''.join(buffers)
+
+
+def arrow_payload(day: Optional[Dict[str, Any]], palette: List[str], **fields: Any) -> bytes:
+    """
+    Encode day arrays as an Arrow IPC stream with one record batch.
+
+    Bar columns keep their int64 and float64 types, missing oscillator values
+    are nulls, and compression and signals are boolean columns. The palette
+    and any extra fields are JSON values in the schema metadata.
+    """
+    import pyarrow as pa
+
+    arrays = {
+        name: pa.array(values, type=pa.uint8()) if name == 'color' else pa.array(values, from_pandas=True)
+        for name, values in _dense_columns(day)
+    }
+    if day is not None:
+        arrays['compression'] = pa.array(day['compression'], type=pa.bool_())
+        for name, values in day['signals'].items():
+            arrays[name] = pa.array(values, type=pa.bool_())
+    else:
+        arrays['time'] = pa.array([], type=pa.int64())
+        arrays['volume'] = pa.array([], type=pa.int64())
+
+    metadata = {'palette': json.dumps(palette), **{key: json.dumps(value) for key, value in fields.items()}}
+    batch = pa.RecordBatch.from_pydict(arrays, metadata=metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,79 @@
+"""Coalescing of Concurrent Identical Calls"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+from ..config.logging import get_logger
+
+logger = get_logger()
+
+
+class _Call:
+    """A call in flight, whose result every waiting caller receives"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time.
+
+    Callers that ask for a key while a call for it is in flight wait for that
+    call and receive its result, or its exception, instead of repeating the
+    work. Once the call finishes the key is forgotten, so later callers start
+    a fresh call; caching results is left to the caller.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """
+        Call function, or wait for the call already running for key
+
+        Returns:
+            The result of the call made for key
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            if call.waiters:
+                logger.debug("Coalesced {} concurrent requests for {}", call.waiters, key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return call and coalesced request counters"""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'calls': self.calls,
+                'coalesced': self.coalesced
+            }
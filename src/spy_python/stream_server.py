@@ -0,0 +1,197 @@
+"""Server-Sent Events Stream Server
+
+Serves /api/stream from a single asyncio event loop in its own process. An
+open stream costs a coroutine and a small queue rather than a web worker
+thread, so subscribers cannot starve /api/data, and each symbol is polled by
+one shared feed however many workers and subscribers there are. The
+production server starts it next to the gunicorn workers, which redirect
+/api/stream here (see config/server.py); to run it on its own:
+
+    python -m spy_python.stream_server --port 8001
+
+Being on another port, it is another origin to the pages of the web app, so
+it answers their cross-origin requests. Only the web app's own origin, on
+the same host at PORT, is allowed, or the origins in STREAM_ALLOWED_ORIGINS
+when it is set; other browser pages are refused.
+"""
+import argparse
+import asyncio
+import os
+import queue
+from typing import Dict, FrozenSet, Optional
+from urllib.parse import parse_qs, urlsplit
+from .config.logging import get_logger
+from .services.broadcaster import AsyncSubscriber
+from .web_app import STREAM_KEEPALIVE_SECONDS, get_broadcaster, get_data_service
+
+logger = get_logger()
+
+# Seconds a client has to send its request line and headers
+REQUEST_TIMEOUT = 10
+
+# Request headers read before the request is rejected
+MAX_REQUEST_HEADERS = 100
+
+# Port of the web app whose pages open the streams
+WEB_PORT = int(os.getenv('PORT', '8000'))
+
+# Comma-separated origins allowed to open streams, e.g. https://charts.example.com;
+# by default only the web app on this host, at WEB_PORT
+ALLOWED_ORIGINS = frozenset(
+    origin.strip().rstrip('/') for origin in os.getenv('STREAM_ALLOWED_ORIGINS', '').split(',') if origin.strip()
+)
+
+STREAM_HEADERS = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/event-stream\r\n"
+    b"Cache-Control: no-cache\r\n"
+    b"X-Accel-Buffering: no\r\n"
+    b"Vary: Origin\r\n"
+    b"Connection: close\r\n"
+)
+
+
+def error_response(status: str) -> bytes:
+    """Encode a plain-text error response"""
+    body = status.encode()
+    return (f"HTTP/1.1 {status}\r\nContent-Type: text/plain\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode() + body
+
+
+def stream_headers(origin: Optional[str]) -> bytes:
+    """Encode the response headers of a stream, allowing the requesting origin if any"""
+    if origin is None:
+        return STREAM_HEADERS + b"\r\n"
+    return STREAM_HEADERS + f"Access-Control-Allow-Origin: {origin}\r\n\r\n".encode('latin-1')
+
+
+async def read_request(reader: asyncio.StreamReader) -> tuple:
+    """Read a request line and headers; returns the method, target and headers keyed in lower case"""
+    request_line = await reader.readline()
+    headers: Dict[str, str] = {}
+    for _ in range(MAX_REQUEST_HEADERS):
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise ValueError("Too many request headers")
+    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+    return method, target, headers
+
+
+class StreamServer:
+    """Serves the bar streams of every symbol to any number of subscribers"""
+
+    def __init__(self, host: str = 'localhost', port: int = 8001,
+                 allowed_origins: FrozenSet[str] = ALLOWED_ORIGINS, web_port: int = WEB_PORT):
+        """
+        Args:
+            host: Interface to listen on
+            port: Port to listen on
+            allowed_origins: Origins allowed to open streams; if empty, the
+                web app's origin on the requested host at web_port
+            web_port: Port of the web app
+        """
+        self.host = host
+        self.port = port
+        self.allowed_origins = allowed_origins
+        self.web_port = web_port
+        self.connections = 0
+
+    def allows_origin(self, origin: str, host: Optional[str]) -> bool:
+        """Check whether pages of an origin may open streams requested of a host"""
+        # The origin is echoed in a response header, so it must not be able to end it
+        if not origin.isprintable():
+            return False
+        if self.allowed_origins:
+            return origin.rstrip('/') in self.allowed_origins
+        try:
+            page = urlsplit(origin)
+            page_port = page.port or {'http': 80, 'https': 443}.get(page.scheme)
+        except ValueError:
+            return False
+        return (host is not None and page.hostname is not None
+                and page.hostname == urlsplit(f"//{host}").hostname and page_port == self.web_port)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one connection: a single GET of /api/stream"""
+        try:
+            try:
+                method, target, headers = await asyncio.wait_for(read_request(reader), REQUEST_TIMEOUT)
+            except (asyncio.TimeoutError, ValueError, UnicodeDecodeError):
+                writer.write(error_response('400 Bad Request'))
+                return
+            url = urlsplit(target)
+            if url.path != '/api/stream':
+                writer.write(error_response('404 Not Found'))
+                return
+            if method != 'GET':
+                writer.write(error_response('405 Method Not Allowed'))
+                return
+            origin = headers.get('origin')
+            if origin is not None and not self.allows_origin(origin, headers.get('host')):
+                logger.debug("Refused a stream for origin {}", origin)
+                writer.write(error_response('403 Forbidden'))
+                return
+            symbol = parse_qs(url.query).get('symbol', [None])[0] or get_data_service().symbol
+            await self.stream(symbol, writer, origin)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            logger.error(f"Error serving stream: {str(e)}", exc_info=True)
+        finally:
+            writer.close()
+
+    async def stream(self, symbol: str, writer: asyncio.StreamWriter, origin: Optional[str] = None) -> None:
+        """Send a symbol's bar events until the client leaves or falls behind"""
+        loop = asyncio.get_running_loop()
+        # Creating a broadcaster may load data, so keep it off the event loop
+        broadcaster = await loop.run_in_executor(None, get_broadcaster, symbol)
+        subscriber = broadcaster.subscribe(AsyncSubscriber(loop))
+        self.connections += 1
+        logger.debug("Stream opened for {}, {} open", symbol, self.connections)
+        try:
+            writer.write(stream_headers(origin) + b"retry: 5000\n\n")
+            await writer.drain()
+            while True:
+                try:
+                    message = await subscriber.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    message = b": keep-alive\n\n"
+                if message is None:
+                    break
+                writer.write(message)
+                await writer.drain()
+        finally:
+            broadcaster.unsubscribe(subscriber)
+            self.connections -= 1
+            logger.debug("Stream closed for {}, {} open", symbol, self.connections)
+
+    async def serve(self) -> None:
+        """Accept connections until cancelled"""
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        logger.info(f"Serving event streams on {self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    """Run the stream server"""
+    parser = argparse.ArgumentParser(description="Serve /api/stream Server-Sent Events")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8001)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(StreamServer(args.host, args.port).serve())
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        logger.error(f"Stream server error: {str(e)}", exc_info=True)
+        raise
+
+
+if __name__ == "__main__":
+    main()
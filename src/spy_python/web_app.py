@@ -1,13 +1,318 @@
 """Web Application for SPY Data Visualization"""
-from flask import Flask, render_template, request, jsonify
+import gzip
+import hashlib
+import hmac
+import os
+import queue
+import random
+import threading
+import time
+from flask import Flask, Response, g, redirect, render_template, request, jsonify, stream_with_context
 from datetime import datetime, timedelta
+from typing import Optional
 from .services.data_service import DataService
-from .config.logging import get_logger
+from .services.bar_sources import FileBarSource
+from .services.broadcaster import Broadcaster, DatabaseFeed, ReplayFeed
+from .services.export import BarExporter, EXPORT_MEDIA_TYPES
+from .services.rollups import INTERVALS
+from .services.bar_store import from_epoch_seconds
+from .services.metrics import REGISTRY, REQUEST_SECONDS, current_endpoint, timed_stage
+from .services.profiling import RequestProfile, parse_modes
+from .models.bar_arrays import BarArrays
+from .services.serialization import (
+    columnar_payload, row_payload, range_payload, arrow_payload, packed_payload,
+    ARROW_MEDIA_TYPE, PACKED_MEDIA_TYPE
+)
+from .config.logging import SPYLogger, get_logger
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 logger = get_logger()
 
 app = Flask(__name__)
-data_service = DataService()
+data_service_lock = threading.Lock()
+
+# Point budget bounds for /api/range
+DEFAULT_RANGE_POINTS = 1000
+MAX_RANGE_POINTS = 10000
+
+# Page size bounds for /api/bars
+DEFAULT_PAGE_BARS = 1000
+MAX_PAGE_BARS = 5000
+
+# Cache-Control of responses whose data is not expected to change, e.g. final sessions
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Cache-Control of responses that may change; clients revalidate with If-None-Match
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# Formats selected by the Accept header when no format parameter is given
+MEDIA_TYPE_FORMATS = {ARROW_MEDIA_TYPE: 'arrow', PACKED_MEDIA_TYPE: 'packed'}
+
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = 1024
+
+# Compression levels, favouring encode speed for per-request compression
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Media types worth compressing; Arrow and packed columns shrink well too
+COMPRESSIBLE_MEDIA_TYPES = ('application/json', ARROW_MEDIA_TYPE, PACKED_MEDIA_TYPE)
+
+# Seconds between keep-alive comments on idle event streams
+STREAM_KEEPALIVE_SECONDS = 15
+
+# Requests slower than this are written to the performance log
+SLOW_REQUEST_SECONDS = float(os.getenv('SLOW_REQUEST_SECONDS', '1.0'))
+
+# Content type of the Prometheus text exposition format
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds between metric snapshots written for the other workers' scrapes
+METRICS_SNAPSHOT_SECONDS = 1.0
+
+# Share of requests profiled at random, and the profilers they run under
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_SAMPLE_MODES = parse_modes(os.getenv('PROFILE_SAMPLE_MODES', 'sample'))
+
+# Seconds between stack samples of profiled requests
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.001'))
+
+# Requests must send it in X-Profile-Token to be profiled on demand; unset disables on-demand profiling
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN')
+
+# Profile files kept in the performance log directory
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '200'))
+
+broadcasters = {}
+broadcasters_lock = threading.Lock()
+
+def get_data_service() -> DataService:
+    """
+    Get the app's DataService, creating it on first use
+
+    It is kept as the module attribute data_service, which can also be
+    assigned beforehand to serve another instance.
+    """
+    service = globals().get('data_service')
+    if service is None:
+        with data_service_lock:
+            service = globals().get('data_service')
+            if service is None:
+                service = globals()['data_service'] = DataService()
+    return service
+
+def __getattr__(name: str):
+    """Resolve `data_service` on first access"""
+    if name == 'data_service':
+        return get_data_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_broadcaster(symbol: str) -> Broadcaster:
+    """
+    Get the broadcaster of a symbol, creating it on first use
+
+    Bars come from the database unless STREAM_REPLAY_FILE names a CSV or
+    Parquet file to replay, one bar every STREAM_REPLAY_INTERVAL seconds.
+    """
+    data_service = get_data_service()
+    with broadcasters_lock:
+        if symbol not in broadcasters:
+            service = data_service if symbol == data_service.symbol else DataService(symbol=symbol)
+            replay_file = os.getenv('STREAM_REPLAY_FILE')
+            if replay_file:
+                bars = BarArrays.concat(FileBarSource(replay_file).fetch(symbol))
+                feed = ReplayFeed(service, bars, interval=float(os.getenv('STREAM_REPLAY_INTERVAL', '1.0')))
+            else:
+                feed = DatabaseFeed(service)
+            broadcasters[symbol] = Broadcaster(symbol, feed, service.palette)
+        return broadcasters[symbol]
+
+def stream_server_url() -> Optional[str]:
+    """
+    URL of the stream server that /api/stream redirects to, if one is configured
+
+    STREAM_URL gives it in full, e.g. when a proxy routes to it; otherwise a
+    STREAM_PORT other than 0 puts it on that port of the host that was asked.
+    Read per request, as the production server sets it after import.
+    """
+    url = os.getenv('STREAM_URL')
+    if url:
+        return url
+    port = int(os.getenv('STREAM_PORT') or 0)
+    if not port:
+        return None
+    host = request.host
+    if ':' in host and not host.endswith(']'):
+        host = host.rsplit(':', 1)[0]
+    return f"{request.scheme}://{host}:{port}/api/stream"
+
+def compute_etag(*parts) -> str:
+    """Build a strong ETag from the values that determine a response"""
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+def negotiate_format(default: str) -> str:
+    """Get the response format from the format parameter, else from the Accept header"""
+    response_format = request.args.get('format')
+    if response_format:
+        return response_format
+    best = request.accept_mimetypes.best_match(['application/json', *MEDIA_TYPE_FORMATS])
+    return MEDIA_TYPE_FORMATS.get(best, default)
+
+def negotiate_encoding() -> Optional[str]:
+    """Get the content encoding to compress with, preferring brotli when installed"""
+    if brotli is not None and request.accept_encodings['br']:
+        return 'br'
+    if request.accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+def not_modified(etag: str, cache_control: str):
+    """Return 304 Not Modified if the request's If-None-Match matches etag, else None"""
+    encoded_etag = f"{etag}-{negotiate_encoding()}"
+    if request.if_none_match.contains(encoded_etag):
+        etag = encoded_etag
+    elif not request.if_none_match.contains(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
+
+def with_validators(response, etag: str, cache_control: str):
+    """Add an ETag and Cache-Control to a response, or to a JSON body"""
+    if not isinstance(response, Response):
+        response = jsonify(response)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+def day_response(day, response_format: str, **fields):
+    """Encode day arrays in a columnar format, with extra top-level fields"""
+    data_service = get_data_service()
+    with timed_stage('serialization'):
+        if response_format == 'arrow':
+            response = Response(arrow_payload(day, data_service.palette, **fields), mimetype=ARROW_MEDIA_TYPE)
+        elif response_format == 'packed':
+            response = Response(packed_payload(day, data_service.palette, **fields), mimetype=PACKED_MEDIA_TYPE)
+        else:
+            response = jsonify({'data': columnar_payload(day, data_service.palette), **fields})
+    response.vary.add('Accept')
+    return response
+
+def cache_counters():
+    """Indicator cache and request coalescing counters, keyed by event"""
+    data_service = get_data_service()
+    stats = data_service.get_cache_stats()
+    return {
+        ('indicator_cache_hit',): stats['hits'],
+        ('indicator_cache_miss',): stats['misses'],
+        ('indicator_cache_eviction',): stats['evictions'],
+        ('indicator_cache_invalidation',): stats['invalidations'],
+        ('single_flight_call',): stats['single_flight']['calls'],
+        ('single_flight_coalesced',): stats['single_flight']['coalesced'],
+    }
+
+REGISTRY.register_callback('spy_cache_events_total', 'Indicator cache and request coalescing events',
+                           'counter', ('event',), cache_counters)
+
+@app.before_request
+def start_request_timer():
+    """Note when the request started and label its stage timings with the endpoint"""
+    g.request_started = time.perf_counter()
+    current_endpoint.set(request.url_rule.rule if request.url_rule else 'unmatched')
+
+@app.before_request
+def start_profile():
+    """
+    Profile the request if asked to, or if it is picked at random
+
+    The profile parameter or X-Profile header names the profilers: cprofile,
+    sample or all. They are only honoured with PROFILE_TOKEN in the
+    X-Profile-Token header. Streamed bodies are generated after profiling ends.
+    """
+    modes = parse_modes(request.args.get('profile') or request.headers.get('X-Profile'))
+    if modes and not (PROFILE_TOKEN and hmac.compare_digest(request.headers.get('X-Profile-Token', ''), PROFILE_TOKEN)):
+        modes = frozenset()
+    if not modes and PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        modes = PROFILE_SAMPLE_MODES
+    if modes:
+        g.profile = RequestProfile.start(modes, PROFILE_SAMPLE_INTERVAL)
+
+# Registered first so that it runs last and the profile includes compression
+@app.after_request
+def finish_profile(response):
+    """Write the request's profile to the performance log directory and name the files in X-Profile-Files"""
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+    try:
+        paths = profile.write(SPYLogger.ensure_configured().performance_dir,
+                              f"{request.method} {current_endpoint.get()}", PROFILE_MAX_FILES)
+        response.headers['X-Profile-Files'] = ', '.join(path.name for path in paths)
+        logger.info("Profiled {} {} in {:.1f} ms: {}", request.method, request.full_path,
+                    profile.duration * 1000, ', '.join(str(path) for path in paths))
+    except Exception as e:
+        logger.error(f"Error writing request profile: {str(e)}", exc_info=True)
+    return response
+
+@app.teardown_request
+def stop_profile(exception=None):
+    """Stop the profilers of a request that ended without a response"""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.stop()
+
+# Registered before compress_response so that it runs after it and the total includes compression
+@app.after_request
+def observe_request(response):
+    """Record the request duration, and write slow requests to the performance log"""
+    duration = time.perf_counter() - g.request_started
+    endpoint = current_endpoint.get()
+    REQUEST_SECONDS.observe(duration, endpoint, request.method, str(response.status_code))
+    metrics_dir = os.getenv('METRICS_DIR')
+    if metrics_dir:
+        REGISTRY.write_snapshot(metrics_dir, METRICS_SNAPSHOT_SECONDS)
+    if duration >= SLOW_REQUEST_SECONDS:
+        end_time = datetime.now()
+        SPYLogger.log_performance(f"{request.method} {endpoint}", end_time - timedelta(seconds=duration), end_time, {
+            'query': request.query_string.decode(),
+            'status': response.status_code,
+            'bytes': response.content_length
+        })
+    return response
+
+@app.after_request
+def compress_response(response):
+    """
+    Compress JSON and column responses with brotli or gzip
+
+    The ETag of a compressed response gets the encoding as a suffix, so the
+    variants of a resource never share a strong validator.
+    """
+    if (response.status_code != 200 or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MEDIA_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    body = response.get_data()
+    if encoding is None or len(body) < COMPRESS_MIN_BYTES:
+        return response
+
+    with timed_stage('compression'):
+        if encoding == 'br':
+            response.set_data(brotli.compress(body, quality=BROTLI_QUALITY))
+        else:
+            response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
 
 @app.route('/')
 def index():
@@ -18,62 +323,323 @@ def index():
 @app.route('/api/latest-date')
 def get_latest_date():
     """Get the latest available date from the database"""
+    data_service = get_data_service()
     try:
         logger.info("Getting latest available date")
-        latest_date, _ = data_service.get_latest_data_info()
+        latest_date = data_service.get_latest_date()
         if not latest_date:
             logger.warning("No data available in database")
             return jsonify({'error': 'No data available'}), 404
             
-        logger.info(f"Latest date: {latest_date}")
-        return jsonify({'date': latest_date.isoformat()})
+        etag = compute_etag(data_service.symbol, latest_date)
+        cached = not_modified(etag, REVALIDATE_CACHE_CONTROL)
+        if cached is not None:
+            return cached
+
+        logger.info("Latest date: {}", latest_date)
+        return with_validators({'date': latest_date.isoformat()}, etag, REVALIDATE_CACHE_CONTROL)
     except Exception as e:
         logger.error(f"Error getting latest date: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/metrics')
+def metrics():
+    """
+    Expose latency histograms and cache counters in the Prometheus text format
+
+    spy_request_duration_seconds times whole requests by endpoint, method and
+    status; spy_stage_duration_seconds times db_query, conversion,
+    indicators, serialization and compression by endpoint. With METRICS_DIR
+    set, as the production server does, the values are summed over all
+    workers from their snapshots, which lag by up to METRICS_SNAPSHOT_SECONDS.
+    """
+    return Response(REGISTRY.render(os.getenv('METRICS_DIR')), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/api/cache-stats')
+def get_cache_stats():
+    """Get indicator cache hit, miss and eviction counters and coalesced request counts"""
+    return jsonify(get_data_service().get_cache_stats())
+
 @app.route('/api/data')
 def get_data():
-    """Get SPY data for the chart"""
+    """
+    Get SPY data for the chart
+
+    Query parameters:
+        date: ISO date of the session, defaults to the latest available
+        format: 'rows' (default) for one object per bar, 'columnar' for
+            parallel arrays per field, 'arrow' for an Arrow IPC stream or
+            'packed' for packed binary columns (see
+            serialization.packed_payload). Without it the Accept header
+            selects the format, application/json meaning rows
+        since: Epoch seconds of the last bar the client holds; only that bar,
+            which may have been revised, and newer bars are returned
+        interval: Bar interval, one of 1m (default), 5m, 15m, 1h or 1d
+
+    Responses are brotli or gzip compressed per Accept-Encoding. They carry an ETag derived from the session's data version, and
+    requests whose If-None-Match matches it get 304 Not Modified without
+    any calculation. Sessions requested by date more than
+    SESSION_FINAL_HOURS after they ended are immutable and cacheable for a
+    year; others are revalidated.
+    """
+    data_service = get_data_service()
     try:
         logger.info("Getting data for chart API endpoint")
+        response_format = negotiate_format('rows')
+        if response_format not in ('rows', 'columnar', 'arrow', 'packed'):
+            return {'error': 'Invalid format'}, 400
+
+        interval = request.args.get('interval', '1m')
+        if interval not in INTERVALS:
+            return {'error': 'Invalid interval'}, 400
         
+        since = request.args.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return {'error': 'Invalid since'}, 400
+
         # Parse date parameter
         date_str = request.args.get('date')
         if date_str:
             try:
                 selected_date = datetime.fromisoformat(date_str.split('T')[0])
-                logger.debug(f"Using selected date: {selected_date}")
+                logger.debug("Using selected date: {}", selected_date)
             except ValueError as e:
                 logger.error(f"Invalid date format: {str(e)}")
                 return {'error': 'Invalid date format'}, 400
         else:
             # Get latest date from database
-            selected_date, _ = data_service.get_latest_data_info()
+            selected_date = data_service.get_latest_date()
             if not selected_date:
                 logger.warning("No data available in database")
                 return {'error': 'No data available'}, 404
 
-        # Get data for the selected date
-        start_date = selected_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_date = start_date + timedelta(days=1)
-        
-        logger.debug(f"Retrieving data from {start_date} to {end_date}")
-        df = data_service.get_spy_data(start_date, end_date)
+        # The version covers the session's last bar timestamp, row count and
+        # sums of its prices and volumes, so late syncs and corrections of
+        # any value change the ETag. Only sessions past SESSION_FINAL_HOURS
+        # are cached as immutable.
+        version = data_service.get_session_version(selected_date)
+        etag = compute_etag(
+            data_service.symbol, selected_date.date(), interval, response_format, since,
+            [overlay.name for overlay in data_service.overlays], version
+        )
+        cache_control = (
+            IMMUTABLE_CACHE_CONTROL if date_str and data_service.is_session_final(selected_date)
+            else REVALIDATE_CACHE_CONTROL
+        )
+        cached = not_modified(etag, cache_control)
+        if cached is not None:
+            logger.debug("Not modified: {} {}", selected_date.date(), interval)
+            return cached
+
+        logger.debug("Retrieving data for {}", selected_date.date())
+        if since is None:
+            day = data_service.get_interval_day_arrays(selected_date, interval)
+        else:
+            day = data_service.get_day_delta(selected_date, since, interval)
         
-        if df.empty:
+        if day is None:
             logger.warning("No data found for the specified date range")
             return {'error': 'No data found'}, 404
 
-        # Convert DataFrame to list of dictionaries for JSON serialization
-        data = df.to_dict('records')
-        logger.info(f"Successfully retrieved {len(data)} records")
-        return {'data': data}
+        logger.info("Successfully retrieved {} records", len(day['time']))
+        if response_format == 'rows':
+            with timed_stage('serialization'):
+                response = jsonify({'data': row_payload(day, data_service.palette)})
+            response.vary.add('Accept')
+        else:
+            response = day_response(day, response_format)
+        return with_validators(response, etag, cache_control)
 
     except Exception as e:
         logger.error(f"Error getting data: {str(e)}", exc_info=True)
         return {'error': str(e)}, 500
 
+@app.route('/api/range')
+def get_range():
+    """
+    Get a wide date range downsampled for the chart
+
+    Query parameters:
+        start: ISO date or datetime of the start of the range
+        end: ISO date or datetime of the end of the range, exclusive
+        points: Point budget, e.g. the chart width in pixels (default 1000)
+        interval: Bar interval the oscillator is calculated on (default 1m)
+    """
+    data_service = get_data_service()
+    try:
+        try:
+            start = datetime.fromisoformat(request.args['start'])
+            end = datetime.fromisoformat(request.args['end'])
+            points = int(request.args.get('points', DEFAULT_RANGE_POINTS))
+        except (KeyError, ValueError) as e:
+            logger.error(f"Invalid range parameters: {str(e)}")
+            return {'error': 'start and end ISO dates and an integer points are required'}, 400
+        if end <= start:
+            return {'error': 'end must be after start'}, 400
+        points = min(max(points, 3), MAX_RANGE_POINTS)
+        interval = request.args.get('interval', '1m')
+        if interval not in INTERVALS:
+            return {'error': 'Invalid interval'}, 400
+
+        range_data = data_service.get_range(start, end, points, interval)
+        with timed_stage('serialization'):
+            return jsonify({'data': range_payload(range_data)})
+
+    except Exception as e:
+        logger.error(f"Error getting range: {str(e)}", exc_info=True)
+        return {'error': str(e)}, 500
+
+@app.route('/api/bars')
+def get_bars():
+    """
+    Get a page of bars before a cursor, for scrolling back through history
+
+    Query parameters:
+        before: Epoch seconds; bars starting before it are returned
+            (default: the newest bars)
+        limit: Maximum number of bars (default 1000)
+        interval: Bar interval, one of 1m (default), 5m, 15m, 1h or 1d
+        format: 'columnar' (default), 'arrow' or 'packed', or chosen by the
+            Accept header as for /api/data
+
+    The response is a columnar payload (see /api/data?format=columnar) and
+    'has_more'; the next page is requested with before set to its first time.
+    """
+    data_service = get_data_service()
+    try:
+        response_format = negotiate_format('columnar')
+        if response_format not in ('columnar', 'arrow', 'packed'):
+            return {'error': 'Invalid format'}, 400
+
+        try:
+            before = request.args.get('before')
+            before = from_epoch_seconds(int(before)) if before is not None else datetime.now() + timedelta(days=1)
+            limit = int(request.args.get('limit', DEFAULT_PAGE_BARS))
+        except ValueError as e:
+            logger.error(f"Invalid page parameters: {str(e)}")
+            return {'error': 'before and limit must be integers'}, 400
+        limit = min(max(limit, 1), MAX_PAGE_BARS)
+        interval = request.args.get('interval', '1m')
+        if interval not in INTERVALS:
+            return {'error': 'Invalid interval'}, 400
+
+        page, has_more = data_service.get_history_page(before, limit, interval)
+        return day_response(page, response_format, has_more=has_more)
+
+    except Exception as e:
+        logger.error(f"Error getting bars: {str(e)}", exc_info=True)
+        return {'error': str(e)}, 500
+
+@app.route('/api/export')
+def export():
+    """
+    Download a date range of bars with oscillator values
+
+    The export is streamed in chunks as they are read from a server-side
+    cursor, so memory use stays flat however long the range is.
+
+    Query parameters:
+        start: ISO date or datetime of the start of the range
+        end: ISO date or datetime of the end of the range, exclusive
+        format: 'ndjson' (default), 'csv' or 'parquet'
+    """
+    data_service = get_data_service()
+    try:
+        start = datetime.fromisoformat(request.args['start'])
+        end = datetime.fromisoformat(request.args['end'])
+    except (KeyError, ValueError) as e:
+        logger.error(f"Invalid export parameters: {str(e)}")
+        return {'error': 'start and end ISO dates are required'}, 400
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_MEDIA_TYPES:
+        return {'error': 'Invalid format'}, 400
+
+    logger.info("Exporting {} {} from {} to {}", data_service.symbol, export_format, start, end)
+    filename = f"{data_service.symbol}_{start.date()}_{end.date()}.{export_format}"
+    return Response(
+        stream_with_context(BarExporter(data_service).export(export_format, start, end)),
+        mimetype=EXPORT_MEDIA_TYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@app.route('/api/stream')
+def stream():
+    """
+    Push new and revised bars of a symbol as Server-Sent Events
+
+    Each 'bars' event carries a columnar payload (see /api/data?format=columnar)
+    of the bars added or revised since the previous event. Clients load the
+    day with /api/data first and apply events with series.update.
+
+    Served here by the development server only. An open stream holds a
+    worker thread, so the production server runs stream_server.py instead
+    and this redirects to it.
+
+    Query parameters:
+        symbol: Symbol to subscribe to, defaults to the served symbol
+    """
+    stream_url = stream_server_url()
+    if stream_url:
+        query = request.query_string.decode()
+        return redirect(f"{stream_url}?{query}" if query else stream_url, code=307)
+    data_service = get_data_service()
+    broadcaster = get_broadcaster(request.args.get('symbol', data_service.symbol))
+    subscriber = broadcaster.subscribe()
+
+    def events():
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    message = subscriber.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield b": keep-alive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 def run_web_app(host='localhost', port=5000, debug=False):
     """Run the Flask web application"""
     logger.info(f"Starting web application on {host}:{port}")
     app.run(host=host, port=port, debug=debug)
+
+def run_production_server(host: Optional[str] = None, port: Optional[int] = None,
+                          workers: Optional[int] = None):
+    """
+    Run the web application with pre-forked gunicorn workers
+
+    Settings come from config/server.py; host, port and workers override them.
+    """
+    from gunicorn.app.base import BaseApplication
+    # The server settings derive the stream server and metrics locations from these
+    if host is not None:
+        os.environ['HOST'] = host
+    if port is not None:
+        os.environ['PORT'] = str(port)
+    from .config import server
+
+    class ProductionServer(BaseApplication):
+        def load_config(self):
+            for key, value in vars(server).items():
+                if key in self.cfg.settings and value is not None:
+                    self.cfg.set(key, value)
+            if host is not None or port is not None:
+                default_host, default_port = server.bind.rsplit(':', 1)
+                self.cfg.set('bind', f"{host or default_host}:{port or default_port}")
+            if workers is not None:
+                self.cfg.set('workers', workers)
+
+        def load(self):
+            return app
+
+    logger.info("Starting production web application")
+    ProductionServer().run()
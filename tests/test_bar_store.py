@@ -0,0 +1,68 @@
+"""Memory-mapped bar store kept consistent with ingested corrections"""
+from datetime import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+
+from spy_python.models.bar_arrays import BarArrays
+from spy_python.models.spy_data import Base
+from spy_python.services.bar_store import MemmapBarStore, to_epoch_seconds
+from spy_python.services.data_service import DataService
+from spy_python.services.ingestion import BarIngestor
+
+START = datetime(2024, 1, 2, 9, 30)
+
+
+def minute_bars(count, close=400.0):
+    times = to_epoch_seconds(START) + 60 * np.arange(count, dtype=np.int64)
+    prices = np.full(count, close)
+    return BarArrays(time=times, open=prices, high=prices + 1, low=prices - 1, close=prices,
+                     volume=np.full(count, 100, dtype=np.int64))
+
+
+@pytest.fixture
+def setup(tmp_path):
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    store = MemmapBarStore(tmp_path / 'store')
+    service = DataService(bar_cache=None, bar_store=store)
+    service.engine = engine
+    ingestor = BarIngestor(engine, 'SPY', bar_store=store)
+    ingestor.ingest([minute_bars(60)])
+    store.append('SPY', service.fetch_bar_arrays(START, datetime(2024, 1, 3)))
+    return service, store, ingestor
+
+
+def test_truncate_keeps_bars_before_the_time(setup):
+    _, store, _ = setup
+    mapped = store.bars('SPY')
+
+    assert store.truncate('SPY', datetime(2024, 1, 2, 10, 0)) == 30
+    assert store.truncate('SPY', datetime(2024, 1, 2, 10, 0)) == 0
+
+    assert len(store.bars('SPY')) == 30
+    # A reader's earlier mapping stays whole
+    assert len(mapped) == 60 and mapped.close[-1] == 400.0
+
+
+def test_corrected_bars_are_read_from_the_database(setup):
+    service, store, ingestor = setup
+    correction = minute_bars(60, close=401.0).slice(40, 45)
+
+    ingestor.ingest([correction])
+
+    assert store.last_time('SPY') == to_epoch_seconds(datetime(2024, 1, 2, 10, 9))
+    bars = service.get_bars_range(START, datetime(2024, 1, 3))
+    assert len(bars) == 60
+    np.testing.assert_array_equal(bars.close[40:45], 401.0)
+    np.testing.assert_array_equal(np.delete(bars.close, np.s_[40:45]), 400.0)
+
+
+def test_newer_bars_leave_the_store_alone(setup):
+    _, store, ingestor = setup
+    newer = minute_bars(70).slice(60, 70)
+
+    ingestor.ingest([newer])
+
+    assert len(store.bars('SPY')) == 60
@@ -0,0 +1,47 @@
+"""Live feed polling and asyncio stream subscribers"""
+import asyncio
+import queue
+
+import pytest
+
+from spy_python.services import broadcaster
+from spy_python.services.broadcaster import AsyncSubscriber, DatabaseFeed
+
+
+class NoSessionService:
+    """DataService stand-in for a day without bars"""
+    symbol = 'SPY'
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_day_arrays(self, date):
+        self.calls += 1
+        return None
+
+
+def test_database_feed_backs_off_without_a_session(monkeypatch):
+    waits = []
+    monkeypatch.setattr(broadcaster.time, 'sleep', waits.append)
+    feed = DatabaseFeed(NoSessionService(), poll_interval=1, idle_poll_interval=10)
+
+    for _ in range(6):
+        assert feed.poll() is None
+
+    assert waits == [1, 2, 4, 8, 10, 10]
+
+
+def test_async_subscriber_receives_from_another_thread():
+    async def receive():
+        subscriber = AsyncSubscriber(asyncio.get_running_loop(), maxsize=2)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, subscriber.put_nowait, b'first')
+        await loop.run_in_executor(None, subscriber.put_nowait, b'second')
+        with pytest.raises(queue.Full):
+            subscriber.put_nowait(b'third')
+        messages = [await subscriber.get(timeout=1), await subscriber.get(timeout=1)]
+        with pytest.raises(queue.Empty):
+            await subscriber.get(timeout=0.01)
+        return messages
+
+    assert asyncio.run(receive()) == [b'first', b'second']
@@ -0,0 +1,92 @@
+"""Column storage and JSON output of chart series"""
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from spy_python.charts.series import INITIAL_CAPACITY, CandlestickSeries, LineSeries, OHLCData
+
+
+def candles(max_length=None):
+    return CandlestickSeries('chart', 'series', {}, max_length)
+
+
+def test_candlestick_json_matches_the_points():
+    series = candles()
+    series.set_data([
+        OHLCData(time=1704205800, open=400.25, high=401.0, low=399.5, close=400.75, volume=1200),
+        OHLCData(time=datetime(2024, 1, 2, 14, 31, tzinfo=timezone.utc), open=400.75, high=401.5,
+                 low=400.0, close=401.0),
+    ])
+
+    assert json.loads(series.to_json()) == [
+        {'time': 1704205800, 'open': 400.25, 'high': 401, 'low': 399.5, 'close': 400.75, 'volume': 1200},
+        {'time': 1704205860, 'open': 400.75, 'high': 401.5, 'low': 400, 'close': 401},
+    ]
+    assert '"volume":1200}' in series.to_json()
+
+
+def test_update_replaces_a_point_with_the_same_time():
+    series = LineSeries('chart', 'series', {})
+    series.update(60, 1.5)
+    series.update(120, 2.5)
+    series.update(120, 3.5, color='#ff0000')
+
+    assert series.to_list() == [{'time': 60, 'value': 1.5}, {'time': 120, 'value': 3.5, 'color': '#ff0000'}]
+
+
+def test_columns_grow_past_their_initial_capacity():
+    series = LineSeries('chart', 'series', {})
+    for index in range(INITIAL_CAPACITY * 3 + 5):
+        series.update(index * 60, float(index))
+
+    points = series.to_list()
+    assert len(series) == len(points) == INITIAL_CAPACITY * 3 + 5
+    assert [point['value'] for point in points] == list(range(len(points)))
+
+
+def test_max_length_keeps_the_newest_points():
+    series = LineSeries('chart', 'series', {}, max_length=100)
+    for index in range(5000):
+        series.update(index, index + 0.5, color='#00ff00' if index % 2 else None)
+
+    points = series.to_list()
+    assert len(series) == 100
+    assert [point['time'] for point in points] == list(range(4900, 5000))
+    assert [('color' in point) for point in points] == [index % 2 == 1 for index in range(4900, 5000)]
+    # The columns stay at twice max_length however many points pass through
+    assert len(series._time) == 200
+
+
+def test_set_columns_takes_arrays_and_leaves_out_missing_values():
+    series = candles()
+    times = np.array([60, 120, 180], dtype=np.int64)
+    prices = np.array([1.0, 2.0, 3.0])
+
+    series.set_columns(times, open=prices, high=prices, low=prices, close=prices,
+                       volume=np.array([10.0, np.nan, 30.0]))
+
+    points = series.to_list()
+    assert points[1] == {'time': 120, 'open': 2, 'high': 2, 'low': 2, 'close': 2}
+    assert points[2]['volume'] == 30
+    with pytest.raises(ValueError):
+        series.set_columns(times, value=prices)
+
+
+def test_business_day_strings_are_kept():
+    series = LineSeries('chart', 'series', {})
+    series.set_data([{'time': '2024-01-02', 'value': 1.25}, {'time': '2024-01-03', 'value': 2.5}])
+    series.update('2024-01-04', 3.0)
+
+    assert series.to_list() == [
+        {'time': '2024-01-02', 'value': 1.25},
+        {'time': '2024-01-03', 'value': 2.5},
+        {'time': '2024-01-04', 'value': 3},
+    ]
+
+
+def test_empty_series_is_an_empty_list():
+    assert candles().to_json() == '[]'
+    with pytest.raises(ValueError):
+        candles(max_length=0)
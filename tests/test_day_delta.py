@@ -0,0 +1,96 @@
+"""Incremental refreshes of the current session through the since cursor"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+from spy_python import web_app
+from spy_python.models.spy_data import Base, SPYData
+from spy_python.services.bar_cache import ParquetBarCache
+from spy_python.services.bar_store import to_epoch_seconds
+from spy_python.services.data_service import DataService
+
+DAY = datetime(2024, 1, 2)
+OPEN = DAY + timedelta(hours=9, minutes=30)
+CLOSES = np.round(400 + np.cumsum(np.random.default_rng(0).normal(0, 0.1, 120)), 2)
+
+
+def add_bars(engine, first, last):
+    with Session(engine) as session:
+        session.add_all(
+            SPYData(symbol='SPY', timestamp=OPEN + timedelta(minutes=minute), open=float(CLOSES[minute]),
+                    high=float(CLOSES[minute]) + 0.05, low=float(CLOSES[minute]) - 0.05,
+                    close=float(CLOSES[minute]), volume=1000 + minute)
+            for minute in range(first, last)
+        )
+        session.commit()
+
+
+def set_close(engine, minute, close):
+    with Session(engine) as session:
+        session.execute(update(SPYData).where(
+            SPYData.timestamp == OPEN + timedelta(minutes=minute)
+        ).values(close=close, high=close + 0.05))
+        session.commit()
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    add_bars(engine, 0, 60)
+    service = DataService(bar_cache=ParquetBarCache(tmp_path), bar_store=None)
+    service.engine = engine
+    # Serve DAY as the session still receiving bars
+    monkeypatch.setattr(DataService, 'is_session_closed', staticmethod(lambda date: False))
+    return service
+
+
+def assert_same_day(actual, expected):
+    for name in ('time', 'close', 'oscillator', 'compression', 'color'):
+        np.testing.assert_allclose(actual[name], expected[name], rtol=0, atol=1e-9)
+    for name, values in expected['signals'].items():
+        np.testing.assert_array_equal(actual['signals'][name], values)
+
+
+def test_live_session_matches_a_full_recalculation(service):
+    service.get_day_arrays(DAY)
+    # The last known bar is revised while it forms, then new bars land
+    set_close(service.engine, 59, 401.5)
+    add_bars(service.engine, 60, 90)
+
+    day = service.get_day_arrays(DAY)
+
+    assert len(day['time']) == 90 and day['close'][59] == 401.5
+    assert_same_day(day, service.calculate_indicators(service.fetch_bar_arrays(DAY, DAY + timedelta(days=1))))
+
+
+def test_delta_starts_at_the_cursor_bar(service):
+    service.get_day_arrays(DAY)
+    set_close(service.engine, 59, 401.5)
+    add_bars(service.engine, 60, 65)
+    since = to_epoch_seconds(OPEN + timedelta(minutes=59))
+
+    delta = service.get_day_delta(DAY, since)
+
+    assert delta['time'].tolist() == [since + 60 * minute for minute in range(6)]
+    assert delta['close'][0] == 401.5
+    assert_same_day(delta, {
+        name: values[59:] if not isinstance(values, dict) else {key: v[59:] for key, v in values.items()}
+        for name, values in service.get_day_arrays(DAY).items()
+    })
+
+
+def test_data_endpoint_serves_deltas(service, monkeypatch):
+    monkeypatch.setitem(vars(web_app), 'data_service', service)
+    client = web_app.app.test_client()
+    since = to_epoch_seconds(OPEN + timedelta(minutes=55))
+
+    response = client.get(f'/api/data?date={DAY.date()}&format=columnar&since={since}')
+
+    assert response.status_code == 200
+    assert response.get_json()['data']['time'][0] == since
+    assert len(response.get_json()['data']['time']) == 5
+    assert client.get(f'/api/data?date={DAY.date()}&since=soon').status_code == 400
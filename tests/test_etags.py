@@ -0,0 +1,93 @@
+"""ETags and conditional GETs of the chart APIs"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+from spy_python import web_app
+from spy_python.models.spy_data import Base, SPYData
+from spy_python.services import data_service as data_service_module
+from spy_python.services.bar_cache import ParquetBarCache
+from spy_python.services.data_service import DataService
+
+DAY = datetime(2024, 1, 2)
+URL = f'/api/data?date={DAY.date()}&format=columnar'
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(
+            SPYData(symbol='SPY', timestamp=DAY + timedelta(hours=9, minutes=30 + minute),
+                    open=400 + minute, high=401 + minute, low=399 + minute, close=400.5 + minute, volume=1000)
+            for minute in range(60)
+        )
+        session.commit()
+    service = DataService(bar_cache=ParquetBarCache(tmp_path), bar_store=None)
+    service.engine = engine
+    monkeypatch.setitem(vars(web_app), 'data_service', service)
+    return web_app.app.test_client()
+
+
+def test_matching_etag_gets_304(client):
+    response = client.get(URL)
+    etag = response.headers['ETag']
+
+    cached = client.get(URL, headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert cached.status_code == 304 and cached.data == b''
+    assert cached.headers['ETag'] == etag
+    assert client.get(URL, headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_etag_depends_on_the_request(client):
+    etags = {client.get(url).headers['ETag'] for url in (
+        URL, URL + '&interval=5m', f'/api/data?date={DAY.date()}&format=rows', URL + '&since=1704188000'
+    )}
+
+    assert len(etags) == 4
+
+
+def test_compressed_responses_get_their_own_etag(client):
+    plain = client.get(URL, headers={'Accept-Encoding': 'identity'})
+    compressed = client.get(URL, headers={'Accept-Encoding': 'gzip'})
+
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+    assert client.get(URL, headers={'Accept-Encoding': 'gzip', 'If-None-Match': compressed.headers['ETag']}
+                      ).status_code == 304
+
+
+def test_final_sessions_are_immutable(client, monkeypatch):
+    assert client.get(URL).headers['Cache-Control'] == web_app.IMMUTABLE_CACHE_CONTROL
+
+    monkeypatch.setattr(data_service_module, 'SESSION_FINAL_HOURS', 1e6)
+    assert client.get(URL).headers['Cache-Control'] == web_app.REVALIDATE_CACHE_CONTROL
+
+
+def test_correction_changes_the_etag_before_the_session_is_final(client, monkeypatch):
+    monkeypatch.setattr(data_service_module, 'SESSION_FINAL_HOURS', 1e6)
+    monkeypatch.setattr(data_service_module, 'SESSION_VERSION_TTL', 0)
+    etag = client.get(URL).headers['ETag']
+    with Session(web_app.data_service.engine) as session:
+        session.execute(update(SPYData).where(
+            SPYData.timestamp == DAY + timedelta(hours=9, minutes=40)
+        ).values(close=999.0))
+        session.commit()
+
+    response = client.get(URL, headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['data']['close'][10] == 999.0
+
+
+def test_latest_date_revalidates(client):
+    response = client.get('/api/latest-date')
+
+    assert response.get_json() == {'date': '2024-01-02T10:29:00'}
+    assert client.get('/api/latest-date', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
@@ -0,0 +1,19 @@
+"""Argument checks of the export_bars script"""
+import pytest
+
+from spy_python.scripts import export_bars
+
+
+@pytest.mark.parametrize('arguments', [
+    ['--output', 'bars.txt'],
+    ['--output', 'bars'],
+    ['--format', 'xml'],
+])
+def test_unknown_formats_are_usage_errors(monkeypatch, capsys, arguments):
+    monkeypatch.setattr('sys.argv', ['export_bars', '--start', '2024-01-02', '--end', '2024-01-03', *arguments])
+
+    with pytest.raises(SystemExit) as exit_info:
+        export_bars.main()
+
+    assert exit_info.value.code == 2
+    assert 'ndjson' in capsys.readouterr().err
@@ -0,0 +1,83 @@
+"""Keyset history pages of aggregated intervals, with and without stored rollups"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from spy_python.models.spy_data import Base, SPYData
+from spy_python.services.data_service import DataService
+from spy_python.services.resample import aggregate_bars
+
+DAYS = (datetime(2024, 1, 2), datetime(2024, 1, 3), datetime(2024, 1, 4))
+CURSOR = datetime(2024, 1, 5)
+
+
+def add_minutes(engine, day, minutes, seed=0):
+    rng = np.random.default_rng(seed)
+    close = np.round(400 + np.cumsum(rng.normal(0, 0.1, minutes)), 2)
+    with Session(engine) as session:
+        session.add_all(
+            SPYData(symbol='SPY', timestamp=day + timedelta(hours=9, minutes=30 + minute),
+                    open=float(close[minute]), high=float(close[minute]) + 0.05,
+                    low=float(close[minute]) - 0.05, close=float(close[minute]), volume=100 + minute)
+            for minute in range(minutes)
+        )
+        session.commit()
+
+
+@pytest.fixture
+def service():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    for seed, day in enumerate(DAYS[:2]):
+        add_minutes(engine, day, 390, seed)
+    service = DataService(bar_cache=None, bar_store=None)
+    service.engine = engine
+    return service
+
+
+def expected_page(service, interval_seconds, limit):
+    minutes = service.fetch_bar_arrays(DAYS[0], CURSOR)
+    bars = aggregate_bars(minutes, interval_seconds)
+    return bars.slice(max(len(bars) - limit, 0), len(bars))
+
+
+def assert_same_bars(actual, expected):
+    for name in ('time', 'open', 'high', 'low', 'close', 'volume'):
+        np.testing.assert_array_equal(getattr(actual, name), getattr(expected, name))
+
+
+def test_pages_are_aggregated_without_rollups(service):
+    page = service.fetch_bars_before(CURSOR, 30, '15m')
+
+    assert_same_bars(page, expected_page(service, 900, 30))
+
+
+def test_page_holds_all_bars_when_history_is_short(service):
+    day, has_more = service.get_history_page(CURSOR, 1000, '1h')
+
+    assert not has_more
+    np.testing.assert_array_equal(day['time'], expected_page(service, 3600, 1000).time)
+
+
+def test_pages_include_minutes_ingested_after_the_last_refresh(service):
+    service.rollups.refresh()
+    add_minutes(service.engine, DAYS[2], 200, seed=7)
+
+    page = service.fetch_bars_before(CURSOR, 40, '15m')
+
+    assert_same_bars(page, expected_page(service, 900, 40))
+    # The partial bucket of the last ingested minute, 12:49
+    assert page.time[-1] == service.fetch_bars_before(CURSOR, 1).time[-1] // 900 * 900
+
+
+def test_older_pages_come_from_stored_rollups(service):
+    service.rollups.refresh()
+    cursor = DAYS[1] + timedelta(hours=12)
+
+    page = service.fetch_bars_before(cursor, 10, '5m')
+
+    bars = aggregate_bars(service.fetch_bar_arrays(DAYS[0], cursor), 300)
+    assert_same_bars(page, bars.slice(len(bars) - 10, len(bars)))
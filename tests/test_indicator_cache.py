@@ -0,0 +1,66 @@
+"""Versioning, eviction and the byte budget of IndicatorCache"""
+from datetime import date
+
+import numpy as np
+
+from spy_python.services.indicator_cache import IndicatorCache, estimate_size
+
+DAY_1, DAY_2, DAY_3 = date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 4)
+
+
+def day_values(value: float = 0.0):
+    return {'oscillator': np.full(1000, value)}
+
+
+def test_hit_requires_the_same_version():
+    cache = IndicatorCache()
+    cache.put('SPY', DAY_1, 'v1', day_values(1.0))
+
+    assert cache.get('SPY', DAY_1, 'v1')['oscillator'][0] == 1.0
+    assert cache.get('SPY', DAY_1, 'v2') is None
+    # The stale entry is dropped, not kept for the old version
+    assert cache.get('SPY', DAY_1, 'v1') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['invalidations'], stats['entries']) == (1, 2, 1, 0)
+
+
+def test_least_recently_used_entry_is_evicted_over_budget():
+    size = estimate_size(day_values())
+    cache = IndicatorCache(max_bytes=2 * size)
+    cache.put('SPY', DAY_1, 'v', day_values(1.0))
+    cache.put('SPY', DAY_2, 'v', day_values(2.0))
+    cache.get('SPY', DAY_1, 'v')
+    cache.put('SPY', DAY_3, 'v', day_values(3.0))
+
+    assert cache.get('SPY', DAY_2, 'v') is None
+    assert cache.get('SPY', DAY_1, 'v') is not None
+    assert cache.get('SPY', DAY_3, 'v') is not None
+    assert cache.stats()['evictions'] == 1
+    assert cache.current_bytes == 2 * size
+
+
+def test_values_larger_than_the_budget_are_not_cached():
+    cache = IndicatorCache(max_bytes=100)
+    cache.put('SPY', DAY_1, 'v', day_values())
+
+    assert cache.get('SPY', DAY_1, 'v') is None
+    assert cache.current_bytes == 0
+
+
+def test_replacing_an_entry_keeps_the_byte_count():
+    cache = IndicatorCache()
+    cache.put('SPY', DAY_1, 'v1', day_values(1.0))
+    cache.put('SPY', DAY_1, 'v2', day_values(2.0))
+
+    assert cache.current_bytes == estimate_size(day_values())
+    cache.invalidate('SPY', DAY_1)
+    assert cache.current_bytes == 0
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_estimate_size_counts_array_buffers_once():
+    values = np.zeros(10_000)
+
+    assert estimate_size(values) >= values.nbytes
+    assert estimate_size(values[:5000]) >= 5000 * 8
+    assert estimate_size(values) < 2 * values.nbytes
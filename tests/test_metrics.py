@@ -0,0 +1,104 @@
+"""Latency histograms, quantile estimates and Prometheus rendering"""
+import json
+import math
+
+import pytest
+
+from spy_python import web_app
+from spy_python.services import metrics
+from spy_python.services.bar_cache import ParquetBarCache
+from spy_python.services.data_service import DataService
+from spy_python.services.metrics import Histogram, MetricsRegistry, bucket_quantile
+
+BOUNDS = (0.1, 0.2, 0.4, math.inf)
+
+
+def test_quantile_interpolates_within_its_bucket():
+    # 10 observations up to 0.1, 20 in (0.1, 0.2], 10 in (0.2, 0.4]
+    cumulative = [10, 30, 40, 40]
+
+    assert bucket_quantile(0.25, BOUNDS, cumulative) == pytest.approx(0.1)
+    assert bucket_quantile(0.5, BOUNDS, cumulative) == pytest.approx(0.15)
+    assert bucket_quantile(0.125, BOUNDS, cumulative) == pytest.approx(0.05)
+    assert bucket_quantile(1.0, BOUNDS, cumulative) == pytest.approx(0.4)
+
+
+def test_quantile_in_the_inf_bucket_is_the_largest_finite_bound():
+    assert bucket_quantile(0.99, BOUNDS, [1, 1, 1, 10]) == 0.4
+
+
+def test_quantile_without_observations_is_nan():
+    assert math.isnan(bucket_quantile(0.5, BOUNDS, [0, 0, 0, 0]))
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('spy_test_seconds', 'Test latencies', ('endpoint',), buckets=(0.1, 0.5))
+    for value in (0.05, 0.1, 0.3, 2.0):
+        histogram.observe(value, '/api/data')
+    histogram.observe(0.2, 'say "hi"\n')
+
+    lines = histogram.render()
+
+    assert lines[:2] == ['# HELP spy_test_seconds Test latencies', '# TYPE spy_test_seconds histogram']
+    assert 'spy_test_seconds_bucket{endpoint="/api/data",le="0.1"} 2' in lines
+    assert 'spy_test_seconds_bucket{endpoint="/api/data",le="0.5"} 3' in lines
+    assert 'spy_test_seconds_bucket{endpoint="/api/data",le="+Inf"} 4' in lines
+    assert 'spy_test_seconds_sum{endpoint="/api/data"} 2.45' in lines
+    assert 'spy_test_seconds_count{endpoint="/api/data"} 4' in lines
+    assert 'spy_test_seconds_count{endpoint="say \\"hi\\"\\n"} 1' in lines
+
+
+def test_timed_stage_is_labelled_with_the_current_endpoint(monkeypatch):
+    stage = Histogram('spy_stage_test_seconds', 'Stages', ('endpoint', 'stage'))
+    monkeypatch.setattr(metrics, 'STAGE_SECONDS', stage)
+    token = metrics.current_endpoint.set('/api/bars')
+    try:
+        with metrics.timed_stage('db_query'):
+            pass
+    finally:
+        metrics.current_endpoint.reset(token)
+
+    assert list(stage.snapshot()) == [('/api/bars', 'db_query')]
+
+
+def test_registry_sums_the_snapshots_of_other_workers(tmp_path):
+    registry = MetricsRegistry()
+    histogram = registry.histogram('spy_test_seconds', 'Test latencies', ('endpoint',), buckets=(0.1,))
+    registry.register_callback('spy_test_events_total', 'Events', 'counter', ('event',),
+                               lambda: {('hit',): 3})
+    histogram.observe(0.05, '/api/data')
+    assert registry.write_snapshot(str(tmp_path))
+    # Another worker's snapshot, and a half-written one that is skipped
+    (tmp_path / '1.json').write_text(json.dumps({
+        'spy_test_seconds': [[['/api/data'], [[1, 1], 0.55, 2]]],
+        'spy_test_events_total': [[['hit'], 4], [['miss'], 1]],
+    }))
+    (tmp_path / '2.json').write_text('{"spy_test')
+
+    text = registry.render(str(tmp_path))
+
+    assert 'spy_test_seconds_bucket{endpoint="/api/data",le="0.1"} 2' in text
+    assert 'spy_test_seconds_bucket{endpoint="/api/data",le="+Inf"} 3' in text
+    assert 'spy_test_seconds_count{endpoint="/api/data"} 3' in text
+    assert 'spy_test_events_total{event="hit"} 7' in text
+    assert 'spy_test_events_total{event="miss"} 1' in text
+    assert '# TYPE spy_test_events_total counter' in text
+
+
+def test_snapshots_are_written_at_most_once_per_interval(tmp_path):
+    registry = MetricsRegistry()
+
+    assert registry.write_snapshot(str(tmp_path), min_interval=60)
+    assert not registry.write_snapshot(str(tmp_path), min_interval=60)
+
+
+def test_metrics_endpoint_times_requests(tmp_path, monkeypatch):
+    monkeypatch.delenv('METRICS_DIR', raising=False)
+    monkeypatch.setitem(vars(web_app), 'data_service', DataService(bar_cache=ParquetBarCache(tmp_path), bar_store=None))
+    client = web_app.app.test_client()
+    client.get('/metrics')
+
+    response = client.get('/metrics')
+
+    assert response.content_type == web_app.METRICS_CONTENT_TYPE
+    assert 'spy_request_duration_seconds_count{endpoint="/metrics",method="GET",status="200"}' in response.text
@@ -0,0 +1,95 @@
+"""Bar aggregation and LTTB downsampling of wide ranges"""
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from spy_python import web_app
+from spy_python.models.bar_arrays import BarArrays
+from spy_python.models.spy_data import Base, SPYData
+from spy_python.services.data_service import DataService
+from spy_python.services.resample import aggregate_bars, choose_resolution, lttb
+
+
+def bars_at(times):
+    times = np.asarray(times, dtype=np.int64)
+    n = np.arange(len(times), dtype=np.float64)
+    return BarArrays(time=times, open=100 + n, high=110 + n, low=90 - n, close=105 + n,
+                     volume=np.full(len(times), 10, dtype=np.int64))
+
+
+def test_aggregate_bars_takes_ohlcv_per_bucket():
+    # Two bars in the 0-299 bucket, none in 300-599, three in 600-899
+    bars = aggregate_bars(bars_at([0, 240, 660, 720, 840]), 300)
+
+    assert bars.time.tolist() == [0, 600]
+    assert bars.open.tolist() == [100, 102]
+    assert bars.high.tolist() == [111, 114]
+    assert bars.low.tolist() == [89, 86]
+    assert bars.close.tolist() == [106, 109]
+    assert bars.volume.tolist() == [20, 30]
+
+
+def test_aggregate_bars_of_no_bars_is_empty():
+    assert len(aggregate_bars(BarArrays.empty(), 300)) == 0
+
+
+def test_choose_resolution_counts_only_buckets_with_bars():
+    # Two sessions of 390 minute bars a day apart
+    open_time = 9 * 3600 + 30 * 60
+    times = np.concatenate([open_time + 60 * np.arange(390), 86400 + open_time + 60 * np.arange(390)])
+
+    assert choose_resolution(times, 780) == 60
+    assert choose_resolution(times, 200) == 300
+    assert choose_resolution(times, 14) == 3600
+    assert choose_resolution(times, 1) == 604800
+
+
+def test_lttb_keeps_the_ends_and_the_extremes():
+    x = np.arange(1000)
+    y = np.sin(x / 50)
+    y[123], y[777] = 25.0, -25.0
+
+    kept = lttb(x, y, 50)
+
+    assert len(kept) == 50
+    assert kept[0] == 0 and kept[-1] == 999
+    assert np.all(np.diff(kept) > 0)
+    assert 123 in kept and 777 in kept
+
+
+def test_lttb_skips_non_finite_values():
+    y = np.array([1.0, np.nan, 3.0, np.inf, 5.0])
+
+    assert lttb(np.arange(5), y, 10).tolist() == [0, 2, 4]
+    assert lttb(np.arange(5), y, 2).tolist() == [0, 4]
+
+
+def test_range_endpoint_fits_the_point_budget(monkeypatch):
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    rng = np.random.default_rng(0)
+    with Session(engine) as session:
+        for day in range(3):
+            session_open = datetime(2024, 1, 2 + day, 9, 30)
+            closes = 400 + np.cumsum(rng.normal(0, 0.1, 390))
+            session.add_all(
+                SPYData(symbol='SPY', timestamp=session_open + timedelta(minutes=minute),
+                        open=float(close), high=float(close) + 0.05, low=float(close) - 0.05,
+                        close=float(close), volume=100)
+                for minute, close in enumerate(closes)
+            )
+        session.commit()
+    service = DataService(bar_cache=None, bar_store=None)
+    service.engine = engine
+    monkeypatch.setitem(vars(web_app), 'data_service', service)
+
+    response = web_app.app.test_client().get('/api/range?start=2024-01-02&end=2024-01-05&points=100')
+
+    data = response.get_json()['data']
+    assert response.status_code == 200
+    # Three sessions of 26 fifteen-minute buckets
+    assert data['resolution'] == 900
+    assert len(data['oscillator']['time']) == 100
+    assert len(data['time']) == 78
@@ -0,0 +1,104 @@
+"""Consistency of the Saty Phase Oscillator implementations on flat prices"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from spy_python.indicators.saty_phase_oscillator import SatyPhaseOscillator, SatyPhaseOscillatorStream
+
+SIGNALS = ('leaving_accumulation', 'leaving_extreme_down', 'leaving_distribution', 'leaving_extreme_up')
+
+
+def flat_bars(seed: int = 0, trading_range: float = 0.0):
+    """Random-walk minute bars with a 30-bar flat stretch of closes
+
+    Without a trading range the ATR is zero there, and so the raw signal
+    is not finite.
+    """
+    rng = np.random.default_rng(seed)
+    close = 400 + np.cumsum(rng.normal(0, 0.1, 200))
+    close[80:110] = close[80]
+    high, low = close + 0.05, close - 0.05
+    high[80:110] = close[80:110] + trading_range
+    low[80:110] = close[80:110] - trading_range
+    return close, high, low
+
+
+def random_bars(bars: int, seed: int = 0):
+    """Random-walk minute bars on a cent grid"""
+    rng = np.random.default_rng(seed)
+    close = np.round(400 + np.cumsum(rng.normal(0, 0.05, bars)), 2)
+    high = close + np.round(np.abs(rng.normal(0, 0.03, bars)), 2)
+    low = close - np.round(np.abs(rng.normal(0, 0.03, bars)), 2)
+    return close, high, low
+
+
+def calculate(close, high, low):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return SatyPhaseOscillator().calculate(pd.DataFrame({'close': close, 'high': high, 'low': low}))
+
+
+def test_batch_matches_calculate_on_flat_prices():
+    close, high, low = flat_bars(trading_range=0.05)
+    batch = SatyPhaseOscillator().calculate_batch(close, high, low)
+    expected = calculate(close, high, low)
+
+    # From bar 100 the window is flat, and its standard deviation rounding residue
+    assert expected['compression_tracker'][100:110].all()
+    np.testing.assert_allclose(batch['oscillator'][0], expected['oscillator'], rtol=0, atol=1e-6)
+    np.testing.assert_array_equal(batch['compression_tracker'][0], expected['compression_tracker'])
+    for name in SIGNALS:
+        np.testing.assert_array_equal(batch['signals'][name][0], expected['signals'][name])
+
+
+def test_batch_matches_calculate_without_a_trading_range():
+    """pandas 2 and 3 weigh the first EMA input after the stretch differently,
+    so the oscillator is compared up to it; see the stream test for the rest."""
+    close, high, low = flat_bars()
+    batch = SatyPhaseOscillator().calculate_batch(close, high, low)
+    expected = calculate(close, high, low)
+
+    np.testing.assert_allclose(batch['oscillator'][0][:110], expected['oscillator'][:110], rtol=0, atol=1e-6)
+    np.testing.assert_array_equal(batch['compression_tracker'][0], expected['compression_tracker'])
+
+
+def test_batch_compression_matches_calculate_on_ties():
+    """Cent prices often repeat the previous compression exactly; both
+    implementations must flag those bars alike despite rounding differently."""
+    close, high, low = random_bars(100_000)
+    batch = SatyPhaseOscillator().calculate_batch(close, high, low)
+
+    np.testing.assert_array_equal(batch['compression_tracker'][0], calculate(close, high, low)['compression_tracker'])
+
+
+def test_batch_matches_stream_on_flat_prices():
+    close, high, low = flat_bars()
+    batch = SatyPhaseOscillator().calculate_batch(close, high, low)
+    stream = SatyPhaseOscillatorStream().update_many(high, low, close)
+
+    assert np.isfinite(batch['oscillator'][0][20:]).all()
+    np.testing.assert_allclose(batch['oscillator'][0], stream['oscillator'], rtol=0, atol=1e-6)
+    np.testing.assert_array_equal(batch['compression_tracker'][0], stream['compression'])
+    for name in SIGNALS:
+        np.testing.assert_array_equal(batch['signals'][name][0], stream[name])
+
+
+def test_stream_matches_calculate_bar_by_bar():
+    close, high, low = random_bars(2000, seed=1)
+    expected = calculate(close, high, low)
+    stream = SatyPhaseOscillatorStream()
+
+    for i in range(len(close)):
+        if i % 7 == 3:
+            # A forming bar, revised twice before it closes
+            stream.update({'high': high[i] + 1, 'low': low[i] - 1, 'close': close[i] + 0.5})
+            stream.revise({'high': high[i], 'low': low[i] - 2, 'close': close[i] - 0.5})
+            result = stream.revise({'high': high[i], 'low': low[i], 'close': close[i]})
+        else:
+            result = stream.update({'high': high[i], 'low': low[i], 'close': close[i]})
+
+        assert result['oscillator'] == pytest.approx(expected['oscillator'][i], rel=0, abs=1e-9, nan_ok=True)
+        assert result['compression'] == expected['compression_tracker'][i]
+        assert result['color'] == expected['colors'][i]
+        for name in SIGNALS:
+            assert result[name] == expected['signals'][name][i]
+    assert stream.bar_count == len(close)
@@ -0,0 +1,142 @@
+"""Columnar, row, packed and Arrow encodings of day arrays"""
+import json
+import struct
+from datetime import datetime, timedelta
+
+import numpy as np
+import pyarrow as pa
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from spy_python import web_app
+from spy_python.models.spy_data import Base, SPYData
+from spy_python.services.bar_cache import ParquetBarCache
+from spy_python.services.data_service import DataService
+from spy_python.services.serialization import (
+    ARROW_MEDIA_TYPE, PACKED_MEDIA_TYPE, arrow_payload, columnar_payload, packed_payload, row_payload
+)
+
+PALETTE = ['#00ff00', '#ff0000', '#ff00ff']
+
+
+def make_day():
+    return {
+        'time': np.array([1704205800, 1704205860, 1704205920], dtype=np.int64),
+        'open': np.array([400.0, 400.5, 401.0]),
+        'high': np.array([401.0, 401.5, 402.0]),
+        'low': np.array([399.0, 399.5, 400.0]),
+        'close': np.array([400.5, 401.0, 401.5]),
+        'volume': np.array([1000, 2000, 3000], dtype=np.int64),
+        'oscillator': np.array([np.nan, 12.345678, -np.inf]),
+        'compression': np.array([False, True, False]),
+        'color': np.array([0, 2, 1], dtype=np.uint8),
+        'signals': {'leaving_accumulation': np.array([False, False, True])},
+        'overlays': {'vwap': np.array([400.1, 400.2, np.nan])},
+    }
+
+
+def decode_packed(payload):
+    header_length = struct.unpack_from('<I', payload)[0]
+    header = json.loads(payload[4:4 + header_length])
+    body = payload[4 + header_length:]
+    columns = {
+        column['name']: np.frombuffer(body, dtype=column['dtype'], count=header['rows'], offset=column['offset'])
+        for column in header['columns']
+    }
+    return header, columns
+
+
+def test_columnar_payload_is_json_safe_and_sparse():
+    payload = columnar_payload(make_day(), PALETTE)
+
+    assert payload['oscillator'] == [None, 12.3457, None]
+    assert payload['overlays'] == {'vwap': [400.1, 400.2, None]}
+    assert payload['color'] == [0, 2, 1] and payload['palette'] == PALETTE
+    assert payload['compression'] == [1]
+    assert payload['signals'] == {'leaving_accumulation': [2]}
+    json.dumps(payload, allow_nan=False)
+
+
+def test_row_payload_has_one_object_per_bar():
+    rows = row_payload(make_day(), PALETTE)
+
+    assert len(rows) == 3
+    assert rows[1] == {
+        'time': 1704205860, 'open': 400.5, 'high': 401.5, 'low': 399.5, 'close': 401.0, 'volume': 2000,
+        'oscillator': 12.345678, 'compression': True, 'color': '#ff00ff',
+        'leaving_accumulation': False, 'vwap': 400.2,
+    }
+    assert rows[0]['oscillator'] is None
+
+
+def test_packed_payload_round_trips_with_aligned_columns():
+    day = make_day()
+    payload = packed_payload(day, PALETTE, has_more=True)
+
+    header, columns = decode_packed(payload)
+
+    assert (4 + struct.unpack_from('<I', payload)[0]) % 8 == 0
+    assert all(column['offset'] % 8 == 0 for column in header['columns'])
+    assert header['rows'] == 3 and header['palette'] == PALETTE and header['has_more'] is True
+    assert header['compression'] == [1] and header['signals'] == {'leaving_accumulation': [2]}
+    for name in ('time', 'open', 'high', 'low', 'close', 'volume', 'color'):
+        np.testing.assert_array_equal(columns[name], day[name])
+    np.testing.assert_array_equal(columns['oscillator'], day['oscillator'])
+    np.testing.assert_array_equal(columns['overlays.vwap'], day['overlays']['vwap'])
+
+
+def test_packed_payload_of_no_day_is_empty():
+    header, columns = decode_packed(packed_payload(None, PALETTE))
+
+    assert header['rows'] == 0
+    assert all(len(values) == 0 for values in columns.values())
+
+
+def test_arrow_payload_round_trips():
+    day = make_day()
+
+    table = pa.ipc.open_stream(arrow_payload(day, PALETTE, has_more=False)).read_all()
+
+    assert table.schema.field('time').type == pa.int64()
+    assert table.schema.field('volume').type == pa.int64()
+    assert table.schema.field('color').type == pa.uint8()
+    assert table.column('time').to_pylist() == day['time'].tolist()
+    assert table.column('oscillator').to_pylist()[:2] == [None, 12.345678]
+    assert table.column('compression').to_pylist() == [False, True, False]
+    assert table.column('leaving_accumulation').to_pylist() == [False, False, True]
+    assert json.loads(table.schema.metadata[b'palette']) == PALETTE
+    assert json.loads(table.schema.metadata[b'has_more']) is False
+
+
+def test_arrow_payload_of_no_day_keeps_the_schema():
+    table = pa.ipc.open_stream(arrow_payload(None, PALETTE)).read_all()
+
+    assert table.num_rows == 0
+    assert table.schema.field('time').type == pa.int64()
+
+
+@pytest.mark.parametrize('accept, media_type', [
+    (ARROW_MEDIA_TYPE, ARROW_MEDIA_TYPE),
+    (PACKED_MEDIA_TYPE, PACKED_MEDIA_TYPE),
+    ('application/json', 'application/json'),
+])
+def test_accept_header_selects_the_format(tmp_path, monkeypatch, accept, media_type):
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(
+            SPYData(symbol='SPY', timestamp=datetime(2024, 1, 2, 9, 30) + timedelta(minutes=minute),
+                    open=400.0, high=401.0, low=399.0, close=400.0 + minute / 10, volume=1000)
+            for minute in range(30)
+        )
+        session.commit()
+    service = DataService(bar_cache=ParquetBarCache(tmp_path), bar_store=None)
+    service.engine = engine
+    monkeypatch.setitem(vars(web_app), 'data_service', service)
+
+    response = web_app.app.test_client().get('/api/data?date=2024-01-02', headers={'Accept': accept})
+
+    assert response.status_code == 200
+    assert response.mimetype == media_type
+    assert 'Accept' in response.headers['Vary']
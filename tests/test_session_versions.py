@@ -0,0 +1,110 @@
+"""Data versions of closed sessions and the bar cache partitions checked against them"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+from spy_python.models.spy_data import Base, SPYData
+from spy_python.services import data_service as data_service_module
+from spy_python.services.bar_cache import ParquetBarCache
+from spy_python.services.data_service import DataService
+
+DAY = datetime(2024, 1, 2)
+
+
+@pytest.fixture
+def service(tmp_path):
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(
+            SPYData(symbol='SPY', timestamp=DAY + timedelta(hours=9, minutes=30 + minute),
+                    open=400 + minute, high=401 + minute, low=399 + minute, close=400.5 + minute, volume=1000)
+            for minute in range(30)
+        )
+        session.commit()
+    service = DataService(bar_cache=ParquetBarCache(tmp_path), bar_store=None)
+    service.engine = engine
+    return service
+
+
+def correct_close(service, minute, close):
+    with Session(service.engine) as session:
+        session.execute(update(SPYData).where(
+            SPYData.timestamp == DAY + timedelta(hours=9, minutes=30 + minute)
+        ).values(close=close))
+        session.commit()
+
+
+def count_version_queries(service, monkeypatch):
+    calls = []
+    read = service._read_session_version
+    monkeypatch.setattr(service, '_read_session_version', lambda date: calls.append(date) or read(date))
+    return calls
+
+
+def test_price_correction_changes_the_version(service):
+    before = service._read_session_version(DAY)
+    correct_close(service, 10, 123.25)
+
+    assert service._read_session_version(DAY) != before
+
+
+def test_corrected_partition_is_refetched_before_the_session_is_final(service, monkeypatch):
+    monkeypatch.setattr(data_service_module, 'SESSION_FINAL_HOURS', 1e6)
+    monkeypatch.setattr(data_service_module, 'SESSION_VERSION_TTL', 0)
+    assert service.get_day_bars(DAY).close[10] == 410.5
+
+    correct_close(service, 10, 123.25)
+
+    assert service.get_day_bars(DAY).close[10] == 123.25
+    assert not service.bar_cache.read_stamp('SPY', DAY.date()).final
+
+
+def test_final_session_is_served_without_database_queries(service, monkeypatch):
+    service.get_day_bars(DAY)
+    assert service.bar_cache.read_stamp('SPY', DAY.date()).final
+
+    service = DataService(bar_cache=service.bar_cache, bar_store=None)
+    calls = count_version_queries(service, monkeypatch)
+    monkeypatch.setattr(service, 'fetch_bar_arrays', lambda *args: pytest.fail("queried the database"))
+    version = service.get_session_version(DAY)
+    day = service.get_day_arrays(DAY)
+
+    assert calls == []
+    assert version == service.bar_cache.read_stamp('SPY', DAY.date()).version
+    np.testing.assert_array_equal(day['close'][:2], [400.5, 401.5])
+
+
+def test_unstamped_partition_is_checked_and_sealed(service, monkeypatch):
+    bars = service.fetch_bar_arrays(DAY, DAY + timedelta(days=1))
+    service.bar_cache.write('SPY', DAY.date(), bars)
+    calls = count_version_queries(service, monkeypatch)
+
+    service.get_day_bars(DAY)
+    service.get_day_bars(DAY)
+
+    assert len(calls) == 1
+    assert service.bar_cache.read_stamp('SPY', DAY.date()).final
+
+
+def test_session_versions_are_bounded(service, monkeypatch):
+    monkeypatch.setattr(data_service_module, 'SESSION_VERSION_CACHE_SIZE', 3)
+    for offset in range(10):
+        service.get_session_version(DAY - timedelta(days=offset))
+
+    assert list(service._session_versions) == [(DAY - timedelta(days=offset)).date() for offset in (7, 8, 9)]
+
+
+def test_version_is_read_again_after_the_ingestor_drops_a_final_partition(service, monkeypatch):
+    monkeypatch.setattr(data_service_module, 'SESSION_VERSION_TTL', 0)
+    service.get_day_bars(DAY)
+    sealed = service.get_session_version(DAY)
+
+    correct_close(service, 10, 123.25)
+    service.bar_cache.invalidate('SPY', DAY.date())
+
+    assert service.get_session_version(DAY) != sealed
+    assert service.get_day_bars(DAY).close[10] == 123.25
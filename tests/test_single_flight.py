@@ -0,0 +1,84 @@
+"""Coalescing of concurrent identical calls"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from spy_python.services.single_flight import SingleFlight
+
+CALLERS = 8
+
+
+def wait_for_waiters(flight, key, count):
+    """Block until count callers wait on the call in flight for key"""
+    for _ in range(1000):
+        with flight._lock:
+            if flight._calls[key].waiters == count:
+                return
+        time.sleep(0.005)
+    raise AssertionError("Callers did not join the call in flight")
+
+
+def run_concurrently(flight, key, function):
+    """Start a leader that blocks until CALLERS - 1 more callers joined it"""
+    release = threading.Event()
+    started = threading.Event()
+
+    def leader():
+        started.set()
+        release.wait(5)
+        return function()
+
+    with ThreadPoolExecutor(CALLERS) as pool:
+        futures = [pool.submit(flight.do, key, leader)]
+        started.wait(5)
+        futures += [pool.submit(flight.do, key, function) for _ in range(CALLERS - 1)]
+        wait_for_waiters(flight, key, CALLERS - 1)
+        release.set()
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    results = run_concurrently(flight, 'day', lambda: calls.append(1) or {'bars': 390})
+
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {'in_flight': 0, 'calls': 1, 'coalesced': CALLERS - 1}
+
+
+def test_waiters_receive_the_leaders_exception():
+    flight = SingleFlight()
+
+    def fail():
+        raise LookupError("no bars")
+
+    errors = run_concurrently(flight, 'day', fail)
+
+    assert all(isinstance(error, LookupError) for error in errors)
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_keys_are_forgotten_once_the_call_finishes():
+    flight = SingleFlight()
+
+    assert flight.do('day', lambda: 1) == 1
+    assert flight.do('day', lambda: 2) == 2
+    with pytest.raises(ValueError):
+        flight.do('day', lambda: int('x'))
+    assert flight.do('day', lambda: 3) == 3
+    assert flight.stats() == {'in_flight': 0, 'calls': 4, 'coalesced': 0}
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    with ThreadPoolExecutor(2) as pool:
+        blocked = pool.submit(flight.do, 'first', lambda: release.wait(5))
+        assert pool.submit(flight.do, 'second', lambda: 'done').result(timeout=5) == 'done'
+        release.set()
+        assert blocked.result(timeout=5) is True
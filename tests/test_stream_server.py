@@ -0,0 +1,98 @@
+"""Origins allowed to open streams on the stream server"""
+import asyncio
+
+import pytest
+
+from spy_python import stream_server
+from spy_python.stream_server import StreamServer
+
+
+def request(server: StreamServer, headers: bytes) -> bytes:
+    """Send a GET of /api/stream with headers and return the response"""
+    async def send():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"GET /api/stream?symbol=SPY HTTP/1.1\r\n" + headers + b"\r\n")
+        reader.feed_eof()
+        writer = RecordingWriter()
+        await server.handle(reader, writer)
+        return bytes(writer.data)
+
+    return asyncio.run(send())
+
+
+class RecordingWriter:
+    """StreamWriter stand-in that keeps what was written"""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self.data += data
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def streamed(monkeypatch):
+    """Replace streaming with a record of the origins streams were opened for"""
+    origins = []
+
+    async def stream(self, symbol, writer, origin=None):
+        origins.append(origin)
+        writer.write(stream_server.stream_headers(origin))
+
+    monkeypatch.setattr(StreamServer, 'stream', stream)
+    return origins
+
+
+@pytest.mark.parametrize('origin, host, allowed', [
+    ('http://example.com:8000', 'example.com:8001', True),
+    ('http://EXAMPLE.com:8000', 'example.com:8001', True),
+    ('http://example.com:8001', 'example.com:8001', False),
+    ('http://other.example:8000', 'example.com:8001', False),
+    ('http://example.com:8000', None, False),
+    ('null', 'example.com:8001', False),
+    ('http://example.com:8000\r', 'example.com:8001', False),
+])
+def test_default_allows_the_web_app_on_the_requested_host(origin, host, allowed):
+    assert StreamServer(allowed_origins=frozenset(), web_port=8000).allows_origin(origin, host) is allowed
+
+
+def test_configured_origins_replace_the_default():
+    server = StreamServer(allowed_origins=frozenset({'https://charts.example.com'}), web_port=8000)
+
+    assert server.allows_origin('https://charts.example.com', 'stream.example.com')
+    assert server.allows_origin('https://charts.example.com/', 'stream.example.com')
+    assert not server.allows_origin('http://stream.example.com:8000', 'stream.example.com:8001')
+
+
+def test_allowed_origin_is_echoed(streamed):
+    server = StreamServer(allowed_origins=frozenset(), web_port=8000)
+
+    response = request(server, b"Host: localhost:8001\r\nOrigin: http://localhost:8000\r\n")
+
+    assert streamed == ['http://localhost:8000']
+    assert response.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert b"Access-Control-Allow-Origin: http://localhost:8000\r\n" in response
+    assert b"Vary: Origin\r\n" in response
+    assert b"Access-Control-Allow-Origin: *" not in response
+
+
+def test_other_origins_are_refused(streamed):
+    server = StreamServer(allowed_origins=frozenset(), web_port=8000)
+
+    response = request(server, b"Host: localhost:8001\r\nOrigin: https://evil.example\r\n")
+
+    assert streamed == []
+    assert response.startswith(b"HTTP/1.1 403 Forbidden\r\n")
+
+
+def test_requests_without_an_origin_get_no_cors_header(streamed):
+    response = request(StreamServer(allowed_origins=frozenset(), web_port=8000), b"Host: localhost:8001\r\n")
+
+    assert streamed == [None]
+    assert b"Access-Control-Allow-Origin" not in response
@@ -0,0 +1,27 @@
+"""Session anchoring of the VWAP overlay"""
+import numpy as np
+
+from spy_python.indicators.engine import IndicatorEngine
+from spy_python.indicators.vwap import VWAP
+
+
+def run_vwap(**inputs):
+    return IndicatorEngine([VWAP()]).run(inputs)['vwap']['vwap'][0]
+
+
+def test_vwap_restarts_at_each_session():
+    open_time = 9 * 3600 + 30 * 60
+    time = np.array([0, 60, 120, 86400, 86460, 3 * 86400], dtype=np.int64) + open_time
+    price = np.array([10.0, 11.0, 12.0, 20.0, 21.0, 30.0])
+    volume = np.array([1.0, 2.0, 3.0, 4.0, 4.0, 5.0])
+
+    vwap = run_vwap(time=time, high=price, low=price, close=price, volume=volume)
+
+    np.testing.assert_allclose(vwap, [10.0, 32 / 3, 68 / 6, 20.0, 20.5, 30.0])
+
+
+def test_vwap_without_time_is_anchored_at_the_first_bar():
+    price = np.array([10.0, 20.0])
+    volume = np.array([1.0, 3.0])
+
+    np.testing.assert_allclose(run_vwap(high=price, low=price, close=price, volume=volume), [10.0, 17.5])